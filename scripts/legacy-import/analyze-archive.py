@@ -13,9 +13,60 @@ import re
 import hashlib
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 import sqlite3
-import csv
+from functools import lru_cache
+
+from csv_profile import DEFAULT_SAMPLE_SIZE, CsvProfile, profile_csv, profile_csv_files
+from data_quality import profile_csv_paths, profile_json, profile_sql_dump, profile_sqlite
+from dump_index import DumpIndex
+
+# Catégories des tables d'un dump SQL (une table peut en avoir plusieurs)
+SQL_TABLE_CATEGORIES = {
+    "proprietaires": r"proprietaire|owner",
+    "immeubles": r"immeuble|building|site",
+    "locaux": r"local|property|unit",
+    "locataires": r"locataire|tenant",
+    "contrats": r"contrat|contract|lease",
+    "loyers": r"loyer|rent|payment",
+    "paiements": r"paiement|payment|transaction",
+    "charges": r"charge|utility|fee",
+    "quittances": r"quittance|receipt",
+    "documents": r"document|file|attachment",
+}
+_SQL_CATEGORY_RES = [(category, re.compile(pattern, re.IGNORECASE))
+                     for category, pattern in SQL_TABLE_CATEGORIES.items()]
+
+# Catégorie d'un fichier ou d'une clé JSON : la première qui correspond, sinon 'autres'
+FILENAME_CATEGORIES = [
+    ('proprietaires', ['proprietaire', 'owner', 'landlord']),
+    ('immeubles', ['immeuble', 'building', 'site']),
+    ('locaux', ['local', 'property', 'unit', 'apartment']),
+    ('locataires', ['locataire', 'tenant', 'renter']),
+    ('contrats', ['contrat', 'contract', 'lease']),
+    ('loyers', ['loyer', 'rent']),
+    ('paiements', ['paiement', 'payment', 'transaction']),
+    ('charges', ['charge', 'utility', 'fee']),
+    ('quittances', ['quittance', 'receipt']),
+    ('documents', ['document', 'file', 'attachment']),
+]
+
+
+@lru_cache(maxsize=None)
+def table_categories(table: str) -> Tuple[str, ...]:
+    """Catégories d'une table (calculées une fois par nom de table)"""
+    return tuple(category for category, pattern in _SQL_CATEGORY_RES if pattern.search(table))
+
+
+@lru_cache(maxsize=None)
+def filename_category(name: str) -> str:
+    """Catégorie d'un nom de fichier ou de clé (calculée une fois par nom)"""
+    name_lower = name.lower()
+    for category, keywords in FILENAME_CATEGORIES:
+        if any(k in name_lower for k in keywords):
+            return category
+    return 'autres'
+
 
 class LegacyArchiveAnalyzer:
     """
@@ -23,8 +74,13 @@ class LegacyArchiveAnalyzer:
     Détecte automatiquement le format et catégorise les données
     """
     
-    def __init__(self, archive_path: str):
+    def __init__(self, archive_path: str, workers: Optional[int] = None,
+                 sample_size: int = DEFAULT_SAMPLE_SIZE):
         self.archive_path = Path(archive_path)
+        # Processus d'indexation des dumps SQL et de profilage des CSV
+        self.workers = workers or os.cpu_count() or 1
+        # Lignes d'échantillon gardées par fichier CSV
+        self.sample_size = sample_size
         self.report = {
             "analyzed_at": datetime.now().isoformat(),
             "archive_path": str(archive_path),
@@ -53,7 +109,7 @@ class LegacyArchiveAnalyzer:
             self._analyze_sql_dump()
         elif self.report["format"] == "sqlite":
             self._analyze_sqlite()
-        elif self.report["format"] == "csv":
+        elif self.report["format"] in ("csv", "directory"):
             self._analyze_csv_collection()
         elif self.report["format"] == "json":
             self._analyze_json()
@@ -142,71 +198,61 @@ class LegacyArchiveAnalyzer:
         print("\n📊 Analyse du dump SQL...")
         
         categories = {
-            "proprietaires": {"pattern": r"proprietaire|owner", "count": 0, "sample": []},
-            "immeubles": {"pattern": r"immeuble|building|site", "count": 0, "sample": []},
-            "locaux": {"pattern": r"local|property|unit", "count": 0, "sample": []},
-            "locataires": {"pattern": r"locataire|tenant", "count": 0, "sample": []},
-            "contrats": {"pattern": r"contrat|contract|lease", "count": 0, "sample": []},
-            "loyers": {"pattern": r"loyer|rent|payment", "count": 0, "sample": []},
-            "paiements": {"pattern": r"paiement|payment|transaction", "count": 0, "sample": []},
-            "charges": {"pattern": r"charge|utility|fee", "count": 0, "sample": []},
-            "quittances": {"pattern": r"quittance|receipt", "count": 0, "sample": []},
-            "documents": {"pattern": r"document|file|attachment", "count": 0, "sample": []},
+            category: {"pattern": pattern, "count": 0, "sample": []}
+            for category, pattern in SQL_TABLE_CATEGORIES.items()
         }
         
-        tables_found = {}
+        # Index voisin à jour (construit par les importeurs) ; sinon, dump complet
+        # indexé en parallèle (mmap, plages alignées sur les instructions) et sauvegardé
+        index = DumpIndex.load(self.archive_path)
+        if index is None:
+            print(f"  🗂️  Indexation du dump complet ({self.workers} worker(s))...")
+            try:
+                index = DumpIndex.load_or_build(self.archive_path, rebuild=True, workers=self.workers)
+            except Exception as e:
+                self.report["errors"].append(f"Erreur analyse SQL: {e}")
+                print(f"❌ Erreur: {e}")
+                return
+        self._analyze_sql_index(index, categories)
+    
+    def _analyze_sql_index(self, index: DumpIndex, categories: Dict[str, Any]):
+        """Analyse un dump SQL à partir de son index (lecture directe des échantillons)"""
+        print(f"  🗂️  Index utilisé: {DumpIndex.sidecar_path(self.archive_path).name}")
         
-        try:
-            with open(self.archive_path, 'r', encoding='utf-8', errors='ignore') as f:
-                current_table = None
-                insert_count = 0
-                
-                for line_num, line in enumerate(f, 1):
-                    # Détecter CREATE TABLE
-                    create_match = re.search(r'CREATE TABLE\s+[`"]?(\w+)[`"]?', line, re.IGNORECASE)
-                    if create_match:
-                        current_table = create_match.group(1)
-                        tables_found[current_table] = {"inserts": 0, "columns": []}
-                        print(f"  📋 Table trouvée: {current_table}")
-                    
-                    # Détecter colonnes
-                    if current_table and re.search(r'^\s+[`"]?(\w+)[`"]?\s+', line):
-                        col_match = re.search(r'^\s+[`"]?(\w+)[`"]?', line)
-                        if col_match:
-                            tables_found[current_table]["columns"].append(col_match.group(1))
-                    
-                    # Compter INSERT INTO
-                    insert_match = re.search(r'INSERT INTO\s+[`"]?(\w+)[`"]?', line, re.IGNORECASE)
-                    if insert_match:
-                        table = insert_match.group(1)
-                        if table in tables_found:
-                            tables_found[table]["inserts"] += 1
-                            insert_count += 1
-                        
-                        # Catégoriser
-                        for category, info in categories.items():
-                            if re.search(info["pattern"], table, re.IGNORECASE):
-                                info["count"] += 1
-                                if len(info["sample"]) < 3:
-                                    info["sample"].append(line.strip()[:200])
-                    
-                    # Limite de lecture (pour gros fichiers)
-                    if line_num > 100000:
-                        print("  ⚠️  Fichier très volumineux, analyse des 100K premières lignes")
-                        break
-            
-            self.report["statistics"]["total_inserts"] = insert_count
-            self.report["statistics"]["tables"] = tables_found
-            self.report["categories"] = {k: v for k, v in categories.items() if v["count"] > 0}
-            
-            print(f"\n✅ Analyse terminée:")
-            print(f"  • {len(tables_found)} tables trouvées")
-            print(f"  • {insert_count} instructions INSERT détectées")
-            print(f"  • {len(self.report['categories'])} catégories identifiées")
+        tables_found = {}
+        insert_count = 0
+        decode = index.line_decoder().decode
+        
+        for table, info in index.tables.items():
+            tables_found[table] = {
+                "inserts": info.statements,
+                "columns": info.columns,
+                "rows_estimate": info.rows_estimate
+            }
+            print(f"  📋 Table trouvée: {table}")
+            if not info.statements:
+                continue
+            insert_count += info.statements
             
-        except Exception as e:
-            self.report["errors"].append(f"Erreur analyse SQL: {e}")
-            print(f"❌ Erreur: {e}")
+            # Catégoriser
+            for category in table_categories(table):
+                cat_info = categories[category]
+                cat_info["count"] += info.statements
+                if len(cat_info["sample"]) < 3:
+                    for _, raw_line in index.iter_table_lines(table):
+                        if len(cat_info["sample"]) >= 3:
+                            break
+                        line = decode(raw_line)
+                        cat_info["sample"].append(line.strip()[:200])
+        
+        self.report["statistics"]["total_inserts"] = insert_count
+        self.report["statistics"]["tables"] = tables_found
+        self.report["categories"] = {k: v for k, v in categories.items() if v["count"] > 0}
+        
+        print(f"\n✅ Analyse terminée:")
+        print(f"  • {len(tables_found)} tables trouvées")
+        print(f"  • {insert_count} instructions INSERT détectées")
+        print(f"  • {len(self.report['categories'])} catégories identifiées")
     
     def _analyze_sqlite(self):
         """Analyse une base SQLite"""
@@ -284,57 +330,43 @@ class LegacyArchiveAnalyzer:
         
         # Si c'est un fichier CSV unique
         if self.archive_path.is_file():
-            self._analyze_single_csv(self.archive_path)
-        # Si c'est un répertoire
+            self._record_csv_profile(profile_csv(self.archive_path, self.sample_size))
+        # Si c'est un répertoire : un processus par fichier, profils en flux
         elif self.archive_path.is_dir():
-            csv_files = list(self.archive_path.glob("*.csv"))
+            csv_files = sorted(self.archive_path.glob("*.csv"))
             print(f"  📄 {len(csv_files)} fichiers CSV trouvés")
             
-            for csv_file in csv_files:
-                print(f"\n  Analyse de {csv_file.name}...")
-                self._analyze_single_csv(csv_file)
+            for profile in profile_csv_files(csv_files, self.workers, self.sample_size):
+                print(f"\n  Analyse de {profile.file}...")
+                self._record_csv_profile(profile)
     
-    def _analyze_single_csv(self, csv_path: Path):
-        """Analyse un fichier CSV unique"""
-        try:
-            with open(csv_path, 'r', encoding='utf-8', errors='ignore') as f:
-                # Détecter le délimiteur
-                sample = f.read(1024)
-                f.seek(0)
-                
-                delimiter = ','
-                if ';' in sample:
-                    delimiter = ';'
-                elif '\t' in sample:
-                    delimiter = '\t'
-                
-                reader = csv.DictReader(f, delimiter=delimiter)
-                rows = list(reader)
-                
-                if not rows:
-                    return
-                
-                # Analyser les colonnes
-                columns = list(rows[0].keys())
-                
-                # Catégoriser
-                category = self._categorize_filename(csv_path.stem)
-                
-                if category not in self.report["categories"]:
-                    self.report["categories"][category] = []
-                
-                self.report["categories"][category].append({
-                    "file": csv_path.name,
-                    "rows": len(rows),
-                    "columns": columns,
-                    "sample": rows[:3] if len(rows) >= 3 else rows
-                })
-                
-                print(f"    ✓ {len(rows)} lignes, {len(columns)} colonnes")
-                print(f"    ✓ Catégorie: {category}")
-                
-        except Exception as e:
-            self.report["warnings"].append(f"Erreur CSV {csv_path.name}: {e}")
+    def _record_csv_profile(self, profile: CsvProfile):
+        """Ajoute le profil d'un fichier CSV (lignes, types, NULL, échantillon) au rapport"""
+        if profile.error:
+            self.report["warnings"].append(f"Erreur CSV {profile.file}: {profile.error}")
+            return
+        if not profile.rows:
+            return
+        
+        # Catégoriser
+        category = self._categorize_filename(Path(profile.file).stem)
+        
+        if category not in self.report["categories"]:
+            self.report["categories"][category] = []
+        
+        self.report["categories"][category].append({
+            "file": profile.file,
+            "rows": profile.rows,
+            "columns": profile.column_names,
+            "column_stats": profile.column_stats(),
+            "sample": profile.sample
+        })
+        if profile.ragged_rows:
+            self.report["warnings"].append(
+                f"CSV {profile.file}: {profile.ragged_rows} ligne(s) au nombre de champs incorrect")
+        
+        print(f"    ✓ {profile.rows} lignes, {len(profile.columns)} colonnes")
+        print(f"    ✓ Catégorie: {category}")
     
     def _analyze_json(self):
         """Analyse un fichier JSON"""
@@ -369,30 +401,7 @@ class LegacyArchiveAnalyzer:
     
     def _categorize_filename(self, name: str) -> str:
         """Catégorise un fichier selon son nom"""
-        name_lower = name.lower()
-        
-        if any(k in name_lower for k in ['proprietaire', 'owner', 'landlord']):
-            return 'proprietaires'
-        elif any(k in name_lower for k in ['immeuble', 'building', 'site']):
-            return 'immeubles'
-        elif any(k in name_lower for k in ['local', 'property', 'unit', 'apartment']):
-            return 'locaux'
-        elif any(k in name_lower for k in ['locataire', 'tenant', 'renter']):
-            return 'locataires'
-        elif any(k in name_lower for k in ['contrat', 'contract', 'lease']):
-            return 'contrats'
-        elif any(k in name_lower for k in ['loyer', 'rent']):
-            return 'loyers'
-        elif any(k in name_lower for k in ['paiement', 'payment', 'transaction']):
-            return 'paiements'
-        elif any(k in name_lower for k in ['charge', 'utility', 'fee']):
-            return 'charges'
-        elif any(k in name_lower for k in ['quittance', 'receipt']):
-            return 'quittances'
-        elif any(k in name_lower for k in ['document', 'file', 'attachment']):
-            return 'documents'
-        else:
-            return 'autres'
+        return filename_category(name)
     
     def _categorize_data(self):
         """Catégorisation intelligente des données"""
@@ -414,13 +423,49 @@ class LegacyArchiveAnalyzer:
             "completeness": "unknown",
             "duplicates": "unknown",
             "consistency": "unknown",
-            "issues": []
+            "issues": [],
+            "tables": {}
         }
         
-        # TODO: Analyse approfondie selon le format
+        # Une passe par table, en parallèle : NULL, distincts (HyperLogLog), min/max,
+        # histogrammes et doublons de clé (filtre de Bloom), en mémoire bornée
+        try:
+            fmt = self.report["format"]
+            if fmt == "sql":
+                profiles = profile_sql_dump(self.archive_path, self.workers)
+            elif fmt == "sqlite":
+                profiles = profile_sqlite(self.archive_path, self.workers)
+            elif fmt in ("csv", "directory"):
+                paths = ([self.archive_path] if self.archive_path.is_file()
+                         else sorted(self.archive_path.glob("*.csv")))
+                profiles = profile_csv_paths(paths, self.workers)
+            elif fmt == "json":
+                profiles = profile_json(self.archive_path)
+            else:
+                profiles = []
+        except Exception as e:
+            self.report["warnings"].append(f"Analyse de qualité impossible: {e}")
+            profiles = []
+        
+        if profiles:
+            rows = sum(p["rows"] for p in profiles)
+            cells = sum(p["rows"] * len(p["columns"]) for p in profiles)
+            filled = sum(p["completeness"] * p["rows"] * len(p["columns"])
+                         for p in profiles if p["completeness"] is not None)
+            ragged = sum(p["ragged_rows"] for p in profiles)
+            quality["completeness"] = round(filled / cells, 4) if cells else None
+            quality["duplicates"] = sum(p.get("duplicate_keys", 0) for p in profiles)
+            quality["consistency"] = round(1 - ragged / rows, 4) if rows else None
+            for profile in profiles:
+                name = profile.pop("name")
+                quality["issues"].extend(profile.pop("issues"))
+                quality["tables"][name] = profile
+                duplicates = profile.get("duplicate_keys")
+                print(f"  • {name}: {profile['rows']:,} lignes, complétude {profile['completeness']}"
+                      + (f", {duplicates:,} doublon(s) de clé" if duplicates else ""))
         
         self.report["data_quality"] = quality
-        print("  ✓ Analyse de qualité effectuée")
+        print(f"  ✓ Analyse de qualité effectuée ({len(quality['issues'])} problème(s) relevé(s))")
     
     def _generate_mapping(self):
         """Génère le mapping legacy → nouveau système"""
@@ -537,7 +582,7 @@ class LegacyArchiveAnalyzer:
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: python analyze-archive.py <path-to-archive>")
+        print("Usage: python analyze-archive.py <path-to-archive> [--workers N] [--sample-size N]")
         print("\nExemples:")
         print("  python analyze-archive.py backup.sql")
         print("  python analyze-archive.py database.sqlite")
@@ -546,8 +591,11 @@ def main():
         sys.exit(1)
     
     archive_path = sys.argv[1]
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv[:-1] else None
+    sample_size = (int(sys.argv[sys.argv.index("--sample-size") + 1]) if "--sample-size" in sys.argv[:-1]
+                   else DEFAULT_SAMPLE_SIZE)
     
-    analyzer = LegacyArchiveAnalyzer(archive_path)
+    analyzer = LegacyArchiveAnalyzer(archive_path, workers=workers, sample_size=sample_size)
     analyzer.analyze()
 
 if __name__ == "__main__":
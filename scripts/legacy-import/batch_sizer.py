@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Taille de batch adaptative des écrivains (migration et imports)
+La meilleure taille de batch dépend du serveur, du réseau et de la largeur
+des lignes : trop petite, la latence par aller-retour et par commit domine ;
+trop grande, les verrous sont tenus longtemps, la mémoire gonfle et le débit
+retombe. Le contrôleur observe chaque batch écrit (lignes, durée écriture +
+commit, octets) et ajuste la taille en cours de route :
+
+  - au-delà de max_seconds (temps de verrou par transaction), la taille est
+    réduite en proportion ;
+  - la taille est plafonnée par max_bytes (mémoire d'un batch), d'après la
+    largeur moyenne observée des lignes ;
+  - sinon, recherche du meilleur débit (lignes/s) : la taille est multipliée
+    ou divisée par un pas tant que le débit progresse ; quand il recule, le
+    sens s'inverse et le pas se resserre autour de l'optimum. Un pas resserré
+    est rouvert après un changement de régime (débit qui s'écarte nettement).
+
+Un batch en échec (lignes rejetées après bissection, verrou ou
+statement_timeout expiré) ramène la taille à la moitié ; sa durée, gonflée
+par les nouveaux essais, n'est pas comptée comme latence.
+"""
+
+from typing import Any, Optional, Sequence
+
+DEFAULT_MIN_SIZE = 100
+DEFAULT_MAX_SIZE = 50_000
+# Temps maximal d'une transaction de batch (verrous tenus), en secondes
+DEFAULT_MAX_SECONDS = 2.0
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+_INITIAL_STEP = 2.0
+_MIN_STEP = 1.1
+# Batches mesurés par taille avant de la juger (lisse le bruit)
+_WINDOW = 2
+# lock_not_available (lock_timeout), query_canceled (statement_timeout)
+TIMEOUT_PGCODES = frozenset(('55P03', '57014'))
+
+
+def row_bytes(row: Sequence[Any]) -> int:
+    """Largeur approximative d'une ligne (texte des valeurs), pour le plafond mémoire"""
+    return sum(len(v) if v.__class__ in (str, bytes) else 8 for v in row if v is not None) + 8 * len(row)
+
+
+def is_timeout(error: BaseException) -> bool:
+    """Erreur PostgreSQL d'attente de verrou ou de statement_timeout (batch à retenter plus petit)"""
+    return getattr(error, 'pgcode', None) in TIMEOUT_PGCODES
+
+
+class AdaptiveBatchSizer:
+    """
+    Taille de batch ajustée d'après la latence et le débit observés
+
+    size : taille à utiliser pour le prochain batch ; record() après chaque
+    batch écrit et commité sans rejet ; failed() à la place quand le batch a
+    dû être bissecté ou a expiré. fixed=True garde la taille initiale
+    (mesures conservées pour l'affichage).
+    """
+
+    def __init__(self, initial: int, minimum: int = DEFAULT_MIN_SIZE, maximum: int = DEFAULT_MAX_SIZE,
+                 max_seconds: float = DEFAULT_MAX_SECONDS, max_bytes: int = DEFAULT_MAX_BYTES,
+                 fixed: bool = False):
+        self.minimum = max(1, min(minimum, initial))
+        self.maximum = max(maximum, initial)
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.fixed = fixed
+        self._size = initial
+        self._step = _INITIAL_STEP
+        self._direction = 1
+        # Mesures de la taille courante, débit de la taille jugée précédemment
+        self._rows = 0
+        self._seconds = 0.0
+        self._batches = 0
+        self._previous_rate: Optional[float] = None
+        self._row_bytes: Optional[float] = None
+        self.last_rate: Optional[float] = None
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _clamp(self, size: float) -> int:
+        ceiling = self.maximum
+        if self._row_bytes:
+            ceiling = min(ceiling, int(self.max_bytes / self._row_bytes))
+        return int(max(self.minimum, min(size, max(ceiling, self.minimum))))
+
+    def _resize(self, size: float):
+        new = self._clamp(size)
+        if new != self._size:
+            self._size = new
+            self._rows, self._seconds, self._batches = 0, 0.0, 0
+
+    def record(self, rows: int, seconds: float, nbytes: Optional[int] = None):
+        """Un batch de `rows` lignes écrit et commité en `seconds` (nbytes : taille estimée)"""
+        if rows <= 0:
+            return
+        if nbytes:
+            width = nbytes / rows
+            self._row_bytes = width if self._row_bytes is None else 0.8 * self._row_bytes + 0.2 * width
+        self.last_rate = rows / seconds if seconds > 0 else None
+        if self.fixed:
+            return
+
+        if seconds > self.max_seconds:
+            # Verrous tenus trop longtemps : retour sous la limite, puis recherche fine
+            self._step = max(_MIN_STEP, self._step ** 0.5)
+            self._direction = -1
+            self._previous_rate = None
+            self._resize(rows * self.max_seconds / seconds * 0.8)
+            return
+        if self._size > self._clamp(self._size):
+            self._resize(self._size)
+            return
+
+        self._rows += rows
+        self._seconds += seconds
+        self._batches += 1
+        if self._batches < _WINDOW or self._seconds <= 0:
+            return
+        rate = self._rows / self._seconds
+        previous = self._previous_rate
+        if previous is not None:
+            if rate < previous:
+                # Moins bon que la taille précédente : demi-tour, pas resserré
+                self._direction = -self._direction
+                self._step = max(_MIN_STEP, self._step ** 0.5)
+            elif rate > previous * 1.5 and self._step < _INITIAL_STEP:
+                # Nouveau régime (serveur moins chargé, lignes plus étroites) : on réélargit
+                self._step = _INITIAL_STEP
+        self._previous_rate = rate
+        target = self._size * self._step if self._direction > 0 else self._size / self._step
+        if self._clamp(target) == self._size:
+            # Butée (min, max, mémoire) : on repart dans l'autre sens au prochain jugement
+            self._direction = -self._direction
+        self._resize(target)
+
+    def failed(self):
+        """Batch en erreur (timeout, verrou, rejet) : taille divisée par deux"""
+        if not self.fixed:
+            self._previous_rate = None
+            self._direction = -1
+            self._resize(self._size / 2)
+
+    def describe(self) -> str:
+        rate = f", {self.last_rate:,.0f} l/s" if self.last_rate else ''
+        return f"lot {self._size:,}{rate}"
+
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Micro-benchmark du parcours d'un dump par l'analyseur d'archive
+Compare, sur un dump mysqldump synthétique en mémoire, l'ancienne boucle de
+LegacyArchiveAnalyzer._analyze_sql_dump (trois re.search par ligne, puis les
+dix regex de catégories sur le nom de table de chaque INSERT) et le parcours
+actuel : automate unique de dump_index (une tentative par ligne) et
+catégories mémorisées par nom de table. Coût par ligne et débit.
+
+Usage:
+    python bench-archive-scanner.py [--lines 500000] [--rows-per-insert 1]
+"""
+
+import argparse
+import importlib.util
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+from dump_index import TableIndex, _index_lines
+from dump_reader import LineDecoder
+
+TABLES = ['proprietaire', 'immeuble', 'local', 'locataire', 'contrat', 'loyer',
+          'paiement', 'charges', 'historique', 'utilisateur']
+
+# Catégories de l'ancienne boucle (motifs recompilés à chaque appel par re.search)
+LEGACY_CATEGORIES = {
+    "proprietaires": r"proprietaire|owner",
+    "immeubles": r"immeuble|building|site",
+    "locaux": r"local|property|unit",
+    "locataires": r"locataire|tenant",
+    "contrats": r"contrat|contract|lease",
+    "loyers": r"loyer|rent|payment",
+    "paiements": r"paiement|payment|transaction",
+    "charges": r"charge|utility|fee",
+    "quittances": r"quittance|receipt",
+    "documents": r"document|file|attachment",
+}
+
+
+def load_analyzer():
+    """analyze-archive.py (nom à tiret) chargé comme module"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analyze-archive.py')
+    spec = importlib.util.spec_from_file_location('analyze_archive', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_dump(lines: int, rows_per_insert: int) -> List[bytes]:
+    """Lignes d'un dump : en-têtes, DDL par table, puis blocs INSERT entrecoupés de commentaires"""
+    dump = [b"-- MySQL dump 10.13\n", b"/*!40101 SET NAMES utf8 */;\n", b"\n"]
+    for table in TABLES:
+        dump += [
+            f"CREATE TABLE `{table}` (\n".encode(),
+            b"  `id` int(11) NOT NULL AUTO_INCREMENT,\n",
+            b"  `nom` varchar(255) DEFAULT NULL,\n",
+            b"  `montant` decimal(10,2) DEFAULT NULL,\n",
+            b"  `date` datetime NOT NULL DEFAULT '0000-00-00 00:00:00',\n",
+            b"  PRIMARY KEY (`id`)\n",
+            b") ENGINE=InnoDB DEFAULT CHARSET=latin1;\n",
+        ]
+    i = 0
+    while len(dump) < lines:
+        table = TABLES[i % len(TABLES)]
+        dump.append(f"/*!40000 ALTER TABLE `{table}` DISABLE KEYS */;\n".encode())
+        for _ in range(50):
+            values = ','.join(f"({i * 1000 + r},'Nom {r}','850.00','2019-05-01 00:00:00')"
+                              for r in range(rows_per_insert))
+            dump.append(f"INSERT INTO `{table}` VALUES {values};\n".encode())
+        i += 1
+    return dump[:lines]
+
+
+def legacy_scan(lines: List[bytes]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Ancienne boucle de _analyze_sql_dump (sans la limite des 100K lignes)"""
+    categories = {k: {"pattern": p, "count": 0, "sample": []} for k, p in LEGACY_CATEGORIES.items()}
+    tables_found: Dict[str, Dict[str, Any]] = {}
+    current_table = None
+    for raw in lines:
+        line = raw.decode('utf-8', errors='ignore')
+        create_match = re.search(r'CREATE TABLE\s+[`"]?(\w+)[`"]?', line, re.IGNORECASE)
+        if create_match:
+            current_table = create_match.group(1)
+            tables_found[current_table] = {"inserts": 0, "columns": []}
+        if current_table and re.search(r'^\s+[`"]?(\w+)[`"]?\s+', line):
+            col_match = re.search(r'^\s+[`"]?(\w+)[`"]?', line)
+            if col_match:
+                tables_found[current_table]["columns"].append(col_match.group(1))
+        insert_match = re.search(r'INSERT INTO\s+[`"]?(\w+)[`"]?', line, re.IGNORECASE)
+        if insert_match:
+            table = insert_match.group(1)
+            if table in tables_found:
+                tables_found[table]["inserts"] += 1
+            for category, info in categories.items():
+                if re.search(info["pattern"], table, re.IGNORECASE):
+                    info["count"] += 1
+                    if len(info["sample"]) < 3:
+                        info["sample"].append(line.strip()[:200])
+    return ({t: info["inserts"] for t, info in tables_found.items()},
+            {k: v["count"] for k, v in categories.items() if v["count"]})
+
+
+def _with_offsets(lines: List[bytes]) -> Iterator[Tuple[int, bytes]]:
+    offset = 0
+    for line in lines:
+        yield offset, line
+        offset += len(line)
+
+
+def current_scan(lines: List[bytes], table_categories) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Parcours actuel : index du dump puis catégories une fois par table"""
+    tables: Dict[str, TableIndex] = {}
+    _index_lines(_with_offsets(lines), LineDecoder('utf-8'), tables)
+    counts: Dict[str, int] = {}
+    for table, info in tables.items():
+        for category in table_categories(table):
+            counts[category] = counts.get(category, 0) + info.statements
+    return {t: info.statements for t, info in tables.items()}, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark du parcours de dump de l'analyseur")
+    parser.add_argument('--lines', type=int, default=500_000, help="Lignes du dump synthétique")
+    parser.add_argument('--rows-per-insert', type=int, default=1,
+                        help="Tuples par INSERT (1 : coût par ligne ; 500+ : INSERT étendus de mysqldump)")
+    args = parser.parse_args()
+
+    analyzer = load_analyzer()
+    lines = make_dump(args.lines, args.rows_per_insert)
+    size = sum(len(line) for line in lines)
+    print(f"🧪 {len(lines):,} lignes, {size / 1e6:,.1f} Mo, {len(TABLES)} tables, "
+          f"{args.rows_per_insert} tuple(s) par INSERT")
+
+    started = time.perf_counter()
+    legacy = legacy_scan(lines)
+    legacy_seconds = time.perf_counter() - started
+    analyzer.table_categories.cache_clear()
+    started = time.perf_counter()
+    current = current_scan(lines, analyzer.table_categories)
+    current_seconds = time.perf_counter() - started
+    assert legacy == current, f"résultats différents: {legacy} != {current}"
+
+    print(f"\n  {'parcours':<40} {'µs/ligne':>9} {'Mo/s':>8}")
+    for label, seconds in (('3 re.search/ligne + 10 regex/INSERT', legacy_seconds),
+                           ('automate unique + catégories mémorisées', current_seconds)):
+        print(f"  {label:<40} {seconds / len(lines) * 1e6:>9.2f} {size / 1e6 / seconds:>8.1f}")
+    print(f"\n  Catégorisations calculées : {analyzer.table_categories.cache_info().misses} "
+          f"(une par table, au lieu d'une par INSERT)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Micro-benchmark des projecteurs de lignes
+Compare, sur des tuples synthétiques de la table loyer (18 colonnes mappées),
+l'ancienne transformation (dict record → dict cible → liste de valeurs) et
+row_projector (itemgetter compilé) : coût par ligne et objets alloués pour un
+batch tel qu'il est gardé en mémoire jusqu'au COPY.
+
+Usage:
+    python bench-row-projector.py [--rows 1000000] [--batch-size 5000]
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from row_projector import RowProjector
+
+# Colonnes d'un INSERT loyer (dont 4 non mappées) et mapping de import-sql-direct-auto.py
+SOURCE_COLUMNS = [
+    'id', 'num', 'contrat_id', 'local_id', 'locataire_id', 'proprietaire_id', 'montant_tot',
+    'loy', 'charges', 'caf', 'tva', 'solde', 'echeance', 'periode_du', 'periode_au',
+    'statut', 'paiement', 'commentaire', 'cree_par', 'modifie_par', 'ip', 'version',
+]
+MAPPING = {
+    'id': 'id', 'num': 'invoice_number', 'contrat_id': 'contract_id', 'local_id': 'property_id',
+    'locataire_id': 'tenant_id', 'proprietaire_id': 'owner_id', 'montant_tot': 'total_amount',
+    'loy': 'rent_amount', 'charges': 'charges_amount', 'caf': 'housing_benefit', 'tva': 'vat_amount',
+    'solde': 'balance', 'echeance': 'due_date', 'periode_du': 'period_start', 'periode_au': 'period_end',
+    'statut': 'status', 'paiement': 'payment_status', 'commentaire': 'notes',
+}
+
+
+def make_rows(count: int) -> List[List[Any]]:
+    rows = []
+    for i in range(count):
+        rows.append([
+            i, f"F{i:08d}", i % 900, i % 700, i % 5000, i % 40, Decimal('850.00'),
+            Decimal('750.00'), Decimal('100.00'), '' if i % 3 else Decimal('120.00'), Decimal('0.00'),
+            Decimal('0.00'), '2019-05-01', '2019-05-01', '2019-05-31', 'paye', 'complet',
+            '' if i % 5 else 'Relance envoyée', 1, 1, '10.0.0.1', 3,
+        ])
+    return rows
+
+
+def legacy_transform(batch: List[List[Any]]) -> List[List[Any]]:
+    """Ancien chemin : record dict par tuple, puis dict cible, puis liste de valeurs"""
+    records = []
+    for values in batch:
+        record = {}
+        for i, col in enumerate(SOURCE_COLUMNS):
+            val = values[i] if i < len(values) else None
+            record[col] = None if val is None or val == '' else val
+        records.append(record)
+    transformed = []
+    for record in records:
+        new_record: Dict[str, Any] = {}
+        for old_field, new_field in MAPPING.items():
+            if old_field in record:
+                new_record[new_field] = record[old_field]
+        transformed.append(new_record)
+    columns = list(transformed[0].keys())
+    return [[record.get(col) for col in columns] for record in transformed]
+
+
+def projector_transform(batch: List[List[Any]]) -> List[Any]:
+    return PROJECTOR.project_rows(batch)
+
+
+PROJECTOR = RowProjector(SOURCE_COLUMNS, MAPPING, null_values=('',))
+
+
+def time_per_row(transform, rows: List[List[Any]], batch_size: int) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(rows), batch_size):
+        transform(rows[start:start + batch_size])
+    return (time.perf_counter() - started) / len(rows) * 1e6
+
+
+def allocations_per_row(transform, batch: List[List[Any]]) -> tuple:
+    """(blocs mémoire alloués et non libérés par ligne, pic tracemalloc en octets par ligne)"""
+    gc.collect()
+    before = sys.getallocatedblocks()
+    result = transform(batch)
+    blocks = (sys.getallocatedblocks() - before) / len(batch)
+    del result
+    gc.collect()
+    tracemalloc.start()
+    transform(batch)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return blocks, peak / len(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark des projecteurs de lignes")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Tuples projetés")
+    parser.add_argument('--batch-size', type=int, default=5000, help="Taille des batches (défaut: 5000)")
+    args = parser.parse_args()
+
+    print(f"🧪 {args.rows:,} tuples de {len(SOURCE_COLUMNS)} colonnes, {len(MAPPING)} mappées")
+    rows = make_rows(args.rows)
+    batch = rows[:args.batch_size]
+
+    legacy_rows = legacy_transform(batch)
+    projected_rows = projector_transform(batch)
+    assert [list(r) for r in projected_rows] == legacy_rows, "projections différentes"
+
+    print(f"\n  {'chemin':<26} {'µs/ligne':>9} {'blocs/ligne':>12} {'pic o/ligne':>12}")
+    for label, transform in (('dict → dict → liste', legacy_transform),
+                             ('RowProjector (itemgetter)', projector_transform)):
+        per_row = time_per_row(transform, rows, args.batch_size)
+        blocks, peak = allocations_per_row(transform, batch)
+        print(f"  {label:<26} {per_row:>9.2f} {blocks:>12.1f} {peak:>12,.0f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
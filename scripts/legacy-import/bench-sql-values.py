@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Benchmark du tokenizer sql_values
+Génère un dump synthétique (1M lignes par défaut, INSERT étendus façon
+mysqldump) puis mesure le débit de sql_values.iter_insert_rows, comparé à
+l'ancien découpage caractère par caractère des importeurs.
+
+Usage:
+    python bench-sql-values.py [--rows 1000000] [--per-insert 1000] [--dump fichier.sql] [--keep] [--repeat 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import List
+
+from sql_values import iter_insert_rows
+
+TABLE_DDL = """CREATE TABLE `paiement` (
+  `id` int(11) NOT NULL,
+  `locataire_id` int(11) DEFAULT NULL,
+  `montant` decimal(12,2) DEFAULT NULL,
+  `date_paiement` datetime DEFAULT NULL,
+  `libelle` varchar(255) DEFAULT NULL,
+  `reference` varbinary(16) DEFAULT NULL,
+  `statut` enum('paye','impaye') DEFAULT NULL
+);
+"""
+
+LIBELLES = [
+    "Loyer d'octobre",
+    'Avance sur charges',
+    'Régularisation \\"eau\\"',
+    'Caution\\r\\nversée en espèces',
+    'Paiement partiel, reste dû',
+    'C:\\\\dossiers\\\\2019',
+]
+
+
+def generate_dump(path: str, rows: int, per_insert: int, seed: int = 42):
+    """Écrit un dump de `rows` lignes réparties en INSERT de `per_insert` tuples"""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(TABLE_DDL)
+        row_id = 0
+        while row_id < rows:
+            count = min(per_insert, rows - row_id)
+            tuples: List[str] = []
+            for _ in range(count):
+                row_id += 1
+                locataire = 'NULL' if rng.random() < 0.05 else str(rng.randint(1, 5000))
+                montant = f"{rng.randint(1000, 900000) / 100:.2f}"
+                date = ("'0000-00-00 00:00:00'" if rng.random() < 0.02 else
+                        f"'20{rng.randint(10, 24):02d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 10:00:00'")
+                libelle = rng.choice(LIBELLES)
+                reference = '0x' + rng.getrandbits(64).to_bytes(8, 'big').hex().upper()
+                statut = rng.choice(("'paye'", "'impaye'"))
+                tuples.append(f"({row_id},{locataire},{montant},{date},'{libelle}',{reference},{statut})")
+            f.write("INSERT INTO `paiement` VALUES " + ','.join(tuples) + ';\n')
+
+
+def legacy_split_values(values_str: str) -> List[str]:
+    """Ancien découpage des importeurs (un caractère à la fois), pour comparaison"""
+    values: List[str] = []
+    in_string = False
+    current_value = ''
+    escape_next = False
+    for ch in values_str:
+        if escape_next:
+            current_value += ch
+            escape_next = False
+            continue
+        if ch == '\\':
+            escape_next = True
+            continue
+        if ch == "'":
+            in_string = not in_string
+            continue
+        if ch == ',' and not in_string:
+            values.append(current_value.strip())
+            current_value = ''
+            continue
+        current_value += ch
+    if current_value:
+        values.append(current_value.strip())
+    return values
+
+
+def bench_tokenizer(path: str) -> int:
+    rows = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parsed = iter_insert_rows(line)
+            if parsed is None:
+                continue
+            for _ in parsed[2]:
+                rows += 1
+    return rows
+
+
+def bench_legacy(path: str) -> int:
+    values = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.startswith('INSERT'):
+                continue
+            start = line.index('(')
+            values += len(legacy_split_values(line[start + 1:line.rindex(')')]))
+    return values
+
+
+def _report(label: str, seconds: float, rows: int, size: int):
+    print(f"  {label:<28} {seconds:8.2f}s  {rows / seconds:>12,.0f} lignes/s  "
+          f"{size / seconds / 1e6:8.1f} Mo/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du tokenizer sql_values")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="Lignes du dump synthétique")
+    parser.add_argument('--per-insert', type=int, default=1000, help="Tuples par INSERT étendu")
+    parser.add_argument('--dump', help="Dump à utiliser/créer (défaut: fichier temporaire)")
+    parser.add_argument('--keep', action='store_true', help="Conserver le dump généré")
+    parser.add_argument('--skip-legacy', action='store_true', help="Ne pas mesurer l'ancien découpage")
+    parser.add_argument('--repeat', type=int, default=5, help="Passes par parseur (meilleur temps retenu)")
+    args = parser.parse_args()
+
+    path = args.dump
+    if not path:
+        fd, path = tempfile.mkstemp(suffix='.sql', prefix='akig-bench-')
+        os.close(fd)
+
+    try:
+        if not args.dump or not os.path.exists(path):
+            print(f"🧪 Génération de {args.rows:,} lignes → {path}")
+            t0 = time.perf_counter()
+            generate_dump(path, args.rows, args.per_insert)
+            print(f"   {time.perf_counter() - t0:.1f}s")
+        size = os.path.getsize(path)
+        print(f"📦 Dump: {size / 1e6:.1f} Mo\n")
+
+        # Passes alternées, meilleur temps CPU de chaque parseur : le bruit d'une machine
+        # partagée ne favorise pas l'un des deux
+        best = {'tokenizer': float('inf'), 'legacy': float('inf')}
+        rows = 0
+        for _ in range(args.repeat):
+            t0 = time.process_time()
+            rows = bench_tokenizer(path)
+            best['tokenizer'] = min(best['tokenizer'], time.process_time() - t0)
+            if not args.skip_legacy:
+                t0 = time.process_time()
+                bench_legacy(path)
+                best['legacy'] = min(best['legacy'], time.process_time() - t0)
+
+        _report('sql_values (regex, typé)', best['tokenizer'], rows, size)
+        if not args.skip_legacy:
+            # Même nombre de lignes : le débit est comparable
+            _report('ancien découpage par char', best['legacy'], rows, size)
+            print(f"\n  Rapport: {best['legacy'] / best['tokenizer']:.2f}x "
+                  f"(l'ancien découpage ne type ni ne déséchappe les valeurs)")
+    finally:
+        if not args.dump and not args.keep:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
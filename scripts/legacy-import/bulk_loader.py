@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Chargement en masse PostgreSQL via COPY ... FROM STDIN
+Sérialise les records transformés au format texte de COPY et les envoie en un
+seul aller-retour par batch. En cas d'échec, le batch est coupé en deux
+récursivement pour isoler les lignes fautives (O(log n) allers-retours par
+ligne rejetée) ; celles-ci partent dans un fichier de rejets avec l'erreur.
+
+Le module ne dépend pas de psycopg2 à l'import : il travaille sur un curseur
+fourni par l'appelant (copy_expert / execute).
+"""
+
+import io
+import json
+from datetime import date, datetime, time as dt_time
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+# Échappements du format texte de COPY
+_COPY_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+})
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def quote_ident(name: str) -> str:
+    """Identifiant PostgreSQL entre guillemets"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def copy_text_value(value: Any) -> str:
+    """Représentation d'une valeur Python dans le format texte de COPY"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        # bytea en hexadécimal ; le backslash est lui-même échappé pour COPY
+        return '\\\\x' + bytes(value).hex()
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def build_copy_buffer(rows: Sequence[Sequence[Any]]) -> io.StringIO:
+    """Construit le flux COPY (une ligne par record, colonnes séparées par TAB)"""
+    buf = io.StringIO()
+    write = buf.write
+    for row in rows:
+        write('\t'.join([copy_text_value(v) for v in row]))
+        write('\n')
+    buf.seek(0)
+    return buf
+
+
+def copy_sql(table: str, columns: Sequence[str]) -> str:
+    cols = ', '.join(quote_ident(c) for c in columns)
+    return f"COPY {quote_ident(table)} ({cols}) FROM STDIN"
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Sequence[Sequence[Any]]) -> int:
+    """Envoie un batch complet via COPY ; lève l'exception PostgreSQL en cas d'échec"""
+    if not rows:
+        return 0
+    cursor.copy_expert(copy_sql(table, columns), build_copy_buffer(rows))
+    return len(rows)
+
+
+def insert_values_rows(cursor, table: str, columns: Sequence[str], rows: Sequence[Sequence[Any]],
+                       suffix: str = '') -> int:
+    """Un seul INSERT multi-lignes (pour les cibles qui ont besoin de ON CONFLICT)"""
+    if not rows:
+        return 0
+    cols = ', '.join(quote_ident(c) for c in columns)
+    tuple_sql = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    sql = f"INSERT INTO {quote_ident(table)} ({cols}) VALUES " + ', '.join([tuple_sql] * len(rows))
+    if suffix:
+        sql = f"{sql} {suffix}"
+    cursor.execute(sql, [v for row in rows for v in row])
+    # rowcount exclut les lignes écartées par ON CONFLICT DO NOTHING
+    return cursor.rowcount if cursor.rowcount >= 0 else len(rows)
+
+
+class RejectWriter:
+    """Fichier de rejets (JSON lines) : table, erreur PostgreSQL et valeurs de chaque ligne rejetée"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.count = 0
+        self._file = None
+
+    def write(self, table: str, columns: Sequence[str], row: Sequence[Any], error: Exception):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        entry = {
+            'table': table,
+            'error': str(error).strip(),
+            'pgcode': getattr(error, 'pgcode', None),
+            'row': dict(zip(columns, row)),
+        }
+        self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+LoadFn = Callable[[Any, str, Sequence[str], Sequence[Sequence[Any]]], int]
+
+
+def load_rows(cursor, table: str, columns: Sequence[str], rows: Sequence[Sequence[Any]],
+              load_fn: LoadFn = copy_rows,
+              ) -> Tuple[int, List[Tuple[Sequence[Any], Exception]]]:
+    """
+    Charge un batch de façon optimiste, puis par bissection en cas d'échec
+
+    Le batch entier est tenté sous SAVEPOINT ; s'il échoue, chaque moitié est
+    retentée récursivement jusqu'à isoler les lignes fautives, qui sont rejetées
+    (les valeurs sont déjà converties à la projection : pas de seconde tentative).
+
+    Returns:
+        (lignes insérées selon load_fn, [(ligne rejetée, erreur), ...])
+    """
+    failures: List[Tuple[Sequence[Any], Exception]] = []
+
+    def attempt(chunk: Sequence[Sequence[Any]]) -> Tuple[int, Optional[Exception]]:
+        cursor.execute("SAVEPOINT sp_bulk")
+        try:
+            loaded = load_fn(cursor, table, columns, chunk)
+        except Exception as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT sp_bulk")
+            return 0, e
+        cursor.execute("RELEASE SAVEPOINT sp_bulk")
+        return loaded, None
+
+    def bisect(chunk: Sequence[Sequence[Any]]) -> int:
+        loaded, error = attempt(chunk)
+        if error is None:
+            return loaded
+        if len(chunk) > 1:
+            middle = len(chunk) // 2
+            return bisect(chunk[:middle]) + bisect(chunk[middle:])
+        failures.append((chunk[0], error))
+        return 0
+
+    inserted = bisect(rows) if rows else 0
+    return inserted, failures
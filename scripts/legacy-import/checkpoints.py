@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Points de reprise durables des imports legacy
+Une ligne par (dump, table legacy, shard) dans legacy_import_checkpoints,
+écrite dans la MÊME transaction que le batch qu'elle valide : après un échec,
+--resume repart exactement de la dernière position commitée.
+
+Position = (offset de l'INSERT en cours, nombre de tuples déjà importés dans
+cet INSERT) ; les INSERT étendus peuvent donc être repris en plein milieu.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, Tuple
+
+CHECKPOINT_TABLE = 'legacy_import_checkpoints'
+
+CREATE_CHECKPOINT_TABLE = f"""
+    CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+        dump_key TEXT NOT NULL,
+        legacy_table TEXT NOT NULL,
+        shard_start BIGINT NOT NULL,
+        byte_offset BIGINT NOT NULL,
+        tuples_done INTEGER NOT NULL,
+        rows_committed BIGINT NOT NULL,
+        updated_at TIMESTAMP NOT NULL DEFAULT now(),
+        PRIMARY KEY (dump_key, legacy_table, shard_start)
+    )
+"""
+
+
+def dump_key(dump_path) -> str:
+    """Identifiant d'un dump : nom, taille et mtime (un dump modifié repart de zéro)"""
+    st = os.stat(dump_path)
+    return f"{Path(dump_path).name}:{st.st_size}:{st.st_mtime_ns}"
+
+
+class ImportCheckpoints:
+    """Accès à la table des points de reprise (curseur fourni par l'importeur)"""
+
+    def __init__(self, cursor, key: str):
+        self.cursor = cursor
+        self.key = key
+
+    def ensure_table(self):
+        self.cursor.execute(CREATE_CHECKPOINT_TABLE)
+
+    def load(self) -> Dict[Tuple[str, int], Tuple[int, int, int]]:
+        """{(table, shard_start): (byte_offset, tuples_done, rows_committed)}"""
+        self.cursor.execute(
+            f"SELECT legacy_table, shard_start, byte_offset, tuples_done, rows_committed "
+            f"FROM {CHECKPOINT_TABLE} WHERE dump_key = %s",
+            (self.key,)
+        )
+        return {(row[0], row[1]): (row[2], row[3], row[4]) for row in self.cursor.fetchall()}
+
+    def reset(self):
+        self.cursor.execute(f"DELETE FROM {CHECKPOINT_TABLE} WHERE dump_key = %s", (self.key,))
+
+    def save(self, legacy_table: str, shard_start: int, byte_offset: int,
+             tuples_done: int, rows_committed: int):
+        """Enregistre la position ; à exécuter dans la transaction du batch, avant le commit"""
+        self.cursor.execute(
+            f"""
+            INSERT INTO {CHECKPOINT_TABLE}
+                (dump_key, legacy_table, shard_start, byte_offset, tuples_done, rows_committed)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (dump_key, legacy_table, shard_start) DO UPDATE SET
+                byte_offset = EXCLUDED.byte_offset,
+                tuples_done = EXCLUDED.tuples_done,
+                rows_committed = EXCLUDED.rows_committed,
+                updated_at = now()
+            """,
+            (self.key, legacy_table, shard_start, byte_offset, tuples_done, rows_committed)
+        )
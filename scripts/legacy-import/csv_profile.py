@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Profilage en flux des exports CSV legacy
+Une seule lecture par fichier, en mémoire constante : nombre de lignes,
+type déduit et taux de NULL par colonne, longueur maximale, et un
+échantillon représentatif de taille fixe (reservoir sampling : chaque ligne
+a la même probabilité d'y figurer, sans garder le fichier en mémoire).
+
+Les fichiers d'un répertoire sont profilés en parallèle (un processus par
+fichier) ; seuls les profils remontent au processus principal.
+"""
+
+import csv
+import os
+import random
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_SAMPLE_SIZE = 3
+
+# Valeurs vides des exports MySQL / tableur, et dates zéro (NULL après migration)
+NULL_VALUES = frozenset(('', 'NULL', 'null', '\\N', '0000-00-00', '0000-00-00 00:00:00'))
+
+# Types essayés dans cet ordre pour classer une valeur ; une colonne ne fait que s'élargir
+_TYPE_PATTERNS = {
+    'integer': re.compile(r'[+-]?\d+'),
+    'decimal': re.compile(r'[+-]?(?:\d+[.,]\d*|[.,]\d+)'),
+    'date': re.compile(r'\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}'),
+    'datetime': re.compile(r'(?:\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4})[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?'),
+}
+# Type étroit → type large de la même famille (un montant peut être 3 ou 2.25)
+_WIDER = {
+    'integer': 'decimal',
+    'date': 'datetime',
+}
+
+
+def _classify(value: str) -> str:
+    for kind, pattern in _TYPE_PATTERNS.items():
+        if pattern.fullmatch(value):
+            return kind
+    return 'text'
+
+
+def _join(kind: str, other: str) -> str:
+    """Plus petit type qui couvre les deux : le plus large d'une même famille, sinon text"""
+    if kind == other or _WIDER.get(other) == kind:
+        return kind
+    if _WIDER.get(kind) == other:
+        return other
+    return 'text'
+
+
+def sniff_delimiter(sample: str) -> str:
+    """Délimiteur d'après le début du fichier (exports FR : ';')"""
+    if ';' in sample:
+        return ';'
+    if '\t' in sample:
+        return '\t'
+    return ','
+
+
+@dataclass
+class ColumnProfile:
+    """Profil d'une colonne : type déduit (None tant que tout est NULL), NULL, longueur max"""
+    name: str
+    type: Optional[str] = None
+    nulls: int = 0
+    max_length: int = 0
+
+    def add(self, value: Optional[str]):
+        if value is None or value in NULL_VALUES:
+            self.nulls += 1
+            return
+        length = len(value)
+        if length > self.max_length:
+            self.max_length = length
+        kind = self.type
+        if kind == 'text':
+            return
+        if kind is None:
+            self.type = _classify(value)
+        elif not _TYPE_PATTERNS[kind].fullmatch(value):
+            self.type = _join(kind, _classify(value))
+
+    def to_dict(self, rows: int) -> Dict[str, Any]:
+        return {
+            'type': self.type or 'unknown',
+            'nulls': self.nulls,
+            'null_rate': round(self.nulls / rows, 4) if rows else 0.0,
+            'max_length': self.max_length,
+        }
+
+
+@dataclass
+class CsvProfile:
+    """Profil d'un fichier CSV"""
+    file: str
+    delimiter: str = ','
+    rows: int = 0
+    # Lignes dont le nombre de champs diffère de l'en-tête
+    ragged_rows: int = 0
+    columns: List[ColumnProfile] = field(default_factory=list)
+    sample: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def column_names(self) -> List[str]:
+        return [c.name for c in self.columns]
+
+    def column_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {c.name: c.to_dict(self.rows) for c in self.columns}
+
+
+def profile_csv(path, sample_size: int = DEFAULT_SAMPLE_SIZE, seed: Optional[int] = 0) -> CsvProfile:
+    """
+    Profile un CSV en une passe
+
+    sample_size : lignes gardées (reservoir, dans l'ordre du fichier) ;
+    seed : graine du tirage (0 : échantillon reproductible, None : aléatoire).
+    """
+    path = Path(path)
+    profile = CsvProfile(file=path.name)
+    rng = random.Random(seed)
+    reservoir: List[tuple] = []
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+            profile.delimiter = sniff_delimiter(f.read(1024))
+            f.seek(0)
+            reader = csv.reader(f, delimiter=profile.delimiter)
+            header = next(reader, None)
+            if not header:
+                return profile
+            profile.columns = [ColumnProfile(name) for name in header]
+            columns = profile.columns
+            width = len(columns)
+            rows = 0
+            for row in reader:
+                if not row:
+                    continue
+                rows += 1
+                if len(row) != width:
+                    profile.ragged_rows += 1
+                    row = (row + [None] * width)[:width]
+                for column, value in zip(columns, row):
+                    column.add(value)
+                # Algorithme R : la ligne n remplace une ligne gardée avec une probabilité k/n
+                if len(reservoir) < sample_size:
+                    reservoir.append((rows, row))
+                else:
+                    slot = rng.randrange(rows)
+                    if slot < sample_size:
+                        reservoir[slot] = (rows, row)
+            profile.rows = rows
+    except (OSError, csv.Error) as e:
+        profile.error = str(e)
+    profile.sample = [dict(zip(profile.column_names, row)) for _, row in sorted(reservoir, key=lambda r: r[0])]
+    return profile
+
+
+def _profile_job(job: tuple) -> CsvProfile:
+    return profile_csv(*job)
+
+
+def profile_csv_files(paths: Iterable, workers: int = 0, sample_size: int = DEFAULT_SAMPLE_SIZE,
+                      seed: Optional[int] = 0) -> Iterator[CsvProfile]:
+    """Profils de plusieurs CSV, en parallèle (un processus par fichier), dans l'ordre des chemins"""
+    jobs = [(str(path), sample_size, seed) for path in paths]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        yield from map(_profile_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_profile_job, jobs)
@@ -0,0 +1,626 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Profilage de qualité des données legacy, en une passe et mémoire bornée
+Par table (ou fichier) : taux de NULL, type déduit, nombre approximatif de
+valeurs distinctes, min / max, histogramme et valeurs fréquentes par colonne,
+et doublons de clé — avant de s'engager dans un import de dizaines de
+millions de lignes.
+
+Structures de taille fixe ou proportionnelle au volume, jamais aux valeurs :
+  - HyperLogLog (2^12 registres d'un octet : erreur type ~1,6 %) pour les
+    valeurs distinctes ;
+  - empreintes 64 bits des clés pour les doublons, en mémoire jusqu'à un
+    million de clés puis réparties en partitions sur disque, relues une à
+    une en fin de passe ;
+  - échantillon réservoir par colonne (Algorithme L) pour l'histogramme et
+    les valeurs fréquentes, extrapolés au nombre de valeurs non NULL ;
+  - min / max et longueur maximale exacts.
+
+Sources : dump SQL (via son index), base SQLite, CSV, JSON (tableau, objet
+de tableaux ou JSON Lines, lu en flux). Les tables ou fichiers sont profilés
+en parallèle (un processus par table). Les empreintes utilisent hash() : un
+profil n'est comparable qu'à lui-même, pas d'un processus à l'autre.
+"""
+
+import csv
+import json
+import math
+import os
+import random
+import sqlite3
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from csv_profile import NULL_VALUES, ColumnProfile, sniff_delimiter
+from dump_index import DumpIndex, iter_range_lines
+from dump_reader import LineDecoder
+from mysql_types import primary_key_columns
+from sql_values import iter_insert_rows
+
+DEFAULT_HLL_PRECISION = 12
+DEFAULT_SAMPLE_SIZE = 1024
+# Clés gardées en mémoire par table avant de passer aux partitions sur disque
+MEMORY_KEYS = 1_000_000
+KEY_PARTITIONS = 256
+SPILL_BUFFER = 100_000
+HISTOGRAM_BINS = 10
+TOP_VALUES = 10
+DUPLICATE_SAMPLES = 10
+# Seuil de NULL au-delà duquel une colonne est signalée
+NULL_RATE_ISSUE = 0.5
+
+_MASK64 = (1 << 64) - 1
+_JSON_CHUNK = 1 << 20
+_PARTITION_SHIFT = 64 - KEY_PARTITIONS.bit_length() + 1
+
+
+def _hash64(value: str) -> int:
+    return hash(value) & _MASK64
+
+
+# ==============================================================================
+# STRUCTURES PROBABILISTES
+# ==============================================================================
+class HyperLogLog:
+    """Compteur approximatif de valeurs distinctes (empreintes 64 bits)"""
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+        self._shift = 64 - precision
+        self._mask = (1 << self._shift) - 1
+
+    def add_hash(self, h: int):
+        index = h >> self._shift
+        rank = self._shift - (h & self._mask).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog'):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        if estimate <= 2.5 * m:
+            # Petites cardinalités : comptage linéaire des registres vides
+            zeros = self.registers.count(0)
+            if zeros:
+                estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class KeyTracker:
+    """
+    Doublons exacts de clés, comparées par leur empreinte 64 bits
+
+    En mémoire (ensemble d'empreintes) jusqu'à memory_keys clés ; au-delà,
+    les empreintes sont réparties par leurs bits de poids fort entre
+    KEY_PARTITIONS fichiers temporaires, relus un à un par finish() : la
+    mémoire reste celle d'une partition, quel que soit le nombre de lignes.
+    """
+
+    def __init__(self, memory_keys: int = MEMORY_KEYS):
+        self.memory_keys = memory_keys
+        self.duplicates = 0
+        self.samples: List[str] = []
+        self._seen = set()
+        self._spill: Optional[tempfile.TemporaryDirectory] = None
+        self._buffers: List[List[str]] = []
+        self._buffered = 0
+
+    @property
+    def spilled(self) -> bool:
+        return self._spill is not None
+
+    def add(self, key: str):
+        h = _hash64(key)
+        if self._spill is not None:
+            # Texte gardé pour les exemples de doublons, sur une ligne
+            self._buffers[h >> _PARTITION_SHIFT].append(f"{h:016x}\t{key[:100].replace(chr(10), ' ')}\n")
+            self._buffered += 1
+            if self._buffered >= SPILL_BUFFER:
+                self._flush()
+        elif h in self._seen:
+            self._duplicate(key)
+        else:
+            self._seen.add(h)
+            if len(self._seen) > self.memory_keys:
+                self._start_spill()
+
+    def _duplicate(self, key: str):
+        self.duplicates += 1
+        if len(self.samples) < DUPLICATE_SAMPLES:
+            self.samples.append(key[:100])
+
+    def _start_spill(self):
+        self._spill = tempfile.TemporaryDirectory(prefix='akig-keys-')
+        self._buffers = [[] for _ in range(KEY_PARTITIONS)]
+        for h in self._seen:
+            self._buffers[h >> _PARTITION_SHIFT].append(f"{h:016x}\t\n")
+        self._seen = set()
+        self._flush()
+
+    def _partition_path(self, partition: int) -> str:
+        return os.path.join(self._spill.name, f"{partition:03d}.keys")
+
+    def _flush(self):
+        for partition, lines in enumerate(self._buffers):
+            if lines:
+                with open(self._partition_path(partition), 'a', encoding='utf-8') as f:
+                    f.writelines(lines)
+                lines.clear()
+        self._buffered = 0
+
+    def finish(self):
+        """Compte les doublons des partitions écrites sur disque puis les supprime"""
+        if self._spill is None:
+            return
+        self._flush()
+        try:
+            for partition in range(KEY_PARTITIONS):
+                path = self._partition_path(partition)
+                if not os.path.exists(path):
+                    continue
+                seen = set()
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        h = line[:16]
+                        if h in seen:
+                            self._duplicate(line[17:-1])
+                        else:
+                            seen.add(h)
+        finally:
+            self._spill.cleanup()
+            self._spill = None
+
+
+class Reservoir:
+    """Échantillon uniforme de taille fixe d'un flux (Algorithme L : peu de tirages aléatoires)"""
+
+    def __init__(self, size: int, rng: random.Random):
+        self.size = size
+        self.items: List[Any] = []
+        self.seen = 0
+        self._rng = rng
+        self._w = 1.0
+        self._next = 0
+
+    def _uniform(self) -> float:
+        return 1.0 - self._rng.random()
+
+    def _advance(self):
+        self._w *= math.exp(math.log(self._uniform()) / self.size)
+        if self._w >= 1.0:
+            self._next = self.seen + 1
+            return
+        self._next = self.seen + int(math.log(self._uniform()) / math.log(1.0 - self._w)) + 1
+
+    def offer(self, item: Any):
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+            if len(self.items) == self.size:
+                self._advance()
+        elif self.seen == self._next:
+            self.items[self._rng.randrange(self.size)] = item
+            self._advance()
+
+
+# ==============================================================================
+# PROFILS
+# ==============================================================================
+def _text(value: Any) -> Optional[str]:
+    """Valeur d'une source quelconque en texte (None pour NULL)"""
+    if value is None or value.__class__ is str:
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+    return str(value)
+
+
+def _number(value: str, kind: str) -> Any:
+    return int(value) if kind == 'integer' else float(value.replace(',', '.'))
+
+
+class ColumnQuality:
+    """Profil d'une colonne : type et NULL (ColumnProfile), distincts, min / max, échantillon"""
+
+    def __init__(self, name: str, rng: random.Random, sample_size: int = DEFAULT_SAMPLE_SIZE):
+        self.profile = ColumnProfile(name)
+        self.distinct = HyperLogLog()
+        self.sample = Reservoir(sample_size, rng)
+        self.min_text: Optional[str] = None
+        self.max_text: Optional[str] = None
+        self.min_number: Any = None
+        self.max_number: Any = None
+
+    def add(self, value: Optional[str]):
+        profile = self.profile
+        if value is None or value in NULL_VALUES:
+            profile.nulls += 1
+            return
+        profile.add(value)
+        self.distinct.add_hash(_hash64(value))
+        self.sample.offer(value)
+        if self.min_text is None or value < self.min_text:
+            self.min_text = value
+        if self.max_text is None or value > self.max_text:
+            self.max_text = value
+        kind = profile.type
+        if kind == 'integer' or kind == 'decimal':
+            number = _number(value, kind)
+            if self.min_number is None or number < self.min_number:
+                self.min_number = number
+            if self.max_number is None or number > self.max_number:
+                self.max_number = number
+
+    def to_dict(self, rows: int) -> Dict[str, Any]:
+        profile = self.profile
+        result = profile.to_dict(rows)
+        non_null = rows - profile.nulls
+        numeric = profile.type in ('integer', 'decimal')
+        result['distinct_estimate'] = min(self.distinct.count(), non_null)
+        result['min'] = self.min_number if numeric else self.min_text
+        result['max'] = self.max_number if numeric else self.max_text
+        if numeric:
+            result['histogram'] = self._histogram(non_null)
+        result['top_values'] = self._top_values(non_null)
+        return result
+
+    def _histogram(self, non_null: int) -> List[Dict[str, Any]]:
+        """Histogramme à intervalles égaux entre min et max, effectifs extrapolés de l'échantillon"""
+        low, high = self.min_number, self.max_number
+        kind = self.profile.type
+        values = [_number(v, kind) for v in self.sample.items]
+        if low is None or not values:
+            return []
+        width = (high - low) / HISTOGRAM_BINS or 1
+        counts = [0] * HISTOGRAM_BINS
+        for value in values:
+            counts[min(int((value - low) / width), HISTOGRAM_BINS - 1)] += 1
+        scale = non_null / len(values)
+        return [{'from': round(low + i * width, 4), 'to': round(low + (i + 1) * width, 4), 'count': round(c * scale)}
+                for i, c in enumerate(counts) if c]
+
+    def _top_values(self, non_null: int) -> List[Dict[str, Any]]:
+        """Valeurs les plus fréquentes de l'échantillon (vues au moins deux fois), effectifs extrapolés"""
+        counts: Dict[str, int] = {}
+        for value in self.sample.items:
+            counts[value] = counts.get(value, 0) + 1
+        if not counts:
+            return []
+        scale = non_null / len(self.sample.items)
+        top = sorted(counts.items(), key=lambda item: -item[1])[:TOP_VALUES]
+        return [{'value': value[:100], 'count': round(count * scale)} for value, count in top if count > 1]
+
+
+class TableQuality:
+    """Profil d'une table ou d'un fichier, alimenté ligne par ligne"""
+
+    def __init__(self, name: str, columns: Sequence[str] = (), key: Sequence[str] = (),
+                 sample_size: int = DEFAULT_SAMPLE_SIZE, seed: Optional[int] = 0):
+        self.name = name
+        self.rows = 0
+        # Lignes dont le nombre de champs diffère du nombre de colonnes
+        self.ragged_rows = 0
+        self._rng = random.Random(seed)
+        self._sample_size = sample_size
+        self.columns: List[ColumnQuality] = [self._column(c) for c in columns]
+        self._positions: Dict[str, int] = {c: i for i, c in enumerate(columns)}
+        self.key = [k for k in key if k in self._positions]
+        self._key_positions = [self._positions[k] for k in self.key]
+        self._keys = KeyTracker()
+        self.null_keys = 0
+
+    def _column(self, name: str) -> ColumnQuality:
+        return ColumnQuality(name, self._rng, self._sample_size)
+
+    def add_row(self, values: Sequence[Any]):
+        """Une ligne de valeurs dans l'ordre des colonnes"""
+        self.rows += 1
+        columns = self.columns
+        if len(values) != len(columns):
+            self.ragged_rows += 1
+            values = (list(values) + [None] * len(columns))[:len(columns)]
+        texts = [_text(v) for v in values]
+        for column, value in zip(columns, texts):
+            column.add(value)
+        if self._key_positions:
+            self._add_key([texts[i] for i in self._key_positions])
+
+    def add_record(self, record: Dict[str, Any]):
+        """Un enregistrement JSON : les colonnes apparues en cours de route comptent NULL avant"""
+        for name in record:
+            if name not in self._positions:
+                column = self._column(name)
+                column.profile.nulls = self.rows
+                self._positions[name] = len(self.columns)
+                self.columns.append(column)
+                if not self._key_positions and name == 'id':
+                    self.key, self._key_positions = ['id'], [self._positions['id']]
+        self.add_row([record.get(c.profile.name) for c in self.columns])
+
+    def _add_key(self, parts: List[Optional[str]]):
+        if any(p is None or p in NULL_VALUES for p in parts):
+            self.null_keys += 1
+            return
+        self._keys.add(parts[0] if len(parts) == 1 else '\x1f'.join(parts))
+
+    @property
+    def duplicate_keys(self) -> int:
+        """Doublons de clé (complets une fois finish() appelé)"""
+        return self._keys.duplicates
+
+    def finish(self):
+        self._keys.finish()
+
+    def to_dict(self) -> Dict[str, Any]:
+        cells = self.rows * len(self.columns)
+        nulls = sum(c.profile.nulls for c in self.columns)
+        result = {
+            'rows': self.rows,
+            'completeness': round(1 - nulls / cells, 4) if cells else None,
+            'ragged_rows': self.ragged_rows,
+            'key': self.key,
+            'columns': {c.profile.name: c.to_dict(self.rows) for c in self.columns},
+        }
+        if self.key:
+            result['duplicate_keys'] = self.duplicate_keys
+            result['null_keys'] = self.null_keys
+            result['duplicate_key_samples'] = self._keys.samples
+        return result
+
+    def issues(self) -> List[str]:
+        """Constats lisibles pour le rapport"""
+        found = []
+        if self.duplicate_keys:
+            found.append(f"{self.name}: {self.duplicate_keys:,} clé(s) {'+'.join(self.key)} dupliquée(s)")
+        if self.null_keys:
+            found.append(f"{self.name}: {self.null_keys:,} clé(s) {'+'.join(self.key)} NULL")
+        if self.ragged_rows:
+            found.append(f"{self.name}: {self.ragged_rows:,} ligne(s) au nombre de champs incorrect")
+        for column in self.columns:
+            rate = column.profile.nulls / self.rows if self.rows else 0
+            if rate >= NULL_RATE_ISSUE:
+                found.append(f"{self.name}.{column.profile.name}: {rate:.0%} de NULL")
+        return found
+
+
+def profile_rows(name: str, columns: Sequence[str], rows: Iterable[Sequence[Any]],
+                 key: Sequence[str] = (), sample_size: int = DEFAULT_SAMPLE_SIZE) -> Dict[str, Any]:
+    table = TableQuality(name, columns, key, sample_size)
+    for row in rows:
+        table.add_row(row)
+    return _summary(table)
+
+
+def _summary(table: TableQuality) -> Dict[str, Any]:
+    table.finish()
+    result = table.to_dict()
+    result['name'] = table.name
+    result['issues'] = table.issues()
+    return result
+
+
+def _default_key(columns: Sequence[str]) -> List[str]:
+    return [c for c in columns if c.lower() == 'id'][:1]
+
+
+# ==============================================================================
+# SOURCES (un job par table ou fichier, exécuté dans un processus du pool)
+# ==============================================================================
+def _profile_sql_table(job: Tuple[str, str, str, List[List[int]], List[str], List[str], int]) -> Dict[str, Any]:
+    path, table, encoding, ranges, columns, key, sample_size = job
+    decode = LineDecoder(encoding).decode
+    quality: Optional[TableQuality] = None
+    for _, raw_line in iter_range_lines(path, ranges):
+        parsed = iter_insert_rows(decode(raw_line))
+        if not parsed:
+            continue
+        _, insert_columns, rows = parsed
+        if quality is None:
+            names = insert_columns or columns
+            quality = TableQuality(table, names, key or _default_key(names), sample_size)
+        for row in rows:
+            quality.add_row(row)
+    return _summary(quality or TableQuality(table, columns, key, sample_size))
+
+
+def _profile_sqlite_table(job: Tuple[str, str, int]) -> Dict[str, Any]:
+    path, table, sample_size = job
+    conn = sqlite3.connect(path)
+    try:
+        quoted = '"' + table.replace('"', '""') + '"'
+        info = conn.execute(f"PRAGMA table_info({quoted})").fetchall()
+        columns = [col[1] for col in info]
+        key = [col[1] for col in sorted(info, key=lambda c: c[5]) if col[5]] or _default_key(columns)
+        cursor = conn.execute(f"SELECT * FROM {quoted}")
+        return profile_rows(table, columns, cursor, key, sample_size)
+    finally:
+        conn.close()
+
+
+def _profile_csv_file(job: Tuple[str, int]) -> Dict[str, Any]:
+    path, sample_size = job
+    with open(path, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+        delimiter = sniff_delimiter(f.read(1024))
+        f.seek(0)
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None) or []
+        rows = (row for row in reader if row)
+        return profile_rows(Path(path).name, header, rows, _default_key(header), sample_size)
+
+
+def _profile_json_file(job: Tuple[str, int]) -> List[Dict[str, Any]]:
+    path, sample_size = job
+    tables: Dict[str, TableQuality] = {}
+    for name, record in iter_json_records(path):
+        table = tables.get(name)
+        if table is None:
+            table = tables[name] = TableQuality(name, sample_size=sample_size)
+        table.add_record(record if isinstance(record, dict) else {'value': record})
+    return [_summary(table) for table in tables.values()]
+
+
+def _run(worker: Callable[[Any], Any], jobs: List[Any], workers: int) -> List[Any]:
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        return [worker(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(worker, jobs))
+
+
+def profile_sql_dump(path, workers: int = 0, sample_size: int = DEFAULT_SAMPLE_SIZE) -> List[Dict[str, Any]]:
+    """Profils des tables d'un dump SQL (index construit au besoin, une table par processus)"""
+    index = DumpIndex.load_or_build(path, workers=workers or os.cpu_count() or 1)
+    jobs = []
+    for table in index.tables_in_dump_order():
+        info = index.tables[table]
+        key = primary_key_columns(info.ddl) if info.ddl else []
+        jobs.append((str(path), table, index.encoding, info.ranges, info.columns, key, sample_size))
+    return _run(_profile_sql_table, jobs, workers)
+
+
+def profile_sqlite(path, workers: int = 0, sample_size: int = DEFAULT_SAMPLE_SIZE) -> List[Dict[str, Any]]:
+    conn = sqlite3.connect(path)
+    try:
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    finally:
+        conn.close()
+    return _run(_profile_sqlite_table, [(str(path), t, sample_size) for t in tables], workers)
+
+
+def profile_csv_paths(paths: Iterable, workers: int = 0,
+                      sample_size: int = DEFAULT_SAMPLE_SIZE) -> List[Dict[str, Any]]:
+    return _run(_profile_csv_file, [(str(p), sample_size) for p in paths], workers)
+
+
+def profile_json(path, sample_size: int = DEFAULT_SAMPLE_SIZE) -> List[Dict[str, Any]]:
+    return _profile_json_file((str(path), sample_size))
+
+
+# ==============================================================================
+# JSON EN FLUX
+# ==============================================================================
+class _JsonStream:
+    """Lecture incrémentale d'un document JSON : valeurs décodées une à une via raw_decode"""
+
+    def __init__(self, f):
+        self._f = f
+        self._decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self._f.read(_JSON_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Prochain caractère significatif ('' en fin de document)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(f"JSON invalide : attendu {chars!r}, trouvé {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                # Valeur coupée par la fin du tampon : on lit la suite
+                if not self._fill():
+                    raise
+                continue
+            if end == len(self.buffer) and not self.eof and self.buffer[self.pos] not in '{["':
+                # Nombre ou littéral peut-être tronqué
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
+
+    def items(self) -> Iterator[Any]:
+        """Éléments du tableau qui commence ici"""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(',]') == ']':
+                return
+
+
+def iter_json_records(path) -> Iterator[Tuple[str, Any]]:
+    """
+    (nom, enregistrement) d'un fichier JSON, sans le charger entièrement
+
+    Tableau : nom du fichier ; objet : un nom par clé dont la valeur est un
+    tableau (les autres clés sont ignorées) ; JSON Lines : nom du fichier.
+    """
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        stream = _JsonStream(f)
+        first = stream.peek()
+        if first == '[':
+            for record in stream.items():
+                yield path.stem, record
+        elif first == '{':
+            document = stream.value() if _is_json_lines(path) else None
+            if document is not None:
+                yield path.stem, document
+                while stream.peek():
+                    yield path.stem, stream.value()
+                return
+            stream.expect('{')
+            while stream.peek() not in ('}', ''):
+                key = stream.value()
+                stream.expect(':')
+                if stream.peek() == '[':
+                    for record in stream.items():
+                        yield key, record
+                else:
+                    stream.value()
+                if stream.expect(',}') == '}':
+                    break
+
+
+def _is_json_lines(path: Path) -> bool:
+    """
+    Un objet par ligne : extension .jsonl / .ndjson, ou première ligne qui est
+    à elle seule un objet sans tableau (un objet de tableaux est lu en flux)
+    """
+    if path.suffix.lower() in ('.jsonl', '.ndjson'):
+        return True
+    with open(path, 'r', encoding='utf-8') as f:
+        first_line = f.readline(_JSON_CHUNK)
+    try:
+        first = json.loads(first_line)
+    except ValueError:
+        return False
+    return isinstance(first, dict) and not any(isinstance(v, list) for v in first.values())
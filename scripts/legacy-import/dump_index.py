@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Index d'un dump MySQL en une seule passe
+Pour chaque table : colonnes, DDL CREATE TABLE, estimation du nombre de lignes
+et plages d'octets des blocs INSERT. L'index est sauvegardé dans un fichier
+voisin (<dump>.akig-index.json) invalidé par la taille et le mtime du dump,
+avec l'encodage détecté et le nombre de lignes décodées en repli.
+
+Les importeurs et LegacyArchiveAnalyzer s'en servent pour sauter la phase de
+découverte et aller directement (seek) aux données d'une table.
+
+Avec workers > 1, le dump est projeté en mémoire (mmap) et découpé en plages
+d'octets alignées sur des fins d'instruction (`;` en fin de ligne : mysqldump
+échappe les retours à la ligne des valeurs), indexées en parallèle puis
+fusionnées dans l'ordre du fichier : la durée tend vers celle de la lecture.
+"""
+
+import json
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dump_reader import LineDecoder, detect_encoding
+
+INDEX_VERSION = 2
+INDEX_SUFFIX = '.akig-index.json'
+
+_DDL_COLUMN_RE = re.compile(r'^\s+[`"]([^`"]+)[`"]\s')
+# Un seul automate pour les instructions indexées : une tentative par ligne
+_STATEMENT_RE = re.compile(
+    r'\s*(?:INSERT\s+(?:IGNORE\s+)?INTO\s+[`"]?(?P<insert>\w+)[`"]?\s*(?:\((?P<columns>[^)]*)\))?'
+    r'|CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?[`"]?(?P<create>\w+)[`"]?)',
+    re.IGNORECASE,
+)
+_STATEMENT_END_RE = re.compile(rb';[ \t]*\r?\n')
+
+# En dessous, une seule plage : démarrer le pool coûte plus que la lecture
+MIN_PARALLEL_BYTES = 64 << 20
+# Plages par worker (les plages riches en DDL ou en repli d'encodage sont plus lentes)
+CHUNKS_PER_WORKER = 4
+
+
+@dataclass
+class TableIndex:
+    """Entrée d'index pour une table du dump"""
+    columns: List[str] = field(default_factory=list)
+    ddl: Optional[str] = None
+    statements: int = 0
+    rows_estimate: int = 0
+    insert_bytes: int = 0
+    ranges: List[List[int]] = field(default_factory=list)
+
+    def add_range(self, start: int, end: int):
+        # Fusionne les blocs INSERT contigus
+        if self.ranges and self.ranges[-1][1] == start:
+            self.ranges[-1][1] = end
+        else:
+            self.ranges.append([start, end])
+
+    def merge(self, later: 'TableIndex'):
+        """Ajoute l'entrée de la même table indexée sur une plage suivante du dump"""
+        if later.statements and not self.statements and later.columns:
+            # Colonnes explicites du premier INSERT
+            self.columns = later.columns
+        self.statements += later.statements
+        self.rows_estimate += later.rows_estimate
+        self.insert_bytes += later.insert_bytes
+        for start, end in later.ranges:
+            self.add_range(start, end)
+
+
+@dataclass
+class DumpIndex:
+    """Index complet d'un dump SQL"""
+    path: str
+    size: int
+    mtime_ns: int
+    encoding: str = 'utf-8'
+    fallback_lines: int = 0
+    tables: Dict[str, TableIndex] = field(default_factory=dict)
+
+    # ------------------------------------------------------------------
+    # PERSISTANCE
+    # ------------------------------------------------------------------
+    @staticmethod
+    def sidecar_path(dump_path) -> Path:
+        dump_path = Path(dump_path)
+        return dump_path.with_name(dump_path.name + INDEX_SUFFIX)
+
+    def save(self):
+        data = asdict(self)
+        data['version'] = INDEX_VERSION
+        sidecar = self.sidecar_path(self.path)
+        tmp = sidecar.with_name(sidecar.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, sidecar)
+
+    @classmethod
+    def load(cls, dump_path) -> Optional['DumpIndex']:
+        """Charge l'index voisin s'il correspond encore au dump (taille + mtime)"""
+        sidecar = cls.sidecar_path(dump_path)
+        try:
+            st = os.stat(dump_path)
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (data.get('version') != INDEX_VERSION or data.get('size') != st.st_size
+                or data.get('mtime_ns') != st.st_mtime_ns):
+            return None
+        tables = {name: TableIndex(**info) for name, info in data.get('tables', {}).items()}
+        return cls(path=str(dump_path), size=data['size'], mtime_ns=data['mtime_ns'],
+                   encoding=data.get('encoding', 'utf-8'),
+                   fallback_lines=data.get('fallback_lines', 0), tables=tables)
+
+    @classmethod
+    def load_or_build(cls, dump_path, encoding: Optional[str] = None,
+                      rebuild: bool = False, chunk_size: int = 1 << 20, workers: int = 1) -> 'DumpIndex':
+        if not rebuild:
+            index = cls.load(dump_path)
+            if index is not None:
+                return index
+        if workers > 1:
+            index = cls.build_parallel(dump_path, encoding, workers)
+        else:
+            index = cls.build(dump_path, encoding, chunk_size)
+        try:
+            index.save()
+        except OSError as e:
+            print(f"⚠️ Index non sauvegardé ({e})")
+        return index
+
+    # ------------------------------------------------------------------
+    # CONSTRUCTION
+    # ------------------------------------------------------------------
+    @classmethod
+    def build(cls, dump_path, encoding: Optional[str] = None,
+              chunk_size: int = 1 << 20) -> 'DumpIndex':
+        """
+        Parcourt le dump une fois, en binaire
+
+        L'encodage principal est détecté sur un échantillon (sauf s'il est
+        imposé) ; chaque ligne est validée au passage et celles qui demandent
+        un encodage de repli sont comptées.
+        """
+        st = os.stat(dump_path)
+        index = cls(path=str(dump_path), size=st.st_size, mtime_ns=st.st_mtime_ns)
+        decoder = LineDecoder(encoding or detect_encoding(dump_path))
+        with open(dump_path, 'rb', buffering=chunk_size) as f:
+            _index_lines(_iter_file_lines(f), decoder, index.tables)
+        index.encoding, index.fallback_lines = decoder.encoding, decoder.fallback_lines
+        return index
+
+    @classmethod
+    def build_parallel(cls, dump_path, encoding: Optional[str] = None, workers: int = 0) -> 'DumpIndex':
+        """
+        Même index que build(), en parcourant des plages d'octets du dump en parallèle
+
+        Chaque worker projette le dump en mémoire et indexe sa plage ; les index
+        partiels sont fusionnés dans l'ordre des plages (une CREATE TABLE
+        réinitialise la table, comme en lecture séquentielle).
+        """
+        workers = workers or os.cpu_count() or 1
+        st = os.stat(dump_path)
+        index = cls(path=str(dump_path), size=st.st_size, mtime_ns=st.st_mtime_ns)
+        index.encoding = LineDecoder(encoding or detect_encoding(dump_path)).encoding
+        if not st.st_size:
+            return index
+
+        parts = 1 if st.st_size < MIN_PARALLEL_BYTES else workers * CHUNKS_PER_WORKER
+        chunks = statement_chunks(dump_path, parts)
+        jobs = [(str(dump_path), start, end, index.encoding) for start, end in chunks]
+        if len(jobs) == 1:
+            partials = [_index_chunk(jobs[0])]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                partials = list(pool.map(_index_chunk, jobs))
+
+        tables = index.tables
+        for partial, fallback_lines in partials:
+            index.fallback_lines += fallback_lines
+            for name, info in partial.items():
+                if name not in tables or info.ddl is not None:
+                    tables[name] = info
+                else:
+                    tables[name].merge(info)
+        return index
+
+    # ------------------------------------------------------------------
+    # ACCÈS DIRECT
+    # ------------------------------------------------------------------
+    def tables_in_dump_order(self) -> List[str]:
+        """Tables ayant des données, dans l'ordre de leur premier INSERT"""
+        with_data = [name for name, info in self.tables.items() if info.ranges]
+        return sorted(with_data, key=lambda name: self.tables[name].ranges[0][0])
+
+    def iter_table_lines(self, table: str, chunk_size: int = 1 << 20) -> Iterator[Tuple[int, bytes]]:
+        """Produit (offset, ligne brute) des INSERT d'une table en lisant uniquement ses plages"""
+        info = self.tables.get(table)
+        if not info:
+            return iter(())
+        return self.iter_range_lines(info.ranges, chunk_size)
+
+    def iter_range_lines(self, ranges: Iterable[List[int]],
+                         chunk_size: int = 1 << 20) -> Iterator[Tuple[int, bytes]]:
+        return iter_range_lines(self.path, ranges, chunk_size)
+
+    def line_decoder(self) -> LineDecoder:
+        """Décodeur des lignes lues par plages (même encodage et mêmes replis que l'index)"""
+        return LineDecoder(self.encoding)
+
+    def shard_table(self, table: str, shard_bytes: int) -> List[List[List[int]]]:
+        """Découpe les plages d'une table en shards d'environ shard_bytes octets"""
+        info = self.tables.get(table)
+        if not info:
+            return []
+        shards: List[List[List[int]]] = []
+        current: List[List[int]] = []
+        size = 0
+        for start, end in info.ranges:
+            while start < end:
+                take = min(end - start, shard_bytes - size)
+                current.append([start, start + take])
+                size += take
+                start += take
+                if size >= shard_bytes:
+                    shards.append(current)
+                    current, size = [], 0
+        if current:
+            shards.append(current)
+        return shards
+
+
+def _iter_file_lines(f) -> Iterator[Tuple[int, bytes]]:
+    offset = 0
+    for line in f:
+        yield offset, line
+        offset += len(line)
+
+
+def _iter_mmap_lines(mm: mmap.mmap, start: int, end: int) -> Iterator[Tuple[int, bytes]]:
+    """(offset, ligne brute) des lignes de [start, end), start en début de ligne"""
+    find = mm.find
+    while start < end:
+        newline = find(b'\n', start, end)
+        stop = end if newline < 0 else newline + 1
+        yield start, mm[start:stop]
+        start = stop
+
+
+def _index_lines(lines: Iterable[Tuple[int, bytes]], decoder: LineDecoder, tables: Dict[str, TableIndex]):
+    """Indexe des lignes (offset, ligne brute) : DDL, colonnes et plages INSERT par table"""
+    decode = decoder.decode
+    statement = _STATEMENT_RE.match
+    ddl_table: Optional[str] = None
+    ddl_lines: List[str] = []
+
+    for start, line in lines:
+        offset = start + len(line)
+        text = decode(line)
+
+        if ddl_table is not None:
+            ddl_lines.append(text)
+            col = _DDL_COLUMN_RE.match(text)
+            if col:
+                tables[ddl_table].columns.append(col.group(1))
+            if text.rstrip().endswith(';'):
+                tables[ddl_table].ddl = ''.join(ddl_lines).strip()
+                ddl_table, ddl_lines = None, []
+            continue
+
+        match = statement(text)
+        if match is None:
+            continue
+        name = match['insert']
+        if name:
+            info = tables.setdefault(name, TableIndex())
+            if match['columns'] and not info.statements:
+                # Les colonnes explicites de l'INSERT priment sur la DDL
+                info.columns = [c.strip().strip('`"\'') for c in match['columns'].split(',')]
+            info.statements += 1
+            info.rows_estimate += line.count(b'),(') + 1
+            info.insert_bytes += offset - start
+            info.add_range(start, offset)
+        else:
+            ddl_table = match['create']
+            tables[ddl_table] = TableIndex()
+            ddl_lines = [text]
+            if text.rstrip().endswith(';'):
+                tables[ddl_table].ddl = text.strip()
+                ddl_table, ddl_lines = None, []
+
+
+def statement_chunks(path, parts: int) -> List[Tuple[int, int]]:
+    """
+    Découpe le dump en `parts` plages [début, fin) d'environ la même taille,
+    chacune commençant juste après une fin d'instruction
+    """
+    size = os.path.getsize(path)
+    if parts <= 1 or not size:
+        return [(0, size)]
+    bounds = [0]
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for i in range(1, parts):
+            target = max(size * i // parts, bounds[-1])
+            match = _STATEMENT_END_RE.search(mm, target)
+            if not match:
+                break
+            if match.end() > bounds[-1]:
+                bounds.append(match.end())
+    if bounds[-1] < size:
+        bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def _index_chunk(job: Tuple[str, int, int, str]) -> Tuple[Dict[str, TableIndex], int]:
+    """Worker du pool : index partiel d'une plage du dump et lignes décodées en repli"""
+    path, start, end, encoding = job
+    decoder = LineDecoder(encoding)
+    tables: Dict[str, TableIndex] = {}
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        _index_lines(_iter_mmap_lines(mm, start, end), decoder, tables)
+    return tables, decoder.fallback_lines
+
+
+def iter_range_lines(path, ranges: Iterable[List[int]],
+                     chunk_size: int = 1 << 20) -> Iterator[Tuple[int, bytes]]:
+    """
+    Produit (offset, ligne brute) des lignes qui COMMENCENT dans chaque plage [début, fin)
+
+    Une plage peut démarrer au milieu d'une ligne (découpage en shards) : la
+    ligne entamée appartient alors à la plage précédente et est sautée.
+    """
+    with open(path, 'rb', buffering=chunk_size) as f:
+        for start, end in ranges:
+            if start > 0:
+                f.seek(start - 1)
+                f.readline()
+            else:
+                f.seek(0)
+            offset = f.tell()
+            while offset < end:
+                line = f.readline()
+                if not line:
+                    break
+                yield offset, line
+                offset += len(line)
+
+
+def trim_ranges(ranges: Iterable[List[int]], offset: int) -> List[List[int]]:
+    """Plages restantes à partir de offset (début de ligne), pour reprendre une lecture"""
+    trimmed = []
+    for start, end in ranges:
+        if end <= offset:
+            continue
+        trimmed.append([max(start, offset), end])
+    return trimmed
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Lecture d'un dump en une seule passe, avec repli d'encodage par ligne
+L'encodage principal est détecté sur un échantillon du début du fichier
+(vote utf-8 des lignes, puis chardet si disponible). Le dump est
+ensuite lu en binaire par blocs et décodé ligne par ligne : une ligne que
+l'encodage principal ne sait pas décoder est décodée avec le premier encodage
+de repli qui réussit, et comptée. Le fichier n'est jamais relu pour changer
+d'encodage.
+"""
+
+import codecs
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import chardet  # optional
+except ImportError:
+    chardet = None
+
+# Dans l'ordre : latin-1 décode tout octet, c'est donc le dernier recours
+DEFAULT_FALLBACKS = ('utf-8', 'cp1252', 'latin-1')
+DEFAULT_SAMPLE_SIZE = 200_000
+
+
+def _codec_name(encoding: str) -> str:
+    return codecs.lookup(encoding).name
+
+
+def detect_encoding(path, sample_size: int = DEFAULT_SAMPLE_SIZE) -> str:
+    """
+    Encodage principal d'un fichier, déduit de ses premiers octets
+
+    Les lignes non ASCII de l'échantillon votent : si la majorité est de
+    l'utf-8 valide, c'est l'encodage principal (les autres lignes passeront en
+    repli). Sinon chardet départage les encodages 8 bits, cp1252 par défaut.
+    """
+    with open(path, 'rb') as f:
+        sample = f.read(sample_size)
+    cut = sample.rfind(b'\n')
+    if cut >= 0 and len(sample) == sample_size:
+        # Dernière ligne probablement tronquée
+        sample = sample[:cut + 1]
+
+    valid = invalid = 0
+    for line in sample.splitlines():
+        if line.isascii():
+            continue
+        try:
+            line.decode('utf-8')
+            valid += 1
+        except UnicodeDecodeError:
+            invalid += 1
+    if valid >= invalid:
+        return 'utf-8'
+
+    if chardet:
+        try:
+            enc = (chardet.detect(sample) or {}).get('encoding')
+            if enc and _codec_name(enc) not in ('ascii', 'utf-8'):
+                return enc
+        except (LookupError, ValueError):
+            pass
+    return 'cp1252'
+
+
+class LineDecoder:
+    """Décode des lignes brutes avec l'encodage principal, ou un repli ligne par ligne"""
+
+    def __init__(self, encoding: str = 'utf-8', fallbacks: Iterable[str] = DEFAULT_FALLBACKS):
+        try:
+            primary = _codec_name(encoding)
+        except LookupError:
+            encoding, primary = 'utf-8', 'utf-8'
+        self.encoding = encoding
+        self.fallbacks: List[str] = []
+        for enc in fallbacks:
+            try:
+                name = _codec_name(enc)
+            except LookupError:
+                continue
+            if name != primary and enc not in self.fallbacks:
+                self.fallbacks.append(enc)
+        self.fallback_lines = 0
+        self.fallback_counts: Dict[str, int] = {}
+
+    def decode(self, raw: bytes) -> str:
+        try:
+            return raw.decode(self.encoding)
+        except UnicodeDecodeError:
+            pass
+        self.fallback_lines += 1
+        for enc in self.fallbacks:
+            try:
+                text = raw.decode(enc)
+            except UnicodeDecodeError:
+                continue
+            self.fallback_counts[enc] = self.fallback_counts.get(enc, 0) + 1
+            return text
+        self.fallback_counts['replace'] = self.fallback_counts.get('replace', 0) + 1
+        return raw.decode(self.encoding, 'replace')
+
+    def describe(self) -> str:
+        """Résumé lisible : encodage principal et lignes décodées en repli"""
+        if not self.fallback_lines:
+            return self.encoding
+        detail = ', '.join(f"{enc}: {n:,}" for enc, n in self.fallback_counts.items())
+        return f"{self.encoding} ({self.fallback_lines:,} lignes en repli — {detail})"
+
+
+class DumpReader:
+    """Lecture binaire en flux d'un dump, décodée ligne par ligne (une seule passe)"""
+
+    def __init__(self, path, encoding: Optional[str] = None, chunk_size: int = 1 << 20,
+                 fallbacks: Iterable[str] = DEFAULT_FALLBACKS,
+                 sample_size: int = DEFAULT_SAMPLE_SIZE):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.decoder = LineDecoder(encoding or detect_encoding(path, sample_size), fallbacks)
+
+    @property
+    def encoding(self) -> str:
+        return self.decoder.encoding
+
+    @property
+    def fallback_lines(self) -> int:
+        return self.decoder.fallback_lines
+
+    def iter_raw_lines(self) -> Iterator[Tuple[int, bytes]]:
+        """(offset, ligne brute) de tout le fichier"""
+        offset = 0
+        with open(self.path, 'rb', buffering=self.chunk_size) as f:
+            for raw in f:
+                yield offset, raw
+                offset += len(raw)
+
+    def iter_lines(self) -> Iterator[str]:
+        decode = self.decoder.decode
+        with open(self.path, 'rb', buffering=self.chunk_size) as f:
+            for raw in f:
+                yield decode(raw)
+
+    def iter_lines_with_offsets(self) -> Iterator[Tuple[int, str]]:
+        decode = self.decoder.decode
+        for offset, raw in self.iter_raw_lines():
+            yield offset, decode(raw)
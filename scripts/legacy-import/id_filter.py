@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Filtre de doublons de clé primaire avant insertion
+Les id déjà présents dans la table cible sont chargés une fois dans un bitmap
+(un bit par id : 10 millions d'id tiennent dans 1,25 Mo), puis chaque ligne
+du dump est testée en mémoire avant d'atteindre PostgreSQL. Les id insérés
+pendant l'import y sont ajoutés : les doublons internes au dump sont écartés
+de la même façon.
+
+Les id hors bitmap (négatifs, très grands, non entiers) vont dans un set.
+Comme bulk_loader, le module ne dépend pas de psycopg2 : la connexion est
+fournie par l'appelant.
+"""
+
+from typing import Any, Hashable, Iterable
+
+from bulk_loader import quote_ident
+
+# Au-delà (2^28 bits = 32 Mo), les id passent dans le set de débordement
+MAX_BITMAP_BITS = 1 << 28
+DEFAULT_FETCH_SIZE = 100_000
+
+
+class IdBitmap:
+    """Ensemble d'id : bitmap (bytearray) pour les entiers 0..MAX_BITMAP_BITS, set pour le reste"""
+
+    def __init__(self, size_hint: int = 0):
+        self._bits = bytearray((min(max(size_hint, 0), MAX_BITMAP_BITS) >> 3) + 1)
+        self._others = set()
+        self._count = 0
+
+    def _grow(self, value: int) -> bool:
+        """Agrandit le bitmap pour couvrir value (par doublement) ; False si hors limite"""
+        if value >= MAX_BITMAP_BITS:
+            return False
+        size = max((value >> 3) + 1, min(len(self._bits) * 2, MAX_BITMAP_BITS >> 3))
+        self._bits.extend(bytes(size - len(self._bits)))
+        return True
+
+    def add(self, value: Hashable) -> bool:
+        """Ajoute un id ; renvoie False s'il était déjà présent"""
+        if value.__class__ is int and value >= 0 and (value >> 3 < len(self._bits) or self._grow(value)):
+            byte, mask = value >> 3, 1 << (value & 7)
+            if self._bits[byte] & mask:
+                return False
+            self._bits[byte] |= mask
+        else:
+            if value in self._others:
+                return False
+            self._others.add(value)
+        self._count += 1
+        return True
+
+    def discard(self, value: Hashable):
+        """Retire un id (ligne finalement rejetée : une ligne valide du même id reste possible)"""
+        if value.__class__ is int and value >= 0 and value < MAX_BITMAP_BITS:
+            byte, mask = value >> 3, 1 << (value & 7)
+            if byte < len(self._bits) and self._bits[byte] & mask:
+                self._bits[byte] &= ~mask & 0xFF
+                self._count -= 1
+        elif value in self._others:
+            self._others.remove(value)
+            self._count -= 1
+
+    def __contains__(self, value: Any) -> bool:
+        if value.__class__ is int and value >= 0:
+            byte = value >> 3
+            if byte < len(self._bits):
+                return bool(self._bits[byte] & (1 << (value & 7)))
+            if value < MAX_BITMAP_BITS:
+                return False
+        return value in self._others
+
+    def __len__(self) -> int:
+        return self._count
+
+    def update(self, values: Iterable[Hashable]):
+        for value in values:
+            self.add(value)
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits) + len(self._others) * 64
+
+
+def normalize_id(value: Any) -> Any:
+    """Id du dump en entier quand c'est possible ('12' → 12), sinon inchangé"""
+    if value.__class__ is str:
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    return value
+
+
+def load_ids(conn, table: str, column: str = 'id', fetch_size: int = DEFAULT_FETCH_SIZE) -> IdBitmap:
+    """
+    Charge les id existants d'une table dans un IdBitmap
+
+    Le bitmap est dimensionné d'après max(id) puis agrandi au besoin ; les id
+    sont lus par un curseur serveur (fetch_size lignes par aller-retour) puis
+    la transaction de lecture est terminée.
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT max({quote_ident(column)}) FROM {quote_ident(table)}")
+    max_id = cursor.fetchone()[0]
+    cursor.close()
+    # Un id aberrant (hors bitmap) ne doit pas faire réserver tout le bitmap
+    ids = IdBitmap(max_id if isinstance(max_id, int) and max_id < MAX_BITMAP_BITS else 0)
+
+    cursor = conn.cursor(name=f"akig_ids_{table}")
+    cursor.itersize = fetch_size
+    try:
+        cursor.execute(f"SELECT {quote_ident(column)} FROM {quote_ident(table)}")
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            ids.update(normalize_id(row[0]) for row in rows)
+    finally:
+        cursor.close()
+        conn.commit()
+    return ids
@@ -2,12 +2,12 @@
 # -*- coding: utf-8 -*-
 
 import os
-import re
 import sys
 import json
+import time
 import argparse
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 from collections import defaultdict
 
 try:
@@ -16,10 +16,14 @@ except ImportError:
     print("❌ psycopg2 non installé : pip install psycopg2-binary")
     sys.exit(1)
 
-try:
-    import chardet  # type: ignore
-except Exception:
-    chardet = None  # optional
+from batch_sizer import AdaptiveBatchSizer, row_bytes
+from bulk_loader import RejectWriter, insert_values_rows, load_rows
+from dump_index import DumpIndex
+from dump_reader import DumpReader, LineDecoder
+from mysql_types import CreateTableCollector, MySQLColumn, column_converters, parse_create_table
+from post_load import DEFAULT_MAINTENANCE_WORK_MEM, DEFAULT_POST_LOAD_WORKERS, run_post_load
+from row_projector import ProjectorCache
+from sql_values import iter_insert_rows
 
 # Legacy → target mapping (table + columns). Columns mapping is legacy->target.
 # If a legacy table isn't listed, it defaults to target name 'legacy_<table>' and identity column mapping.
@@ -32,15 +36,39 @@ FIELD_MAPPING: Dict[str, Dict[str, Any]] = {
     'versement': {'table': 'disbursements', 'mapping': {}},
 }
 
+# Nulled in every column, for dumps without CREATE TABLE; with the DDL, date columns
+# also get the full zero-date normalisation of mysql_types ('2019-00-00', ...)
 INVALID_DATE_STRINGS = {
     '0000-00-00', '0000-00-00 00:00:00', '00/00/0000', '0000-00-00T00:00:00', '0000-00-00T00:00:00Z'
 }
 
 class Importer:
-    def __init__(self, sql_file: str, database_url: str, dry_run: bool = False, only_tables: Optional[List[str]] = None):
+    def __init__(self, sql_file: str, database_url: str, dry_run: bool = False, only_tables: Optional[List[str]] = None,
+                 batch_size: int = 1000, reject_file: Optional[str] = None, encoding: Optional[str] = None,
+                 post_load: bool = False, post_load_workers: int = DEFAULT_POST_LOAD_WORKERS,
+                 maintenance_work_mem: str = DEFAULT_MAINTENANCE_WORK_MEM, fixed_batch_size: bool = False):
         self.sql_file = sql_file
         self.database_url = database_url
         self.dry_run = dry_run
+        self.batch_size = batch_size
+        # Starting size; adjusted from observed INSERT latency unless fixed
+        self.sizer = AdaptiveBatchSizer(batch_size, fixed=fixed_batch_size)
+        # Forced primary encoding (--encoding); detected from a sample otherwise
+        self.encoding = encoding
+        self.decoder: Optional[LineDecoder] = None
+        # Compiled legacy -> target projections, keyed by (legacy table, INSERT columns)
+        self.projectors = ProjectorCache(null_values=INVALID_DATE_STRINGS)
+        # Typed columns of each legacy table (lowercased), from the dump's CREATE TABLE
+        self.ddl = CreateTableCollector()
+        self.column_types: Dict[str, Dict[str, MySQLColumn]] = {}
+        # Rows waiting to be flushed, keyed by (target table, columns)
+        self.pending: Dict[Any, List[List[Any]]] = {}
+        self.rejects = RejectWriter(reject_file or f"{sql_file}.rejects.jsonl")
+        # Target tables loaded in this run and their columns (post-load indexes)
+        self.loaded_columns: Dict[str, List[str]] = {}
+        self.post_load = post_load
+        self.post_load_workers = post_load_workers
+        self.maintenance_work_mem = maintenance_work_mem
         self.only_tables = set(t.lower() for t in only_tables) if only_tables else None
         self.conn = None
         self.cur = None
@@ -52,83 +80,38 @@ class Importer:
         }
         self.first_error: Optional[Dict[str, Any]] = None
 
-    def _detect_encoding(self) -> str:
-        if chardet:
-            try:
-                with open(self.sql_file, 'rb') as f:
-                    sample = f.read(200_000)
-                detected = chardet.detect(sample)
-                enc = detected.get('encoding') if detected else None
-                if enc:
-                    return enc
-            except Exception:
-                pass
-        return 'utf-8'
+    def _read_lines(self) -> Iterator[str]:
+        # Single binary pass; lines the primary encoding cannot decode fall back per line
+        reader = DumpReader(self.sql_file, self.encoding)
+        self.decoder = reader.decoder
+        print(f"✅ Encodage du fichier : {reader.encoding}\n")
+        yield from reader.iter_lines()
 
-    def _read_lines(self) -> List[str]:
-        tried = set()
-        for enc in [self._detect_encoding(), 'utf-8', 'cp1252', 'latin-1', 'iso-8859-1']:
-            if not enc or enc.lower() in tried:
-                continue
-            tried.add(enc.lower())
-            try:
-                with open(self.sql_file, 'r', encoding=enc) as f:
-                    lines = f.readlines()
-                print(f"✅ Fichier lu avec encodage : {enc}\n")
-                return lines
-            except UnicodeDecodeError:
+    def _iter_indexed_lines(self) -> Iterator[str]:
+        # --only-tables: seek directly to the INSERT blocks of the selected tables
+        index = DumpIndex.load_or_build(self.sql_file, self.encoding)
+        self.decoder = index.line_decoder()
+        print(f"🗂️  Index du dump : {len(index.tables)} tables (encodage {index.encoding})\n")
+        for table, info in index.tables.items():
+            if info.ddl:
+                self.column_types[table.lower()] = parse_create_table(info.ddl)
+        decode = self.decoder.decode
+        for table in index.tables_in_dump_order():
+            if table.lower() not in self.only_tables:
                 continue
-            except Exception:
-                continue
-        print("⚠️ Lecture avec utf-8 (erreurs ignorées)\n")
-        with open(self.sql_file, 'r', encoding='utf-8', errors='ignore') as f:
-            return f.readlines()
+            for _, raw_line in index.iter_table_lines(table):
+                yield decode(raw_line)
 
     def _parse_insert(self, line: str) -> Optional[Dict[str, Any]]:
-        m = re.search(r"INSERT\s+INTO\s+`?(\w+)`?\s*\(([^)]+)\)\s*VALUES\s*\(([^)]+)\)", line, re.IGNORECASE)
-        if not m:
+        parsed = iter_insert_rows(line)
+        if not parsed:
             return None
-        table = m.group(1).lower()
-        columns = [c.strip().strip('`"\'').lower() for c in m.group(2).split(',')]
-        values_str = m.group(3)
-        # Split values respecting quotes and doubled single quotes
-        values: List[str] = []
-        current: List[str] = []
-        in_quotes = False
-        i = 0
-        while i < len(values_str):
-            ch = values_str[i]
-            if ch == "'":
-                if not in_quotes:
-                    in_quotes = True
-                else:
-                    if i + 1 < len(values_str) and values_str[i + 1] == "'":
-                        current.append("'")
-                        i += 2
-                        continue
-                    in_quotes = False
-            if ch == ',' and not in_quotes:
-                values.append(''.join(current).strip())
-                current = []
-                i += 1
-                continue
-            current.append(ch)
-            i += 1
-        if current:
-            values.append(''.join(current).strip())
-        if len(values) != len(columns):
+        table, columns, rows = parsed
+        if not columns:
             return None
-        record: Dict[str, Any] = {}
-        for col, raw_val in zip(columns, values):
-            v = raw_val.strip()
-            if v.upper() == 'NULL':
-                record[col] = None
-            elif len(v) >= 2 and v[0] == "'" and v[-1] == "'":
-                s = v[1:-1]
-                record[col] = None if s in INVALID_DATE_STRINGS else s
-            else:
-                record[col] = v
-        return {'table': table, 'record': record}
+        columns = [c.lower() for c in columns]
+        width = len(columns)
+        return {'table': table, 'columns': columns, 'rows': (v for v in rows if len(v) == width)}
 
     def _ensure_mapping(self, legacy_table: str, record_cols: List[str]) -> Dict[str, Any]:
         if legacy_table in FIELD_MAPPING:
@@ -142,36 +125,61 @@ class Importer:
         mapping = {c: c for c in record_cols}
         return {'table': f'legacy_{legacy_table}', 'mapping': mapping}
 
-    def _insert_row(self, target_table: str, cols: List[str], values: List[Any]) -> bool:
-        placeholders = ', '.join(['%s'] * len(cols))
-        sql = f'INSERT INTO "{target_table}" ("' + '", "'.join(cols) + f'") VALUES ({placeholders}) ON CONFLICT DO NOTHING'
-        self.cur.execute('SAVEPOINT sp_row')
-        try:
-            self.cur.execute(sql, tuple(values))
-            self.cur.execute('RELEASE SAVEPOINT sp_row')
-            return True
-        except Exception as e:
-            self.cur.execute('ROLLBACK TO SAVEPOINT sp_row')
-            msg = str(e)
-            # Retry by nulling invalid date/time-like values if present
-            if 'date/time' in msg or '0000-00-00' in msg:
-                new_vals = [None if (isinstance(v, str) and v in INVALID_DATE_STRINGS) else v for v in values]
-                if new_vals != values:
-                    self.cur.execute('SAVEPOINT sp_row2')
-                    try:
-                        self.cur.execute(sql, tuple(new_vals))
-                        self.cur.execute('RELEASE SAVEPOINT sp_row2')
-                        return True
-                    except Exception:
-                        self.cur.execute('ROLLBACK TO SAVEPOINT sp_row2')
-            if not self.first_error:
-                self.first_error = {
-                    'table': target_table,
-                    'error': msg,
-                    'sql': sql[:200],
-                    'values': tuple('NULL' if v is None else str(v)[:120] for v in values)
-                }
-            return False
+    def _column_types(self, legacy_table: str) -> Dict[str, MySQLColumn]:
+        # Streamed dumps: CREATE TABLE statements collected so far
+        key = legacy_table.lower()
+        if key not in self.column_types:
+            for table, columns in self.ddl.tables.items():
+                self.column_types.setdefault(table.lower(), columns)
+        return self.column_types.get(key, {})
+
+    @staticmethod
+    def _insert_on_conflict(cur, table: str, cols: List[str], rows: List[List[Any]]) -> int:
+        return insert_values_rows(cur, table, cols, rows, 'ON CONFLICT DO NOTHING')
+
+    def _queue_row(self, target_table: str, cols: Tuple[str, ...], values: Sequence[Any]):
+        key = (target_table, cols)
+        if key not in self.pending:
+            known = self.loaded_columns.setdefault(target_table, [])
+            known.extend(c for c in cols if c not in known)
+        batch = self.pending.setdefault(key, [])
+        batch.append(values)
+        if len(batch) >= self.sizer.size:
+            self._flush(key)
+
+    def _flush(self, key):
+        # Optimistic multi-row INSERT; on failure the batch is bisected down to the bad rows
+        rows = self.pending.pop(key, None)
+        if not rows:
+            return
+        target_table, cols = key
+        started = time.perf_counter()
+        _, failures = load_rows(self.cur, target_table, list(cols), rows,
+                                load_fn=self._insert_on_conflict)
+        if failures:
+            # Bissection: elapsed time says nothing about the batch size
+            self.sizer.failed()
+        else:
+            self.sizer.record(len(rows), time.perf_counter() - started, row_bytes(rows[0]) * len(rows))
+        ok = len(rows) - len(failures)
+        self.stats['successful'] += ok
+        self.stats['tables'][target_table]['success'] += ok
+        self.stats['failed'] += len(failures)
+        self.stats['tables'][target_table]['failed'] += len(failures)
+        for values, error in failures:
+            self.rejects.write(target_table, cols, values, error)
+        if failures and not self.first_error:
+            values, error = failures[0]
+            self.first_error = {
+                'table': target_table,
+                'error': str(error),
+                'sql': f'INSERT INTO "{target_table}" ("' + '", "'.join(cols) + '") ...',
+                'values': tuple('NULL' if v is None else str(v)[:120] for v in values)
+            }
+
+    def _flush_all(self):
+        for key in list(self.pending):
+            self._flush(key)
 
     def run(self):
         print('\n' + '=' * 80)
@@ -191,16 +199,13 @@ class Importer:
                 print(f'❌ Erreur connexion: {e}')
                 return
         try:
-            lines = self._read_lines()
-            if not lines:
-                print('❌ Impossible de lire le fichier')
-                return
-            print('📥 Import des données (ligne par ligne)...\n')
+            lines = self._iter_indexed_lines() if self.only_tables else self._read_lines()
+            print('📥 Import des données (par batch)...\n')
             line_num = 0
             for raw_line in lines:
                 line_num += 1
                 line = raw_line.strip()
-                if not line or not line.lower().startswith('insert into'):
+                if not line or self.ddl.feed(line) or not line[:11].lower() == 'insert into':
                     continue
                 parsed = self._parse_insert(line)
                 if not parsed:
@@ -208,32 +213,30 @@ class Importer:
                 legacy_table = parsed['table']
                 if self.only_tables and legacy_table not in self.only_tables:
                     continue
-                rec = parsed['record']
-                mapping_info = self._ensure_mapping(legacy_table, list(rec.keys()))
+                columns = parsed['columns']
+                mapping_info = self._ensure_mapping(legacy_table, columns)
                 target_table = mapping_info['table']
-                mapping: Dict[str, str] = mapping_info['mapping']
-                new_record: Dict[str, Any] = {}
-                for legacy_col, target_col in mapping.items():
-                    if legacy_col in rec:
-                        new_record[target_col] = rec[legacy_col]
-                if not new_record:
+                projector = self.projectors.get(legacy_table, columns, lambda: mapping_info['mapping'],
+                                                lambda: column_converters(self._column_types(legacy_table)))
+                if not projector:
                     continue
-                cols = list(new_record.keys())
-                vals = [new_record[c] for c in cols]
-                self.stats['total_inserts'] += 1
-                if not self.dry_run:
-                    ok = self._insert_row(target_table, cols, vals)
-                    if ok:
-                        self.stats['successful'] += 1
-                        self.stats['tables'][target_table]['success'] += 1
-                    else:
-                        self.stats['failed'] += 1
-                        self.stats['tables'][target_table]['failed'] += 1
+                cols = projector.target_columns
+                project = projector.project
+                for values in parsed['rows']:
+                    self.stats['total_inserts'] += 1
+                    if not self.dry_run:
+                        self._queue_row(target_table, cols, project(values))
                 if line_num % 2000 == 0:
-                    print(f"  ⏳ Ligne {line_num:,} - {self.stats['successful']:,} importés / {self.stats['failed']:,} échecs")
+                    print(f"  ⏳ Ligne {line_num:,} - {self.stats['successful']:,} importés / "
+                          f"{self.stats['failed']:,} échecs ({self.sizer.describe()})")
+            if not self.dry_run:
+                self._flush_all()
             if not self.dry_run and self.conn:
                 print('\n✅ Commit final...')
                 self.conn.commit()
+                if self.post_load:
+                    run_post_load(lambda: psycopg2.connect(self.database_url), self.loaded_columns,
+                                  self.post_load_workers, self.maintenance_work_mem)
             self._summary()
         except Exception as e:
             print(f"\n❌ ERREUR FATALE: {e}")
@@ -242,6 +245,7 @@ class Importer:
                 self.conn.rollback()
             raise
         finally:
+            self.rejects.close()
             if self.cur:
                 self.cur.close()
             if self.conn:
@@ -254,6 +258,8 @@ class Importer:
         print(f"\n📈 Total inserts analysés : {self.stats['total_inserts']:,}")
         print(f"✅ Importés avec succès : {self.stats['successful']:,}")
         print(f"❌ Échecs (ignorés) : {self.stats['failed']:,}")
+        if self.decoder and self.decoder.fallback_lines:
+            print(f"🔤 Lignes décodées en repli : {self.decoder.describe()}")
         if self.stats['tables']:
             print('\n📋 Par table :')
             for t, st in sorted(self.stats['tables'].items()):
@@ -261,6 +267,7 @@ class Importer:
                     print(f"   - {t}: {st['success']:,} OK, {st['failed']:,} KO")
         if self.first_error:
             print(f"\n⚠️  Première erreur : {self.first_error['error']}")
+            print(f"📝 Lignes rejetées : {self.rejects.path}")
         print(f"\n⏰ Fin: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print('=' * 80)
 
@@ -271,6 +278,17 @@ def main():
     parser.add_argument('database_url', nargs='?', help='URL PostgreSQL')
     parser.add_argument('--dry-run', action='store_true', help='Simulation (aucun INSERT)')
     parser.add_argument('--only-tables', type=str, help='Tables legacy à traiter, séparées par des virgules (ex: versement,edl)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Lignes par INSERT multi-lignes au départ, ajusté ensuite (défaut: 1000)')
+    parser.add_argument('--fixed-batch-size', action='store_true', help='Ne pas ajuster --batch-size en cours d\'import')
+    parser.add_argument('--reject-file', help='Fichier des lignes rejetées (défaut: <dump>.rejects.jsonl)')
+    parser.add_argument('--encoding', help="Encodage principal du dump (défaut: détecté sur un échantillon)")
+    parser.add_argument('--post-load', action='store_true',
+                        help='Après import : clés primaires, index FK/dates et ANALYZE des tables chargées')
+    parser.add_argument('--post-load-workers', type=int, default=DEFAULT_POST_LOAD_WORKERS,
+                        help=f'Connexions parallèles du post-chargement (défaut: {DEFAULT_POST_LOAD_WORKERS})')
+    parser.add_argument('--maintenance-work-mem', default=DEFAULT_MAINTENANCE_WORK_MEM,
+                        help=f'maintenance_work_mem des constructions d\'index (défaut: {DEFAULT_MAINTENANCE_WORK_MEM})')
     args = parser.parse_args()
 
     db_url = args.database_url or os.getenv('DATABASE_URL')
@@ -281,7 +299,8 @@ def main():
     if args.only_tables:
         only = [t.strip().lower() for t in args.only_tables.split(',') if t.strip()]
 
-    imp = Importer(args.sql_file, db_url, args.dry_run, only)
+    imp = Importer(args.sql_file, db_url, args.dry_run, only, args.batch_size, args.reject_file, args.encoding,
+                   args.post_load, args.post_load_workers, args.maintenance_work_mem, args.fixed_batch_size)
     imp.run()
 
 
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Profilage d'un import legacy en dry-run
+Mesure, par table legacy, le débit de parsing (lecture + décodage + découpage
+des tuples) et de transformation, ainsi que le volume exact du flux COPY que
+recevrait chaque table cible. Un échantillon de ce flux est ensuite chargé
+dans la base configurée, dans une transaction annulée, pour calibrer le débit
+COPY réel et projeter la durée totale de l'import.
+
+Comme bulk_loader, le module ne dépend pas de psycopg2 : la connexion de
+calibration est fournie par l'appelant.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from bulk_loader import build_copy_buffer, copy_rows, quote_ident
+
+CALIBRATION_TABLE = '_akig_calibration'
+DEFAULT_SAMPLE_BYTES = 4 << 20
+
+
+@dataclass
+class TableProfile:
+    """Mesures d'une table legacy pendant le dry-run"""
+    target_table: str
+    parsed_rows: int = 0
+    parse_seconds: float = 0.0
+    rows: int = 0
+    transform_seconds: float = 0.0
+    copy_bytes: int = 0
+    columns: List[str] = field(default_factory=list)
+    sample: List[List[Any]] = field(default_factory=list)
+    sample_bytes: int = 0
+    copy_bytes_per_s: Optional[float] = None
+
+    def projected_seconds(self, copy_rate: Optional[float]) -> Optional[float]:
+        """Durée projetée de l'import réel : parsing + transformation + COPY"""
+        rate = self.copy_bytes_per_s or copy_rate
+        if not rate:
+            return None
+        return self.parse_seconds + self.transform_seconds + self.copy_bytes / rate
+
+
+def _rate(count: float, seconds: float) -> str:
+    return f"{count / seconds:,.0f}" if seconds > 0 else '-'
+
+
+class ImportProfiler:
+    """Collecte les mesures du dry-run, calibre le COPY et affiche la projection"""
+
+    def __init__(self, sample_bytes: int = DEFAULT_SAMPLE_BYTES):
+        self.sample_bytes = sample_bytes
+        self.tables: Dict[str, TableProfile] = {}
+        self.calibration_error: Optional[str] = None
+
+    def _table(self, legacy_table: str, target_table: str) -> TableProfile:
+        profile = self.tables.get(legacy_table)
+        if profile is None:
+            profile = self.tables[legacy_table] = TableProfile(target_table)
+        return profile
+
+    def add_parse(self, legacy_table: str, target_table: str, rows: int, seconds: float):
+        profile = self._table(legacy_table, target_table)
+        profile.parsed_rows += rows
+        profile.parse_seconds += seconds
+
+    def add_batch(self, legacy_table: str, target_table: str, columns: Sequence[str],
+                  rows: List[List[Any]], transform_seconds: float):
+        """Enregistre un batch transformé : volume COPY exact et échantillon de calibration"""
+        profile = self._table(legacy_table, target_table)
+        profile.rows += len(rows)
+        profile.transform_seconds += transform_seconds
+        size = len(build_copy_buffer(rows).getvalue().encode('utf-8'))
+        profile.copy_bytes += size
+        if not profile.sample:
+            profile.columns = list(columns)
+        if profile.sample_bytes < self.sample_bytes and list(columns) == profile.columns:
+            profile.sample.extend(rows)
+            profile.sample_bytes += size
+
+    # ------------------------------------------------------------------
+    # CALIBRATION
+    # ------------------------------------------------------------------
+    def calibrate(self, conn):
+        """
+        Charge l'échantillon de chaque table dans une copie de sa cible
+
+        La copie (LIKE cible, avec défauts et index ; colonnes TEXT si la cible
+        n'existe pas ou refuse l'échantillon) est créée puis annulée dans la
+        même transaction : rien ne reste en base.
+        """
+        cursor = conn.cursor()
+        try:
+            for profile in self.tables.values():
+                if profile.sample:
+                    profile.copy_bytes_per_s = self._calibrate_table(cursor, profile)
+        finally:
+            conn.rollback()
+            cursor.close()
+
+    def _calibrate_table(self, cursor, profile: TableProfile) -> Optional[float]:
+        temp = quote_ident(CALIBRATION_TABLE)
+        text_columns = ', '.join(f"{quote_ident(c)} TEXT" for c in profile.columns)
+        ddls = [
+            f"CREATE TABLE {temp} (LIKE {quote_ident(profile.target_table)} INCLUDING DEFAULTS INCLUDING INDEXES)",
+            f"CREATE TABLE {temp} ({text_columns})",
+        ]
+        for ddl in ddls:
+            cursor.execute("SAVEPOINT sp_calibration")
+            try:
+                cursor.execute(ddl)
+                started = time.perf_counter()
+                copy_rows(cursor, CALIBRATION_TABLE, profile.columns, profile.sample)
+                elapsed = time.perf_counter() - started
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT sp_calibration")
+                continue
+            cursor.execute("ROLLBACK TO SAVEPOINT sp_calibration")
+            return profile.sample_bytes / elapsed if elapsed > 0 else None
+        return None
+
+    # ------------------------------------------------------------------
+    # RAPPORT
+    # ------------------------------------------------------------------
+    def overall_copy_rate(self) -> Optional[float]:
+        """Débit COPY moyen pondéré des tables calibrées (pour celles qui ne le sont pas)"""
+        calibrated = [p for p in self.tables.values() if p.copy_bytes_per_s]
+        if not calibrated:
+            return None
+        total_bytes = sum(p.sample_bytes for p in calibrated)
+        total_seconds = sum(p.sample_bytes / p.copy_bytes_per_s for p in calibrated)
+        return total_bytes / total_seconds if total_seconds > 0 else None
+
+    def print_report(self, workers: int = 1):
+        print("\n" + "=" * 80)
+        print("⏱️  PROFIL DRY-RUN")
+        print("=" * 80)
+        copy_rate = self.overall_copy_rate()
+        total_projected = 0.0
+        projected_all = True
+
+        for legacy_table, p in sorted(self.tables.items(), key=lambda item: -item[1].copy_bytes):
+            projected = p.projected_seconds(copy_rate)
+            if projected is None:
+                projected_all = False
+            else:
+                total_projected += projected
+            copy = f"{p.copy_bytes_per_s / 1e6:,.1f} Mo/s" if p.copy_bytes_per_s else 'non calibré'
+            eta = f"~{projected:,.0f}s" if projected is not None else '?'
+            print(f"  • {legacy_table} → {p.target_table}: {p.rows:,} lignes, {p.copy_bytes / 1e6:,.1f} Mo COPY")
+            print(f"      parsing {_rate(p.parsed_rows, p.parse_seconds)} lignes/s, "
+                  f"transformation {_rate(p.rows, p.transform_seconds)} lignes/s, "
+                  f"COPY {copy} → {eta}")
+
+        total_bytes = sum(p.copy_bytes for p in self.tables.values())
+        print(f"\n  Volume COPY total: {total_bytes / 1e6:,.1f} Mo")
+        if self.calibration_error:
+            print(f"  ⚠️ Calibration impossible: {self.calibration_error}")
+        if copy_rate is None:
+            print("  ⚠️ Aucune table calibrée : durée d'import non projetée")
+            return
+        if not projected_all:
+            print("  ⚠️ Certaines tables n'ont pas de mesure : projection partielle")
+        print(f"  Débit COPY calibré (moyen): {copy_rate / 1e6:,.1f} Mo/s")
+        print(f"  Durée projetée (séquentielle): {total_projected / 60:,.1f} min")
+        if workers > 1:
+            # Borne optimiste : les rangs FK limitent le parallélisme réel
+            print(f"  Durée projetée ({workers} workers, borne basse): {total_projected / workers / 60:,.1f} min")
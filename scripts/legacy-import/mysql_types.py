@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Types MySQL du dump → types PostgreSQL
+Les colonnes sont lues dans les CREATE TABLE du dump (DumpIndex.ddl, ou
+collectés au fil de la lecture) et chaque type MySQL reçoit son équivalent
+PostgreSQL exact : datetime → TIMESTAMP, decimal(p,s) → NUMERIC(p,s),
+tinyint(1) → BOOLEAN, enum(...) → VARCHAR(plus long libellé), entiers
+unsigned élargis au type supérieur, etc.
+
+Chaque colonne a aussi une conversion de valeur, appliquée une seule fois à la
+projection des tuples (row_projector) : dates nulles MySQL ('0000-00-00',
+'2019-00-00'...) → NULL, chaînes numériques → int/Decimal, tinyint(1) et
+bit(1) → bool (toute valeur non nulle est vraie), '' → NULL pour les types
+non texte. Une valeur impossible à convertir est laissée telle quelle :
+PostgreSQL la refuse et la ligne part dans le fichier de rejets.
+
+Les contraintes (NOT NULL, DEFAULT, clés) ne sont pas reprises : les données
+legacy ne les respectent pas toujours (dates nulles devenues NULL).
+"""
+
+import re
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Converter = Callable[[Any], Any]
+
+_CREATE_RE = re.compile(r'^\s*CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?[`"]?(\w+)[`"]?', re.IGNORECASE)
+# `nom` type(arguments) [unsigned] ; les arguments d'un enum peuvent contenir des parenthèses
+_STRING_LITERAL_RE = re.compile(r"'(?:[^'\\]|''|\\.)*'")
+_COLUMN_RE = re.compile(
+    r"""[`"]([^`"]+)[`"]\s+(\w+)\s*(?:\(((?:'[^']*(?:''[^']*)*'|[^)'])*)\))?\s*(unsigned)?""",
+    re.IGNORECASE,
+)
+_ENUM_LABEL_RE = re.compile(r"'((?:[^']|'')*)'")
+_PRIMARY_KEY_RE = re.compile(r'PRIMARY\s+KEY\s*(?:\w+\s*)?\(((?:[^()]|\(\d+\))*)\)', re.IGNORECASE)
+# '0000-..', 'AAAA-00-..', 'AAAA-MM-00..', '00/00/0000'
+_ZERO_DATE_RE = re.compile(r'0000-|\d{4}-(?:00|\d\d-00)|00/00/')
+
+_BLOB_TYPES = {'blob', 'tinyblob', 'mediumblob', 'longblob', 'binary', 'varbinary'}
+# (type signé, type unsigned)
+_INTEGER_TYPES = {
+    'tinyint': ('SMALLINT', 'SMALLINT'),
+    'smallint': ('SMALLINT', 'INTEGER'),
+    'mediumint': ('INTEGER', 'INTEGER'),
+    'int': ('INTEGER', 'BIGINT'),
+    'integer': ('INTEGER', 'BIGINT'),
+    'bigint': ('BIGINT', 'NUMERIC(20,0)'),
+}
+
+
+# ----------------------------------------------------------------------
+# CONVERSIONS DE VALEURS
+# ----------------------------------------------------------------------
+def _to_int(value: Any) -> Any:
+    if value.__class__ is not str:
+        return value
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def _to_decimal(value: Any) -> Any:
+    if value.__class__ is not str:
+        return value
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return value
+
+
+def _to_float(value: Any) -> Any:
+    if value.__class__ is not str:
+        return value
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _to_date(value: Any) -> Any:
+    if value.__class__ is not str:
+        return value
+    if not value or _ZERO_DATE_RE.match(value):
+        return None
+    return value
+
+
+def _to_enum(value: Any) -> Any:
+    # '' est la valeur d'erreur des enum MySQL (libellé invalide à l'insertion)
+    return None if value == '' else value
+
+
+def _bit_value(value: Any) -> Any:
+    """Entier d'une valeur bit : b'101' (mysqldump), 0x05 / _binary (bytes), '5' ; sinon inchangée"""
+    if value.__class__ is bytes:
+        return int.from_bytes(value, 'big') if value else None
+    if value.__class__ is not str:
+        return value
+    value = value.strip()
+    if not value:
+        return None
+    if value[:2] in ("b'", "B'") and value[-1] == "'":
+        digits = value[2:-1]
+        return int(digits, 2) if digits and not digits.strip('01') else value
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def _to_bool(value: Any) -> Any:
+    # Tout entier non nul est vrai (tinyint(1) accepte -128..127), comme IF(x <> 0) côté MySQL
+    if value is None or value.__class__ is bool:
+        return value
+    value = _bit_value(value)
+    if isinstance(value, (int, float, Decimal)):
+        return value != 0
+    # Texte non numérique (true, 'f'...) : laissé à PostgreSQL, qui l'accepte ou rejette la ligne
+    return value
+
+
+def _to_bytes(value: Any) -> Any:
+    return value.encode('utf-8') if value.__class__ is str else value
+
+
+# ----------------------------------------------------------------------
+# COLONNES
+# ----------------------------------------------------------------------
+@dataclass(frozen=True)
+class MySQLColumn:
+    """Une colonne d'un CREATE TABLE MySQL"""
+    name: str
+    type: str
+    args: Tuple[str, ...] = ()
+    unsigned: bool = False
+    # ON UPDATE CURRENT_TIMESTAMP : date de dernière modification tenue par MySQL
+    on_update: bool = False
+
+    @property
+    def pg_type(self) -> str:
+        """Type PostgreSQL équivalent"""
+        t, args = self.type, self.args
+        if t == 'tinyint' and args == ('1',):
+            return 'BOOLEAN'
+        if t in _INTEGER_TYPES:
+            return _INTEGER_TYPES[t][self.unsigned]
+        if t in ('decimal', 'numeric', 'dec', 'fixed'):
+            return f"NUMERIC({','.join(args)})" if args else 'NUMERIC'
+        if t == 'float':
+            return 'REAL'
+        if t in ('double', 'real'):
+            return 'DOUBLE PRECISION'
+        if t in ('datetime', 'timestamp'):
+            return 'TIMESTAMP'
+        if t == 'date':
+            return 'DATE'
+        if t == 'time':
+            return 'TIME'
+        if t == 'year':
+            return 'SMALLINT'
+        if t == 'bit':
+            return 'BOOLEAN' if args in ((), ('1',)) else 'BIGINT'
+        if t in ('varchar', 'char') and args:
+            return f"VARCHAR({args[0]})"
+        if t == 'enum':
+            return f"VARCHAR({max((len(label) for label in args), default=1) or 1})"
+        if t in _BLOB_TYPES:
+            return 'BYTEA'
+        if t == 'json':
+            return 'JSONB'
+        # text, set, types spatiaux et inconnus
+        return 'TEXT'
+
+    @property
+    def converter(self) -> Optional[Converter]:
+        """Conversion des valeurs parsées (None : valeur gardée telle quelle)"""
+        t = self.type
+        if self.pg_type == 'BOOLEAN':
+            return _to_bool
+        if t == 'bit':
+            return _bit_value
+        if t in _INTEGER_TYPES or t == 'year':
+            return _to_int
+        if t in ('decimal', 'numeric', 'dec', 'fixed'):
+            return _to_decimal
+        if t in ('float', 'double', 'real'):
+            return _to_float
+        if t in ('datetime', 'timestamp', 'date'):
+            return _to_date
+        if t == 'enum':
+            return _to_enum
+        if t in _BLOB_TYPES:
+            return _to_bytes
+        return None
+
+
+def _split_definitions(body: str) -> List[str]:
+    """Découpe le corps d'un CREATE TABLE aux virgules de premier niveau"""
+    parts, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(body):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in '\'"`':
+            quote = ch
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif ch == ',' and depth == 0:
+            parts.append(body[start:i])
+            start = i + 1
+    parts.append(body[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+def parse_create_table(ddl: str) -> Dict[str, MySQLColumn]:
+    """Colonnes d'un CREATE TABLE MySQL : {nom en minuscules: MySQLColumn}, dans l'ordre"""
+    start, end = ddl.find('('), ddl.rfind(')')
+    if start < 0 or end <= start:
+        return {}
+    columns: Dict[str, MySQLColumn] = {}
+    for definition in _split_definitions(ddl[start + 1:end]):
+        # PRIMARY KEY, KEY, CONSTRAINT... ne commencent pas par un identifiant quoté
+        match = _COLUMN_RE.match(definition)
+        if not match:
+            continue
+        name, type_name, raw_args, unsigned = match.groups()
+        type_name = type_name.lower()
+        if type_name in ('enum', 'set'):
+            args = tuple(label.replace("''", "'") for label in _ENUM_LABEL_RE.findall(raw_args or ''))
+        else:
+            args = tuple(a.strip() for a in raw_args.split(',')) if raw_args else ()
+        # Hors littéraux (COMMENT '...', DEFAULT '...')
+        on_update = 'ON UPDATE' in _STRING_LITERAL_RE.sub('', definition).upper()
+        columns[name.lower()] = MySQLColumn(name, type_name, args, bool(unsigned), on_update)
+    return columns
+
+
+def primary_key_columns(ddl: str) -> List[str]:
+    """Colonnes de la clé primaire d'un CREATE TABLE MySQL (liste vide sans clé primaire)"""
+    match = _PRIMARY_KEY_RE.search(_STRING_LITERAL_RE.sub("''", ddl))
+    if not match:
+        return []
+    # `id`, `code`(10) : longueur de préfixe ignorée
+    return [re.sub(r'\(\d+\)', '', c).strip().strip('`"') for c in match.group(1).split(',')]
+
+
+def column_converters(columns: Dict[str, MySQLColumn]) -> Dict[str, Converter]:
+    """{colonne (minuscules): conversion} des colonnes qui en ont une"""
+    converters = {}
+    for key, column in columns.items():
+        converter = column.converter
+        if converter is not None:
+            converters[key] = converter
+    return converters
+
+
+class CreateTableCollector:
+    """
+    Collecte les CREATE TABLE d'un dump lu en flux (lecture sans index)
+
+    feed() reçoit chaque ligne et renvoie True si elle appartient à un
+    CREATE TABLE ; tables contient ensuite {table: colonnes typées}.
+    """
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[str, MySQLColumn]] = {}
+        self._table: Optional[str] = None
+        self._lines: List[str] = []
+
+    def feed(self, line: str) -> bool:
+        if self._table is None:
+            # Sans copier les longues lignes INSERT
+            if line[:16].lstrip()[:6].upper() != 'CREATE':
+                return False
+            match = _CREATE_RE.match(line)
+            if not match:
+                return False
+            self._table = match.group(1)
+        self._lines.append(line)
+        if line.rstrip().endswith(';'):
+            self.tables[self._table] = parse_create_table('\n'.join(self._lines))
+            self._table, self._lines = None, []
+        return True
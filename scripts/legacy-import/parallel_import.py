@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Ordonnanceur d'import parallèle par table
+Exécute les tâches d'import dans un pool de processus (une connexion
+PostgreSQL par worker) en respectant l'ordre des clés étrangères.
+
+L'ordre est celui de LegacyDataImporter.IMPORT_ORDER (import-to-postgres.py)
+et du processing_order de DataCategorizer (categorize-data.py) :
+owners → sites → properties → tenants → contracts → paiements/loyers → charges.
+Une table de rang N ne démarre que lorsque toutes les tables de rang < N sont
+chargées et commitées ; les tables hors de cet ordre (legacy_*, audit_logs...)
+n'ont pas de FK et démarrent immédiatement.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+# Tables cibles dans l'ordre de LegacyDataImporter.IMPORT_ORDER
+FK_IMPORT_ORDER = [
+    'owners',
+    'sites',
+    'properties',
+    'tenants',
+    'contracts',
+    'rent_payments',
+    'payments',
+    'charges',
+]
+
+
+def fk_rank(target_table: str) -> Optional[int]:
+    """Rang de la table cible dans l'ordre FK, None si elle n'y figure pas"""
+    try:
+        return FK_IMPORT_ORDER.index(target_table)
+    except ValueError:
+        return None
+
+
+def run_in_fk_order(jobs: List[Dict[str, Any]], worker: Callable[[Dict[str, Any]], Any],
+                    max_workers: int, on_result: Optional[Callable[[Any], None]] = None) -> List[Any]:
+    """
+    Exécute worker(job) pour chaque job dans un pool de processus
+
+    Chaque job doit contenir 'target_table' ; les jobs d'un même rang (shards
+    d'une table, tables indépendantes) tournent en parallèle. on_result est
+    appelé dans le processus principal à chaque job terminé (suivi en direct).
+
+    Returns:
+        Les résultats des workers, dans l'ordre de terminaison
+    """
+    pending_ranked: Dict[int, List[Dict[str, Any]]] = {}
+    immediate: List[Dict[str, Any]] = []
+    for job in jobs:
+        rank = fk_rank(job['target_table'])
+        if rank is None:
+            immediate.append(job)
+        else:
+            pending_ranked.setdefault(rank, []).append(job)
+
+    results: List[Any] = []
+    running_ranks: Dict[Any, Optional[int]] = {}
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        def submit(job_list: List[Dict[str, Any]], rank: Optional[int]):
+            for job in job_list:
+                running_ranks[pool.submit(worker, job)] = rank
+
+        def release_next_rank():
+            # Démarre le plus petit rang en attente dès qu'aucun rang inférieur ne tourne
+            if not pending_ranked:
+                return
+            lowest = min(pending_ranked)
+            if any(r is not None and r < lowest for r in running_ranks.values()):
+                return
+            submit(pending_ranked.pop(lowest), lowest)
+
+        submit(immediate, None)
+        release_next_rank()
+
+        while running_ranks:
+            done, _ = wait(list(running_ranks), return_when=FIRST_COMPLETED)
+            for future in done:
+                running_ranks.pop(future)
+                results.append(future.result())
+                if on_result:
+                    on_result(results[-1])
+            release_next_rank()
+
+    return results
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Phase post-chargement : clés primaires, index, ANALYZE
+Les tables créées automatiquement par les importeurs (legacy_*, audit_logs,
+disbursements...) sont chargées sans aucun index. Une fois le chargement
+terminé, cette phase construit en parallèle, sur plusieurs connexions :
+
+    1. la clé primaire (colonne id) de chaque table ;
+    2. les index des clés étrangères inférées (colonnes *_id) et des colonnes
+       de date ;
+    3. ANALYZE de chaque table.
+
+Les phases s'enchaînent parce que ALTER TABLE ... ADD PRIMARY KEY verrouille
+la table en exclusif ; à l'intérieur d'une phase, toutes les tâches tournent
+en parallèle (plusieurs CREATE INDEX sur une même table sont compatibles).
+Chaque connexion reçoit SET maintenance_work_mem. Tout est idempotent : une
+clé primaire existante est laissée telle quelle, et une colonne déjà en tête
+d'un index (quel que soit son nom, par ex. idx_audit_date créé par les
+pipelines PowerShell) n'en reçoit pas un second.
+
+Comme bulk_loader, le module ne dépend pas de psycopg2 : l'appelant fournit
+une fonction de connexion.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from bulk_loader import quote_ident
+
+DEFAULT_MAINTENANCE_WORK_MEM = '512MB'
+DEFAULT_POST_LOAD_WORKERS = 4
+
+# Mêmes indices que l'inférence de type des importeurs
+DATE_COLUMN_HINTS = ('date', 'timestamp', 'echeance', 'periode')
+
+
+@dataclass
+class PostLoadTask:
+    """Une instruction de la phase post-chargement"""
+    table: str
+    label: str
+    sql: str
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+def is_fk_column(column: str) -> bool:
+    return column.lower().endswith('_id')
+
+
+def is_date_column(column: str) -> bool:
+    col_low = column.lower()
+    return any(hint in col_low for hint in DATE_COLUMN_HINTS)
+
+
+def index_name(table: str, column: str) -> str:
+    # Limite PostgreSQL : 63 octets
+    return f"idx_{table}_{column}"[:63]
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def primary_key_task(table: str, column: str = 'id') -> PostLoadTask:
+    sql = f"""
+        DO $$ BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conrelid = {_literal(quote_ident(table))}::regclass AND contype = 'p'
+            ) THEN
+                ALTER TABLE {quote_ident(table)} ADD PRIMARY KEY ({quote_ident(column)});
+            END IF;
+        END $$;
+    """
+    return PostLoadTask(table, f"PK {table}({column})", sql)
+
+
+def index_task(table: str, column: str) -> PostLoadTask:
+    name = index_name(table, column)
+    # Index existant dont la colonne est la première clé : il sert déjà les recherches sur la colonne
+    sql = f"""
+        DO $$ BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_index i
+                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+                WHERE i.indrelid = {_literal(quote_ident(table))}::regclass AND a.attname = {_literal(column)}
+            ) THEN
+                CREATE INDEX IF NOT EXISTS {quote_ident(name)} ON {quote_ident(table)} ({quote_ident(column)});
+            END IF;
+        END $$;
+    """
+    return PostLoadTask(table, name, sql)
+
+
+def analyze_task(table: str) -> PostLoadTask:
+    return PostLoadTask(table, f"ANALYZE {table}", f"ANALYZE {quote_ident(table)}")
+
+
+def plan_indexes(table: str, columns: Iterable[str]) -> List[PostLoadTask]:
+    """Index des clés étrangères inférées et des colonnes de date"""
+    return [index_task(table, col) for col in columns
+            if col.lower() != 'id' and (is_fk_column(col) or is_date_column(col))]
+
+
+def _run_task(connect: Callable[[], Any], task: PostLoadTask, maintenance_work_mem: str) -> PostLoadTask:
+    started = time.perf_counter()
+    try:
+        conn = connect()
+    except Exception as e:
+        task.error = str(e).strip()
+        return task
+    try:
+        conn.autocommit = True
+        cursor = conn.cursor()
+        cursor.execute("SET maintenance_work_mem = %s", (maintenance_work_mem,))
+        cursor.execute(task.sql)
+        cursor.close()
+    except Exception as e:
+        task.error = str(e).strip().splitlines()[0]
+    finally:
+        conn.close()
+    task.seconds = time.perf_counter() - started
+    return task
+
+
+def _run_phase(connect: Callable[[], Any], tasks: List[PostLoadTask], workers: int,
+               maintenance_work_mem: str, icon: str) -> List[PostLoadTask]:
+    if not tasks:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        done = list(pool.map(lambda task: _run_task(connect, task, maintenance_work_mem), tasks))
+    for task in done:
+        if task.error:
+            print(f"   ⚠️ {task.label}: {task.error}")
+        else:
+            print(f"   {icon} {task.label} ({task.seconds:.1f}s)")
+    return done
+
+
+def run_post_load(connect: Callable[[], Any], tables: Dict[str, List[str]],
+                  workers: int = DEFAULT_POST_LOAD_WORKERS,
+                  maintenance_work_mem: str = DEFAULT_MAINTENANCE_WORK_MEM) -> List[PostLoadTask]:
+    """
+    Construit clés primaires et index des tables chargées, puis les analyse
+
+    Args:
+        connect: fonction qui ouvre une nouvelle connexion PostgreSQL
+        tables: {table cible: colonnes}
+    Returns:
+        Toutes les tâches exécutées (error renseigné en cas d'échec)
+    """
+    if not tables:
+        return []
+    print(f"\n🏗️  Post-chargement: {len(tables)} table(s), {workers} connexion(s), "
+          f"maintenance_work_mem={maintenance_work_mem}")
+    started = time.perf_counter()
+
+    pk_tasks = [primary_key_task(table) for table, cols in tables.items()
+                if 'id' in (c.lower() for c in cols)]
+    pk_done = _run_phase(connect, pk_tasks, workers, maintenance_work_mem, '🔑')
+
+    index_tasks = [task for table, cols in tables.items() for task in plan_indexes(table, cols)]
+    # Sans clé primaire (doublons d'id dans les données legacy), id reste au moins indexé
+    index_tasks.extend(index_task(task.table, 'id') for task in pk_done if task.error)
+    index_done = _run_phase(connect, index_tasks, workers, maintenance_work_mem, '📇')
+
+    analyze_done = _run_phase(connect, [analyze_task(table) for table in tables],
+                              workers, maintenance_work_mem, '📊')
+
+    results = pk_done + index_done + analyze_done
+    failed = sum(1 for task in results if task.error)
+    print(f"   ✅ Post-chargement terminé en {time.perf_counter() - started:.1f}s"
+          + (f" ({failed} échec(s))" if failed else ''))
+    return results
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Métriques de progression des migrations et imports
+Compteurs partagés par les écrivains (migration_engine, LegacySQLImporter,
+LegacyDataImporter) : lignes traitées, rejets, doublons, temps par phase
+(read, parse, transform, write, commit), débit instantané (10 s) et moyen
+(5 min), ETA et taux d'erreur.
+
+Deux sorties, pour suivre un basculement long depuis la supervision :
+  - texte Prometheus sur http://127.0.0.1:<port>/metrics (JSON sur /progress) ;
+  - fichier JSON de progression réécrit toutes les `interval` secondes
+    (remplacement atomique : un lecteur ne voit jamais un fichier partiel).
+
+Sans port ni fichier, l'objet est un simple accumulateur (workers d'un pool,
+dont les totaux sont renvoyés au processus principal). Aucune dépendance :
+http.server et threading de la bibliothèque standard.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional
+
+PHASES = ('read', 'parse', 'transform', 'write', 'commit')
+INSTANT_WINDOW = 10.0
+AVERAGE_WINDOW = 300.0
+DEFAULT_INTERVAL = 5.0
+
+
+class ProgressMetrics:
+    """Compteurs de progression thread-safe, exposés en Prometheus et en fichier JSON"""
+
+    def __init__(self, job: str, total: Optional[int] = None, port: Optional[int] = None,
+                 progress_file: Optional[str] = None, interval: float = DEFAULT_INTERVAL):
+        self.job = job
+        self.port = port
+        self.progress_file = progress_file
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._started_at = datetime.now().isoformat(timespec='seconds')
+        self._total = total
+        self._rows = 0
+        self._errors = 0
+        self._skipped = 0
+        self._tables: Dict[str, int] = {}
+        self._phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        # (instant, lignes traitées) : un échantillon par seconde au plus, sur AVERAGE_WINDOW
+        self._samples = deque([(self._started, 0)])
+        self._finished = False
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    # ----------------------------------------------------------------------
+    # ENREGISTREMENT
+    # ----------------------------------------------------------------------
+    def add_total(self, rows: Optional[int]):
+        """Ajoute des lignes attendues (estimation) ; None : total inconnu"""
+        if rows is None:
+            return
+        with self._lock:
+            self._total = (self._total or 0) + rows
+
+    def record(self, rows: int = 0, errors: int = 0, skipped: int = 0, table: Optional[str] = None):
+        """Lignes écrites, rejetées et écartées (doublons) depuis le dernier appel"""
+        now = time.monotonic()
+        with self._lock:
+            self._rows += rows
+            self._errors += errors
+            self._skipped += skipped
+            if table:
+                self._tables[table] = self._tables.get(table, 0) + rows
+            if now - self._samples[-1][0] >= 1.0:
+                self._samples.append((now, self._rows + self._skipped + self._errors))
+            while len(self._samples) > 2 and now - self._samples[1][0] > AVERAGE_WINDOW:
+                self._samples.popleft()
+
+    def add_phase(self, phase: str, seconds: float):
+        with self._lock:
+            self._phases[phase] = self._phases.get(phase, 0.0) + seconds
+
+    def add_phases(self, phases: Dict[str, float]):
+        with self._lock:
+            for phase, seconds in phases.items():
+                self._phases[phase] = self._phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.perf_counter() - started)
+
+    @property
+    def phases(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._phases)
+
+    # ----------------------------------------------------------------------
+    # LECTURE
+    # ----------------------------------------------------------------------
+    def _rate(self, now: float, done: int, window: float) -> Optional[float]:
+        """Débit (lignes/s) depuis le plus ancien échantillon de la fenêtre"""
+        oldest = next((sample for sample in self._samples if now - sample[0] <= window), self._samples[-1])
+        if now - oldest[0] < 1.0:
+            return None
+        return (done - oldest[1]) / (now - oldest[0])
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            elapsed = now - self._started
+            done = self._rows + self._skipped + self._errors
+            instant = self._rate(now, done, INSTANT_WINDOW)
+            average = self._rate(now, done, AVERAGE_WINDOW)
+            overall = done / elapsed if elapsed > 0 else None
+            rate = average or overall
+            eta = None
+            if self._total and rate and not self._finished:
+                eta = max(self._total - done, 0) / rate
+            seen = self._rows + self._errors
+            return {
+                'job': self.job,
+                'started_at': self._started_at,
+                'updated_at': datetime.now().isoformat(timespec='seconds'),
+                'finished': self._finished,
+                'elapsed_seconds': round(elapsed, 1),
+                'rows': self._rows,
+                'skipped': self._skipped,
+                'errors': self._errors,
+                'total_estimate': self._total,
+                'progress': round(min(done / self._total, 1.0), 4) if self._total else None,
+                'rows_per_second': {
+                    'instant': round(instant, 1) if instant is not None else None,
+                    'average_5m': round(average, 1) if average is not None else None,
+                    'overall': round(overall, 1) if overall is not None else None,
+                },
+                'eta_seconds': round(eta) if eta is not None else None,
+                'error_ratio': round(self._errors / seen, 6) if seen else 0.0,
+                'phase_seconds': {phase: round(seconds, 3) for phase, seconds in self._phases.items()},
+                'tables': dict(self._tables),
+            }
+
+    def prometheus(self) -> str:
+        """Exposition au format texte Prometheus"""
+        snap = self.snapshot()
+        job = f'job="{self.job}"'
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples):
+            lines.append(f"# HELP akig_migration_{name} {help_text}")
+            lines.append(f"# TYPE akig_migration_{name} {kind}")
+            for labels, value in samples:
+                if value is not None:
+                    lines.append(f"akig_migration_{name}{{{','.join([job] + labels)}}} {value}")
+
+        metric('rows_total', 'counter', 'Lignes écrites',
+               [([], snap['rows'])] + [([f'table="{t}"'], n) for t, n in snap['tables'].items()])
+        metric('skipped_total', 'counter', 'Lignes écartées (doublons)', [([], snap['skipped'])])
+        metric('errors_total', 'counter', 'Lignes rejetées', [([], snap['errors'])])
+        metric('error_ratio', 'gauge', 'Part des lignes rejetées', [([], snap['error_ratio'])])
+        metric('rows_per_second', 'gauge', 'Débit en lignes par seconde',
+               [([f'window="{w}"'], v) for w, v in snap['rows_per_second'].items()])
+        metric('phase_seconds_total', 'counter', 'Temps cumulé par phase',
+               [([f'phase="{p}"'], s) for p, s in snap['phase_seconds'].items()])
+        metric('rows_expected', 'gauge', 'Lignes attendues (estimation)', [([], snap['total_estimate'])])
+        metric('progress_ratio', 'gauge', 'Avancement (0 à 1)', [([], snap['progress'])])
+        metric('eta_seconds', 'gauge', 'Temps restant estimé', [([], snap['eta_seconds'])])
+        metric('finished', 'gauge', '1 quand la migration est terminée', [([], int(snap['finished']))])
+        return '\n'.join(lines) + '\n'
+
+    # ----------------------------------------------------------------------
+    # EXPOSITION
+    # ----------------------------------------------------------------------
+    def start(self) -> 'ProgressMetrics':
+        """Lance le serveur HTTP et l'écriture périodique du fichier (si configurés)"""
+        if self.port:
+            self._server = ThreadingHTTPServer(('127.0.0.1', self.port), _handler(self))
+            self._server.daemon_threads = True
+            thread = threading.Thread(target=self._server.serve_forever, name='akig-metrics', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            print(f"📡 Métriques: http://127.0.0.1:{self.port}/metrics")
+        if self.progress_file:
+            thread = threading.Thread(target=self._write_loop, name='akig-progress', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            print(f"📡 Progression: {self.progress_file}")
+        return self
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write_progress()
+
+    def write_progress(self):
+        if not self.progress_file:
+            return
+        tmp = f"{self.progress_file}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.progress_file)
+        except OSError as e:
+            print(f"⚠️ Fichier de progression non écrit: {e}")
+
+    def close(self):
+        """Fige les compteurs (finished), écrit le fichier une dernière fois, arrête le serveur"""
+        with self._lock:
+            self._finished = True
+        self._stop.set()
+        self.write_progress()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=self.interval)
+
+
+def format_phases(phases: Dict[str, float]) -> str:
+    """'phases read 1.2s, transform 0.3s, write 4.5s, commit 0.8s' (phases non mesurées omises)"""
+    return 'phases ' + ', '.join(f"{phase} {phases[phase]:.1f}s" for phase in PHASES if phases.get(phase))
+
+
+def _handler(metrics: ProgressMetrics):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith('/metrics'):
+                body, content_type = metrics.prometheus(), 'text/plain; version=0.0.4; charset=utf-8'
+            elif self.path.startswith('/progress') or self.path == '/':
+                body, content_type = json.dumps(metrics.snapshot(), ensure_ascii=False), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            # Pas de ligne par scrape dans la sortie de la migration
+            pass
+
+    return Handler
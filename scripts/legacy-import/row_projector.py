@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Projecteurs de lignes compilés (legacy → cible)
+Un mapping de colonnes legacy → cible est compilé une fois par (table,
+colonnes de l'INSERT) en un extracteur d'indices (operator.itemgetter) :
+le tuple de valeurs parsé est projeté directement dans l'ordre des colonnes
+cibles, sans dict intermédiaire par ligne.
+
+Les valeurs à convertir en NULL ('' pour l'import auto, dates nulles pour
+l'import direct) sont des chaînes testées en bloc (frozenset.isdisjoint) :
+seules les lignes qui en contiennent sont recopiées. Les conversions par
+colonne issues de la DDL du dump (mysql_types) ne sont appliquées qu'aux
+colonnes qui en ont une.
+"""
+
+from operator import itemgetter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+
+class RowProjector:
+    """Projection compilée d'un tuple de valeurs legacy vers les colonnes cibles"""
+
+    __slots__ = ('target_columns', 'width', '_get', '_null_values', '_converters')
+
+    def __init__(self, source_columns: Sequence[str], mapping: Dict[str, str],
+                 null_values: Iterable[Hashable] = (),
+                 converters: Optional[Dict[str, Callable[[Any], Any]]] = None):
+        source_index = {col: i for i, col in enumerate(source_columns)}
+        # Cible → indice source ; à cible égale, le dernier mapping l'emporte (comme un dict)
+        positions: Dict[str, int] = {}
+        for legacy_col, target_col in mapping.items():
+            if legacy_col in source_index:
+                positions[target_col] = source_index[legacy_col]
+
+        self.target_columns: Tuple[str, ...] = tuple(positions)
+        indexes = tuple(positions.values())
+        # (position cible, conversion) ; converters est indexé par colonne source en minuscules
+        converters = converters or {}
+        self._converters: Tuple[Tuple[int, Callable[[Any], Any]], ...] = tuple(
+            (i, converters[source_columns[index].lower()]) for i, index in enumerate(indexes)
+            if source_columns[index].lower() in converters
+        )
+        self.width = max(indexes) + 1 if indexes else 0
+        self._null_values = frozenset(null_values)
+        self._get: Optional[Callable[[Sequence[Any]], Tuple[Any, ...]]]
+        if not indexes:
+            self._get = None
+        elif len(indexes) == 1:
+            only = indexes[0]
+            self._get = lambda values: (values[only],)
+        else:
+            self._get = itemgetter(*indexes)
+
+    def __bool__(self) -> bool:
+        return self._get is not None
+
+    def project(self, values: Sequence[Any]) -> Sequence[Any]:
+        """Un tuple legacy → tuple dans l'ordre de target_columns (valeurs manquantes à NULL)"""
+        if len(values) < self.width:
+            values = list(values) + [None] * (self.width - len(values))
+        row = self._get(values)
+        null_values = self._null_values
+        if null_values and not null_values.isdisjoint(row):
+            row = [None if v.__class__ is str and v in null_values else v for v in row]
+        if self._converters:
+            row = list(row)
+            for i, convert in self._converters:
+                row[i] = convert(row[i])
+        return row
+
+    def project_rows(self, rows: Iterable[Sequence[Any]]) -> List[Sequence[Any]]:
+        """Projection d'un batch complet (boucle locale, sans appel de méthode par ligne)"""
+        get = self._get
+        width = self.width
+        null_values = self._null_values
+        converters = self._converters
+        projected = []
+        append = projected.append
+        for values in rows:
+            if len(values) < width:
+                values = list(values) + [None] * (width - len(values))
+            row = get(values)
+            if null_values and not null_values.isdisjoint(row):
+                row = [None if v.__class__ is str and v in null_values else v for v in row]
+            if converters:
+                row = list(row)
+                for i, convert in converters:
+                    row[i] = convert(row[i])
+            append(row)
+        return projected
+
+
+class ProjectorCache:
+    """Projecteurs compilés par (table legacy, colonnes de l'INSERT)"""
+
+    def __init__(self, null_values: Iterable[Hashable] = ()):
+        self.null_values = frozenset(null_values)
+        self._projectors: Dict[Tuple[str, Tuple[str, ...]], RowProjector] = {}
+
+    def get(self, legacy_table: str, source_columns: Sequence[str],
+            mapping: Callable[[], Dict[str, str]],
+            converters: Optional[Callable[[], Dict[str, Callable[[Any], Any]]]] = None) -> RowProjector:
+        """
+        Projecteur de la table pour ces colonnes ; mapping() et converters() ne sont
+        appelés qu'à la compilation
+
+        Le mapping et les conversions d'une table sont supposés fixes pendant l'import.
+        """
+        key = (legacy_table, tuple(source_columns))
+        projector = self._projectors.get(key)
+        if projector is None:
+            projector = RowProjector(source_columns, mapping(), self.null_values,
+                                     converters() if converters else None)
+            self._projectors[key] = projector
+        return projector
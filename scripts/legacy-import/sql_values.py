@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Tokenizer partagé des INSERT MySQL (mysqldump)
+Découpe les INSERT étendus (multi-lignes VALUES (...),(...),...) tuple par tuple
+avec un scanner à expressions régulières compilées, et rend des valeurs typées
+
+Utilisé par import-sql-direct-auto.py, import-sql-direct.py et
+scripts/import-historique-only.py. Chaque ligne est découpée en jetons par un
+seul findall (boucle en C) ; seule la conversion typée reste en Python, et les
+tuples sont produits au fil de l'eau.
+
+Typage des littéraux :
+    'texte' / "texte"      → str (échappements MySQL \\' '' \\\\ \\n \\0 ... résolus)
+    NULL                   → None
+    42 / -7                → int
+    3.14                   → Decimal (exact)
+    1e5                    → float
+    0xCAFE / X'CAFE'       → bytes
+    _binary '...'          → bytes
+    autres (CURRENT_TIMESTAMP, TRUE...) → str brut
+"""
+
+import re
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# INSERT [IGNORE] INTO `table` [(`col`, ...)] VALUES
+INSERT_HEADER_RE = re.compile(
+    r"^\s*INSERT\s+(?:IGNORE\s+)?INTO\s+`?(\w+)`?\s*(?:\(([^)]*)\)\s*)?VALUES\s*",
+    re.IGNORECASE
+)
+
+# Un jeton : littéral nu (nombre, NULL, 0x.., mot-clé), chaîne, _binary '..',
+# X'..' ou la parenthèse fermante d'un tuple. Les chaînes sont décrites en
+# boucle « déroulée » (pas d'alternative par caractère) ; findall saute
+# '(' ',' ';' et les blancs entre deux jetons.
+_TOKEN_RE = re.compile(r"""
+      [^\s,();'"_xX][^\s,()]*(?:\s+[^\s,()]+)*
+    | '[^'\\]*(?:(?:\\.|'')[^'\\]*)*'
+    | \)
+    | "[^"\\]*(?:(?:\\.|"")[^"\\]*)*"
+    | _binary\s*'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'
+    | [xX]'[0-9A-Fa-f]*'
+    | [^\s,();'"][^\s,()]*(?:\s+[^\s,()]+)*
+""", re.VERBOSE | re.DOTALL)
+
+_NUMBER_RE = re.compile(r"""
+      (?P<int>[-+]?\d+)
+    | (?P<dec>[-+]?(?:\d+\.\d*|\.\d+))
+    | (?P<float>[-+]?(?:\d+\.?\d*|\.\d+)[eE][-+]?\d+)
+    | 0[xX](?P<hex>[0-9A-Fa-f]*)
+""", re.VERBOSE)
+
+_NUMBER_TYPES: Dict[str, Callable[[str], Any]] = {
+    'int': int,
+    'dec': Decimal,
+    'float': float,
+}
+
+# Échappements MySQL à l'intérieur d'une chaîne ('' ou "" selon la quote)
+_ESCAPE_RES = {
+    "'": re.compile(r"\\(.)|''", re.DOTALL),
+    '"': re.compile(r'\\(.)|""', re.DOTALL),
+}
+
+MYSQL_ESCAPES = {
+    '0': '\0',
+    'b': '\b',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+    'Z': '\x1a',
+    '\\': '\\',
+    "'": "'",
+    '"': '"',
+    # \% et \_ gardent leur backslash (échappements LIKE)
+    '%': '\\%',
+    '_': '\\_',
+}
+
+
+def _unescape_match(match) -> str:
+    escaped = match.group(1)
+    if escaped is None:
+        # Quote doublée
+        return match.group(0)[0]
+    return MYSQL_ESCAPES.get(escaped, escaped)
+
+
+def unescape_mysql_string(raw: str, quote: str = "'") -> str:
+    """Résout les échappements d'une chaîne MySQL (contenu entre quotes)"""
+    if '\\' not in raw and quote * 2 not in raw:
+        return raw
+    return _ESCAPE_RES[quote].sub(_unescape_match, raw)
+
+
+def _hex_bytes(digits: str) -> bytes:
+    return bytes.fromhex(digits if len(digits) % 2 == 0 else '0' + digits)
+
+
+def _binary_bytes(text: str) -> bytes:
+    try:
+        return text.encode('latin-1')
+    except UnicodeEncodeError:
+        return text.encode('utf-8', 'surrogateescape')
+
+
+def _quoted(token: str) -> str:
+    raw = token[1:-1]
+    if '\\' not in raw and token[0] * 2 not in raw:
+        return raw
+    return _ESCAPE_RES[token[0]].sub(_unescape_match, raw)
+
+
+def _number(token: str) -> Any:
+    # Formes courantes sans passer par la regex : 0xCAFE (binaires) et 850.00 (DECIMAL)
+    second = token[1:2]
+    if (second == 'x' or second == 'X') and token[0] == '0':
+        digits = token[2:]
+        if digits.isalnum():
+            try:
+                return _hex_bytes(digits)
+            except ValueError:
+                return token
+    elif '.' in token:
+        unsigned = token[1:] if token[0] in '-+' else token
+        if unsigned.replace('.', '', 1).isdecimal():
+            return Decimal(token)
+    match = _NUMBER_RE.fullmatch(token)
+    if match is None:
+        return token
+    kind = match.lastgroup
+    if kind == 'hex':
+        return _hex_bytes(match.group(kind))
+    return _NUMBER_TYPES[kind](token)
+
+
+def _keyword(token: str) -> Any:
+    if token.upper() == 'NULL':
+        return None
+    if token[1:2] == "'" and token[-1] == "'":
+        # X'CAFE'
+        return _hex_bytes(token[2:-1])
+    if token[:7].lower() == '_binary':
+        return _binary_bytes(unescape_mysql_string(token[token.index("'") + 1:-1]))
+    return token
+
+
+# Conversion selon le premier caractère du jeton
+_CONVERTERS: Dict[str, Callable[[str], Any]] = {"'": _quoted, '"': _quoted}
+_CONVERTERS.update({c: _number for c in '0123456789-+.'})
+_CONVERTERS.update({c: _keyword for c in 'NnXx_'})
+
+
+def parse_insert_header(line: str) -> Optional[Tuple[str, Optional[List[str]], int]]:
+    """
+    Analyse l'en-tête d'un INSERT
+
+    Returns:
+        (table, colonnes ou None si absentes, position du premier tuple) ou None
+    """
+    match = INSERT_HEADER_RE.match(line)
+    if not match:
+        return None
+    columns = None
+    if match.group(2) is not None:
+        columns = [c.strip().strip('`"\'') for c in match.group(2).split(',')]
+    return match.group(1), columns, match.end()
+
+
+def iter_value_tuples(text: str, pos: int = 0) -> Iterator[List[Any]]:
+    """
+    Produit chaque tuple de `VALUES (...),(...),...;` à partir de `pos`, en valeurs typées
+
+    Un tuple tronqué (fin de ligne avant ')') est ignoré.
+    """
+    converters = _CONVERTERS
+    row: List[Any] = []
+    append = row.append
+    for token in _TOKEN_RE.findall(text, pos):
+        first = token[0]
+        if first == "'":
+            # Cas le plus fréquent : chaîne sans échappement
+            raw = token[1:-1]
+            append(raw if '\\' not in raw and "''" not in raw else _quoted(token))
+        elif first == ')':
+            yield row
+            row = []
+            append = row.append
+        elif token.isdecimal():
+            append(int(token))
+        elif token == 'NULL':
+            append(None)
+        else:
+            convert = converters.get(first)
+            append(convert(token) if convert else token)
+
+
+def iter_insert_rows(line: str) -> Optional[Tuple[str, Optional[List[str]], Iterator[List[Any]]]]:
+    """
+    Découpe une ligne INSERT (simple ou étendue)
+
+    Returns:
+        (table en minuscules, colonnes ou None, itérateur de tuples typés) ou None
+        si la ligne n'est pas un INSERT
+    """
+    header = parse_insert_header(line)
+    if header is None:
+        return None
+    table, columns, pos = header
+    return table.lower(), columns, iter_value_tuples(line, pos)
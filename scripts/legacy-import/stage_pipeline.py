@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Pipeline lecture → normalisation → écriture
+Le lecteur (fetch MySQL), le normaliseur et l'écrivain (COPY PostgreSQL)
+tournent en parallèle, reliés par deux files bornées : pendant que
+PostgreSQL écrit un chunk, le suivant est lu et normalisé. Les files pleines
+bloquent l'étage amont (backpressure) : au plus 2 * depth + 3 chunks sont en
+mémoire.
+
+Les attentes de chaque étage sont mesurées : un étage qui attend beaucoup
+est nourri par un goulot situé ailleurs (lecteur bloqué en sortie : écriture
+trop lente ; écrivain bloqué en entrée : lecture ou normalisation trop lente).
+"""
+
+import queue
+import threading
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
+
+DEFAULT_DEPTH = 4
+STAGES = ('lecture', 'normalisation', 'écriture')
+
+_DONE = object()
+# Délai de scrutation de l'arrêt quand une file est pleine ou vide
+_POLL = 0.1
+
+
+class _Failure:
+    __slots__ = ('error',)
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class StagePipeline:
+    """
+    Itère sur (item, transform(item)) : source lue dans un thread, transform
+    appliquée dans un second ; le consommateur (l'écrivain) est l'appelant.
+    Une exception d'un étage est relevée chez le consommateur ; un
+    consommateur qui s'arrête en cours de route arrête les deux threads.
+    """
+
+    def __init__(self, source: Iterable[Any], transform: Callable[[Any], Any], depth: int = DEFAULT_DEPTH):
+        self._source = source
+        self._transform = transform
+        self._raw = queue.Queue(max(1, depth))
+        self._ready = queue.Queue(max(1, depth))
+        self._stop = threading.Event()
+        self.waits: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
+
+    def _put(self, q: queue.Queue, item: Any, stage: str) -> bool:
+        started = perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    q.put(item, timeout=_POLL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.waits[stage] += perf_counter() - started
+
+    def _get(self, q: queue.Queue, stage: str) -> Any:
+        started = perf_counter()
+        try:
+            while not self._stop.is_set():
+                try:
+                    return q.get(timeout=_POLL)
+                except queue.Empty:
+                    continue
+            return _DONE
+        finally:
+            self.waits[stage] += perf_counter() - started
+
+    def _read(self):
+        try:
+            for item in self._source:
+                if not self._put(self._raw, item, 'lecture'):
+                    return
+        except BaseException as e:
+            self._put(self._raw, _Failure(e), 'lecture')
+            return
+        finally:
+            # Ferme le générateur source (et son curseur) dans le thread qui l'a parcouru
+            close = getattr(self._source, 'close', None)
+            if close:
+                close()
+        self._put(self._raw, _DONE, 'lecture')
+
+    def _normalise(self):
+        while True:
+            item = self._get(self._raw, 'normalisation')
+            if item is _DONE or isinstance(item, _Failure):
+                self._put(self._ready, item, 'normalisation')
+                return
+            try:
+                out = (item, self._transform(item))
+            except BaseException as e:
+                self._put(self._ready, _Failure(e), 'normalisation')
+                return
+            if not self._put(self._ready, out, 'normalisation'):
+                return
+
+    def __iter__(self) -> Iterator[Tuple[Any, Any]]:
+        threads = [threading.Thread(target=self._read, name='akig-lecture', daemon=True),
+                   threading.Thread(target=self._normalise, name='akig-normalisation', daemon=True)]
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                item = self._get(self._ready, 'écriture')
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+
+
+def format_waits(waits: Dict[str, float]) -> str:
+    """'attente lecture 1.2s, normalisation 0.3s, écriture 4.5s'"""
+    return 'attente ' + ', '.join(f"{stage} {waits.get(stage, 0.0):.1f}s" for stage in STAGES)
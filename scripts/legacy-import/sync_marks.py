@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKIG - Repères de synchronisation incrémentale MySQL → PostgreSQL
+Une ligne par table source dans akig_sync_marks : plus grand id et plus
+grande date de modification vus au début de la dernière copie. L'exécution
+suivante ne relit que les lignes au-delà (id > repère, ou modifiées depuis :
+date >= repère), ce qui réduit le gel de l'application legacy au basculement
+à un dernier rattrapage de quelques secondes.
+
+Le repère est pris AVANT la lecture : une ligne écrite pendant la copie est
+relue au passage suivant (ON CONFLICT la rend inoffensive) plutôt que perdue.
+Les suppressions côté MySQL ne sont pas propagées.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from mysql_types import MySQLColumn
+
+SYNC_TABLE = 'akig_sync_marks'
+
+CREATE_SYNC_TABLE = f"""
+    CREATE TABLE IF NOT EXISTS {SYNC_TABLE} (
+        source_table TEXT PRIMARY KEY,
+        target_table TEXT NOT NULL,
+        key_column TEXT,
+        max_key BIGINT,
+        modified_column TEXT,
+        max_modified TIMESTAMP,
+        rows_synced BIGINT NOT NULL DEFAULT 0,
+        synced_at TIMESTAMP NOT NULL DEFAULT now()
+    )
+"""
+
+# Colonnes de date de modification reconnues quand la DDL n'a pas d'ON UPDATE
+MODIFIED_COLUMN_NAMES = ('updated_at', 'date_modif', 'modified_at', 'date_maj', 'last_update')
+
+
+@dataclass(frozen=True)
+class SyncMark:
+    """Repère d'une table : lignes déjà copiées = id <= max_key et modifiées avant max_modified"""
+    key_column: Optional[str] = None
+    max_key: Optional[int] = None
+    modified_column: Optional[str] = None
+    max_modified: Optional[datetime] = None
+
+    def describe(self) -> str:
+        parts = []
+        if self.max_key is not None:
+            parts.append(f"{self.key_column} > {self.max_key}")
+        if self.max_modified is not None:
+            parts.append(f"{self.modified_column} >= {self.max_modified}")
+        return ' ou '.join(parts) or 'aucun'
+
+    def mysql_filter(self) -> Optional[Tuple[str, Tuple]]:
+        """Condition MySQL des lignes nouvelles ou modifiées depuis le repère, avec ses paramètres"""
+        conditions, params = [], []
+        if self.max_key is not None:
+            conditions.append(f"`{self.key_column}` > %s")
+            params.append(self.max_key)
+        if self.max_modified is not None:
+            conditions.append(f"`{self.modified_column}` >= %s")
+            params.append(self.max_modified)
+        if not conditions:
+            return None
+        return '(' + ' OR '.join(conditions) + ')', tuple(params)
+
+
+def modified_column(columns: Dict[str, MySQLColumn], explicit: Optional[str] = None) -> Optional[str]:
+    """Colonne de date de modification : explicite, ON UPDATE CURRENT_TIMESTAMP, puis nom connu"""
+    if explicit:
+        return columns[explicit.lower()].name if explicit.lower() in columns else None
+    dated = [c for c in columns.values() if c.type in ('datetime', 'timestamp')]
+    for column in dated:
+        if column.on_update:
+            return column.name
+    for column in dated:
+        if column.name.lower() in MODIFIED_COLUMN_NAMES:
+            return column.name
+    return None
+
+
+def ensure_sync_table(conn):
+    cursor = conn.cursor()
+    cursor.execute(CREATE_SYNC_TABLE)
+    cursor.close()
+    conn.commit()
+
+
+def load_mark(conn, source_table: str) -> Optional[SyncMark]:
+    """Repère enregistré pour une table source, None avant la première copie"""
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT key_column, max_key, modified_column, max_modified FROM {SYNC_TABLE} "
+        f"WHERE source_table = %s", (source_table,)
+    )
+    row = cursor.fetchone()
+    cursor.close()
+    return SyncMark(*row) if row else None
+
+
+def save_mark(conn, source_table: str, target_table: str, mark: SyncMark, rows: int):
+    """Enregistre le repère d'une copie terminée (rows : lignes lues par cette copie)"""
+    cursor = conn.cursor()
+    cursor.execute(
+        f"""
+        INSERT INTO {SYNC_TABLE} (source_table, target_table, key_column, max_key,
+                                  modified_column, max_modified, rows_synced, synced_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, now())
+        ON CONFLICT (source_table) DO UPDATE SET
+            target_table = EXCLUDED.target_table,
+            key_column = EXCLUDED.key_column,
+            max_key = COALESCE(EXCLUDED.max_key, {SYNC_TABLE}.max_key),
+            modified_column = EXCLUDED.modified_column,
+            max_modified = COALESCE(EXCLUDED.max_modified, {SYNC_TABLE}.max_modified),
+            rows_synced = {SYNC_TABLE}.rows_synced + EXCLUDED.rows_synced,
+            synced_at = now()
+        """,
+        (source_table, target_table, mark.key_column, mark.max_key,
+         mark.modified_column, mark.max_modified, rows),
+    )
+    cursor.close()
+    conn.commit()
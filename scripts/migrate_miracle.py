@@ -6,19 +6,24 @@ Migration "miracle" : MySQL historique -> PostgreSQL audit_logs
 
 Fonctions clés :
   - Démarrage automatique de MySQL (service ou mode console) si inactif
-  - Import streaming sans fichier intermédiaire
-  - Normalisation des dates invalides (0000-00-00*) => NULL
-  - Insertion per-row avec ON CONFLICT DO NOTHING (résilience)
+  - Migration par migration_engine.py : streaming sans fichier intermédiaire,
+    dates invalides => NULL, COPY par chunk commité avec ON CONFLICT DO NOTHING,
+    lignes fautives isolées dans un fichier de rejets
   - Application finale des contraintes et index
+  - MIGRATE_TABLES=all : toutes les tables du schéma en une exécution
+  - MIGRATE_WORKERS=N : N lecteurs parallèles par plages d'id
+  - MIGRATE_INCREMENTAL=1 : repère par table, les relances ne copient que le nouveau
 
 Personnalisation minimale : remplacer MYSQL_PASSWORD ci-dessous.
 """
 
 import os
 import time
+import argparse
 import subprocess
 import mysql.connector
-import psycopg2
+
+from migration_engine import add_arguments, run_from_args
 
 # ========== SEULE LIGNE À MODIFIER ==========
 # Password priority: environment MYSQL_PASSWORD > hardcoded value below.
@@ -40,10 +45,8 @@ PG_CONFIG = {
     'host': 'localhost'
 }
 
-ZERO_DATE_MARKERS = ('0000-00-00', '0000-00-00 00:00:00', '0000-00-00T00:00:00')
-TABLE_COLUMNS = [
-    'id', 'locataire_id', 'local_id', 'prop', 'date', 'objet', 'envoi', 'detail', 'loyer_id'
-]
+# historique par défaut ; 'all' pour toutes les tables du schéma
+MIGRATE_TABLES = os.environ.get('MIGRATE_TABLES', 'historique')
 
 
 def mysql_ready() -> bool:
@@ -90,41 +93,6 @@ def start_mysql_if_needed() -> bool:
     return False
 
 
-def normalize_value(v):
-    if isinstance(v, str) and any(v.startswith(z) for z in ZERO_DATE_MARKERS):
-        return None
-    return v
-
-
-def apply_constraints(pg_cursor, pg_conn):
-    print("🔒 Application contraintes...")
-    # PK audit_logs si manquante
-    pg_cursor.execute(
-        """
-        DO $$ BEGIN
-            IF NOT EXISTS (
-                SELECT 1 FROM pg_constraint
-                WHERE conrelid = 'audit_logs'::regclass AND contype = 'p'
-            ) THEN
-                ALTER TABLE audit_logs ADD PRIMARY KEY (id);
-            END IF;
-        END $$;
-        """
-    )
-    pg_cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_locataire ON audit_logs(locataire_id);")
-    pg_cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_date ON audit_logs(date);")
-    # Autres tables (idempotent):
-    try:
-        pg_cursor.execute("ALTER TABLE disbursements ADD PRIMARY KEY (id);")
-    except Exception:
-        pg_conn.rollback()
-    try:
-        pg_cursor.execute("ALTER TABLE inventory_reports ADD PRIMARY KEY (id);")
-    except Exception:
-        pg_conn.rollback()
-    pg_conn.commit()
-
-
 def migrate() -> bool:
     if MYSQL_PASSWORD == 'VOTRE_MDP_MYSQL_ICI':
         print("❌ ERREUR: Mot de passe MySQL absent. Définissez la variable d'environnement MYSQL_PASSWORD ou modifiez _HARDCODED_PASSWORD.")
@@ -137,102 +105,23 @@ def migrate() -> bool:
         print("❌ Impossible de démarrer ou atteindre MySQL.")
         return False
 
-    print("🔗 Connexion MySQL...")
-    try:
-        mysql_conn = mysql.connector.connect(**MYSQL_CONFIG)
-    except Exception as e:
-        print(f"❌ Connexion MySQL échouée: {e}")
-        return False
-    mysql_cursor = mysql_conn.cursor(dictionary=True)
-
-    try:
-        mysql_cursor.execute("SELECT COUNT(*) AS total FROM historique")
-        total = mysql_cursor.fetchone()['total']
-    except Exception as e:
-        print(f"❌ Impossible de compter les lignes historique: {e}")
-        mysql_cursor.close(); mysql_conn.close()
-        return False
-    print(f"📊 {total:,} lignes à migrer")
-
-    print("🔗 Connexion PostgreSQL...")
-    try:
-        pg_conn = psycopg2.connect(**PG_CONFIG)
-    except Exception as e:
-        print(f"❌ Connexion PostgreSQL échouée: {e}")
-        mysql_cursor.close(); mysql_conn.close()
-        return False
-    pg_cursor = pg_conn.cursor()
-
-    # Relax constraints
-    try:
-        pg_cursor.execute("SET session_replication_role = replica;")
-        pg_conn.commit()
-        relaxed = True
-        print("⚙️ Contraintes désactivées pour vitesse.")
-    except Exception:
-        pg_conn.rollback()
-        relaxed = False
-        print("ℹ️ Contraintes non désactivées (permissions ou version).")
-
-    batch_size = 5000
-    inserted = 0
-    processed = 0
-
-    # Préparer SELECT streaming
-    try:
-        mysql_cursor.execute("SELECT * FROM historique")
-    except Exception as e:
-        print(f"❌ SELECT historique échoué: {e}")
-        pg_cursor.close(); pg_conn.close(); mysql_cursor.close(); mysql_conn.close()
-        return False
-
-    insert_sql = (
-        "INSERT INTO audit_logs (" + ", ".join(TABLE_COLUMNS) + ") VALUES (" + ", ".join(['%s'] * len(TABLE_COLUMNS)) + ") ON CONFLICT DO NOTHING"
-    )
-
-    while True:
-        rows = mysql_cursor.fetchmany(batch_size)
-        if not rows:
-            break
-        for row in rows:
-            # Normaliser selon TABLE_COLUMNS (assure l'ordre)
-            norm_values = [normalize_value(row.get(col)) for col in TABLE_COLUMNS]
-            try:
-                pg_cursor.execute(insert_sql, norm_values)
-                inserted += pg_cursor.rowcount
-            except Exception:
-                pg_conn.rollback()
-                # Ignore la ligne fautive
-                continue
-        pg_conn.commit()
-        processed += len(rows)
-        print(f"  ⏳ {processed:,}/{total:,} traitées | {inserted:,} insérées")
-
-    # Restaure contraintes
-    if relaxed:
-        try:
-            pg_cursor.execute("SET session_replication_role = DEFAULT;")
-            pg_conn.commit()
-            print("🔄 Contraintes réactivées.")
-        except Exception:
-            pg_conn.rollback()
-            print("⚠️ Échec réactivation contraintes.")
-
-    apply_constraints(pg_cursor, pg_conn)
-
-    # Rapport final
-    try:
-        pg_cursor.execute("SELECT COUNT(*) FROM audit_logs;")
-        final = pg_cursor.fetchone()[0]
-    except Exception as e:
-        print(f"⚠️ Impossible de lire le compte final: {e}")
-        final = inserted
-
-    print("\n🎉 MIRACLE TERMINÉ !")
-    print(f"➡️  {final:,} lignes dans audit_logs")
-
-    pg_cursor.close(); pg_conn.close(); mysql_cursor.close(); mysql_conn.close()
-    return True
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    args = parser.parse_args([])
+    args.mysql_host, args.mysql_user = MYSQL_CONFIG['host'], MYSQL_CONFIG['user']
+    args.mysql_password, args.mysql_db = MYSQL_CONFIG['password'], MYSQL_CONFIG['database']
+    args.database_url = ' '.join(f"{key}={value}" for key, value in PG_CONFIG.items())
+    # Contraintes désactivées pour vitesse (si les permissions le permettent)
+    args.relax_constraints = True
+    # Lecteurs parallèles par plages d'id (env MIGRATE_WORKERS, défaut 1)
+    args.workers = int(os.environ.get('MIGRATE_WORKERS', '1'))
+    # Rattrapage incrémental depuis le dernier repère (env MIGRATE_INCREMENTAL=1)
+    args.incremental = os.environ.get('MIGRATE_INCREMENTAL', '0') == '1'
+    if MIGRATE_TABLES == 'all':
+        args.all_tables = True
+    else:
+        args.tables = MIGRATE_TABLES
+    return run_from_args(args) == 0
 
 
 if __name__ == '__main__':
@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+AKIG - Vérification MySQL → PostgreSQL par sommes de contrôle de plages d'id
+
+Au lieu de comparer seulement COUNT(*), chaque table est découpée en plages
+d'id ; pour chaque plage, les deux serveurs calculent (nombre de lignes,
+somme des md5 des lignes normalisées). Seules les plages qui diffèrent sont
+redécoupées (FANOUT sous-plages), récursivement, jusqu'à des feuilles de
+--leaf-size id dont les lignes sont relues et comparées une à une : le
+rapport donne les id exacts manquants, en trop ou différents (avec les
+colonnes en cause).
+
+Normalisation (identique des deux côtés) : texte de chaque valeur dans la
+forme du type PostgreSQL cible (dates 'YYYY-MM-DD HH:MM:SS', booléens 1/0,
+binaires en hexadécimal), dates zéro et libellés d'enum vides à NULL comme
+à la migration. Une forme qui divergerait quand même entre les serveurs ne
+fausse pas le résultat : la comparaison ligne à ligne des feuilles se fait
+en Python, avec les conversions de la migration.
+
+Les plages de premier niveau sont réparties entre --workers threads, chacun
+avec ses propres connexions MySQL et PostgreSQL.
+
+Usage:
+    python scripts/migration_verify.py --mysql-password ... [--tables historique,versement | --all-tables]
+
+Requirements:
+    pip install mysql-connector-python psycopg2-binary
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import mysql.connector
+import psycopg2
+
+from migration_engine import (RANGES_PER_WORKER, KeyRange, TableSpec, add_connection_arguments, connectors,
+                              default_spec, select_tables, source_columns, split_key_range, table_converters)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'legacy-import'))
+from bulk_loader import quote_ident
+from mysql_types import MySQLColumn
+from row_projector import RowProjector
+
+# Sous-plages par plage divergente
+FANOUT = 16
+DEFAULT_LEAF_SIZE = 1000
+# Id en écart affichés par table (le fichier de rapport les contient tous)
+SHOWN_DIFFS = 10
+
+_DATE_TYPES = ('date', 'datetime', 'timestamp')
+_SEP, _NULL = 31, 30
+_DATETIME_TEXT_RE = re.compile(r'(\d{4}-\d\d-\d\d)[ T](\d\d:\d\d:\d\d)(?:\.\d+)?$')
+
+
+# ==============================================================================
+# NORMALISATION
+# ==============================================================================
+def _column_exprs(source: MySQLColumn, pg_type: str) -> Tuple[str, str]:
+    """(expression MySQL, expression PostgreSQL) du texte normalisé d'une colonne"""
+    my = f"`{source.name}`"
+    if source.type in _DATE_TYPES:
+        # Dates zéro (0000-00-00, 2021-00-00) : NULL à la migration
+        my = f"IF(YEAR({my}) = 0 OR MONTH({my}) = 0 OR DAYOFMONTH({my}) = 0, NULL, {my})"
+    elif source.type in ('enum', 'set'):
+        my = f"NULLIF({my}, '')"
+
+    if pg_type == 'boolean':
+        return f"IF({my} IS NULL, NULL, IF({my} <> 0, '1', '0'))", "CASE WHEN {c} THEN '1' WHEN NOT {c} THEN '0' END"
+    if pg_type.startswith('timestamp'):
+        return f"DATE_FORMAT({my}, '%Y-%m-%d %H:%i:%s')", "to_char({c}, 'YYYY-MM-DD HH24:MI:SS')"
+    if pg_type == 'date':
+        return f"DATE_FORMAT({my}, '%Y-%m-%d')", "to_char({c}, 'YYYY-MM-DD')"
+    if pg_type == 'bytea':
+        return f"LOWER(HEX({my}))", "encode({c}, 'hex')"
+    return f"CAST({my} AS CHAR)", "{c}::text"
+
+
+def canonical(value: Any) -> Optional[str]:
+    """Forme texte d'une valeur Python, commune aux deux côtés (comparaison des feuilles)"""
+    if value is None:
+        return None
+    if value.__class__ is bool:
+        return '1' if value else '0'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (Decimal, float)):
+        number = Decimal(repr(value)) if isinstance(value, float) else value
+        return format(number.normalize(), 'f') if number.is_finite() else str(number)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, str):
+        # Date restée en texte côté MySQL ('2020-01-02 03:04:05'), fractions ignorées
+        match = _DATETIME_TEXT_RE.match(value)
+        return f"{match.group(1)} {match.group(2)}" if match else value
+    return str(value)
+
+
+# ==============================================================================
+# PLAN DE VÉRIFICATION
+# ==============================================================================
+@dataclass
+class VerifyPlan:
+    """Colonnes comparées d'une table et requêtes de hachage des deux côtés"""
+    spec: TableSpec
+    mapping: Dict[str, str]
+    converters: Dict[str, Callable[[Any], Any]]
+    source_key: str
+    target_key: str
+    my_hash_sql: str
+    pg_hash_sql: str
+
+    def projector(self) -> RowProjector:
+        return RowProjector(list(self.mapping), self.mapping, converters=self.converters)
+
+    def hash_queries(self, key_range: KeyRange) -> Tuple[str, str]:
+        """
+        Requêtes de hachage d'une plage, côté MySQL puis côté PostgreSQL
+
+        Bornes en entiers littéraux, sans paramètre : les formats DATE_FORMAT
+        ('%Y', '%s'...) passent tels quels, mysql-connector ne cherchant des
+        %s à remplacer que lorsqu'on lui donne des paramètres.
+        """
+        low, high = int(key_range[0]), int(key_range[1])
+        my_key, pg_key = f"`{self.source_key}`", quote_ident(self.target_key)
+        return (self.my_hash_sql.format(where=f"{my_key} >= {low} AND {my_key} < {high}"),
+                self.pg_hash_sql.format(where=f"{pg_key} >= {low} AND {pg_key} < {high}"))
+
+
+@dataclass
+class VerifyResult:
+    """Écarts d'une table"""
+    source: str
+    target: str
+    source_rows: int = 0
+    target_rows: int = 0
+    ranges: int = 0
+    leaves: int = 0
+    missing: List[Any] = field(default_factory=list)
+    extra: List[Any] = field(default_factory=list)
+    different: List[Tuple[Any, List[str]]] = field(default_factory=list)
+    null_keys: Tuple[int, int] = (0, 0)
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def identical(self) -> bool:
+        return (not self.error and not self.missing and not self.extra and not self.different
+                and self.null_keys[0] == self.null_keys[1])
+
+
+def _target_types(pg_conn, table: str) -> Dict[str, str]:
+    cur = pg_conn.cursor()
+    cur.execute(
+        "SELECT column_name, data_type FROM information_schema.columns "
+        "WHERE table_schema = 'public' AND table_name = %s ORDER BY ordinal_position", (table,)
+    )
+    types = dict(cur.fetchall())
+    cur.close()
+    return types
+
+
+def build_plan(my_conn, pg_conn, spec: TableSpec) -> VerifyPlan:
+    columns = source_columns(my_conn, spec.source)
+    target_types = _target_types(pg_conn, spec.target)
+    if not target_types:
+        raise ValueError(f"table cible absente: {spec.target}")
+    wanted = spec.columns or [col.name for col in columns.values()]
+    mapping = {col: spec.rename.get(col, col) for col in wanted
+               if col.lower() in columns and spec.rename.get(col, col) in target_types}
+    source_key = next((src for src, dst in mapping.items() if dst == spec.key), None)
+    if source_key is None:
+        raise ValueError(f"clé {spec.key} absente de {spec.source} ou de {spec.target}")
+
+    my_exprs, pg_exprs = [], []
+    for src, dst in mapping.items():
+        my_expr, pg_expr = _column_exprs(columns[src.lower()], target_types[dst])
+        # Tout en utf8mb4 : md5 des mêmes octets que PostgreSQL (UTF8), quel que soit le charset source
+        my_exprs.append(f"COALESCE(CONVERT({my_expr} USING utf8mb4), CHAR({_NULL} USING utf8mb4))")
+        pg_exprs.append(f"COALESCE({pg_expr.format(c=quote_ident(dst))}, chr({_NULL}))")
+    # 60 premiers bits du md5 de chaque ligne, sommés (ordre indifférent, doublons comptés)
+    my_row = f"CONCAT_WS(CHAR({_SEP} USING utf8mb4), {', '.join(my_exprs)})"
+    pg_row = f"concat_ws(chr({_SEP}), {', '.join(pg_exprs)})"
+    my_hash = (f"SELECT COUNT(*), COALESCE(SUM(CAST(CONV(SUBSTRING(MD5({my_row}), 1, 15), 16, 10) AS UNSIGNED)), 0) "
+               f"FROM `{spec.source}` WHERE {{where}}")
+    pg_hash = (f"SELECT count(*), COALESCE(sum(('x' || substr(md5({pg_row}), 1, 15))::bit(60)::bigint), 0) "
+               f"FROM {quote_ident(spec.target)} WHERE {{where}}")
+    return VerifyPlan(spec, mapping, table_converters(spec, columns), source_key, spec.key, my_hash, pg_hash)
+
+
+# ==============================================================================
+# COMPARAISON
+# ==============================================================================
+class RangeChecker:
+    """Compare des plages d'id sur une paire de connexions (une par thread)"""
+
+    def __init__(self, plan: VerifyPlan, my_conn, pg_conn, leaf_size: int):
+        self.plan = plan
+        self.my_conn = my_conn
+        self.pg_conn = pg_conn
+        self.leaf_size = leaf_size
+        self.my_key = f"`{plan.source_key}`"
+        self.pg_key = quote_ident(plan.target_key)
+
+    def _hash(self, key_range: KeyRange) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """(lignes, somme des hachages) de la plage, côté MySQL puis côté PostgreSQL"""
+        results = []
+        for conn, sql in zip((self.my_conn, self.pg_conn), self.plan.hash_queries(key_range)):
+            cur = conn.cursor()
+            cur.execute(sql)
+            count, total = cur.fetchone()
+            cur.close()
+            results.append((int(count), int(total)))
+        self.pg_conn.rollback()
+        return results[0], results[1]
+
+    def _null_counts(self) -> Tuple[int, int]:
+        """Lignes à clé NULL des deux côtés (comptées, pas comparées)"""
+        counts = []
+        for conn, table, key in ((self.my_conn, f"`{self.plan.spec.source}`", self.my_key),
+                                 (self.pg_conn, quote_ident(self.plan.spec.target), self.pg_key)):
+            cur = conn.cursor()
+            cur.execute(f"SELECT COUNT(*) FROM {table} WHERE {key} IS NULL")
+            counts.append(int(cur.fetchone()[0]))
+            cur.close()
+        self.pg_conn.rollback()
+        return counts[0], counts[1]
+
+    def check(self, key_range: KeyRange, result: VerifyResult, top: bool = True):
+        """Compare une plage ; redécoupe si elle diverge, compare les lignes aux feuilles"""
+        if key_range[0] is None:
+            result.null_keys = self._null_counts()
+            result.source_rows += result.null_keys[0]
+            result.target_rows += result.null_keys[1]
+            return
+        source, target = self._hash(key_range)
+        result.ranges += 1
+        if top:
+            result.source_rows += source[0]
+            result.target_rows += target[0]
+        if source == target:
+            return
+        low, high = key_range
+        if high - low <= self.leaf_size:
+            self._diff_rows(key_range, result)
+            return
+        for sub_range in split_key_range(low, high - 1, FANOUT):
+            self.check(sub_range, result, top=False)
+
+    def _diff_rows(self, key_range: KeyRange, result: VerifyResult):
+        plan = self.plan
+        result.leaves += 1
+        projector = plan.projector()
+        key_index = projector.target_columns.index(plan.target_key)
+
+        cur = self.my_conn.cursor()
+        cur.execute(f"SELECT {', '.join(f'`{c}`' for c in plan.mapping)} FROM `{plan.spec.source}` "
+                    f"WHERE {self.my_key} >= %s AND {self.my_key} < %s", key_range)
+        source_rows = {row[key_index]: tuple(canonical(v) for v in row)
+                       for row in projector.project_rows(cur.fetchall())}
+        cur.close()
+
+        cur = self.pg_conn.cursor()
+        cur.execute(f"SELECT {', '.join(quote_ident(c) for c in projector.target_columns)} "
+                    f"FROM {quote_ident(plan.spec.target)} WHERE {self.pg_key} >= %s AND {self.pg_key} < %s",
+                    key_range)
+        target_rows = {row[key_index]: tuple(canonical(v) for v in row) for row in cur.fetchall()}
+        cur.close()
+        self.pg_conn.rollback()
+
+        for key, values in source_rows.items():
+            other = target_rows.get(key)
+            if other is None:
+                result.missing.append(key)
+            elif other != values:
+                columns = [col for col, a, b in zip(projector.target_columns, values, other) if a != b]
+                result.different.append((key, columns))
+        result.extra.extend(key for key in target_rows if key not in source_rows)
+
+
+def _key_bounds(my_conn, pg_conn, plan: VerifyPlan) -> Optional[Tuple[int, int]]:
+    """Bornes communes des id des deux côtés, None si aucune ligne"""
+    bounds = []
+    for conn, sql in ((my_conn, f"SELECT MIN(`{plan.source_key}`), MAX(`{plan.source_key}`) FROM `{plan.spec.source}`"),
+                      (pg_conn, f"SELECT min({quote_ident(plan.target_key)}), max({quote_ident(plan.target_key)}) "
+                                f"FROM {quote_ident(plan.spec.target)}")):
+        cur = conn.cursor()
+        cur.execute(sql)
+        low, high = cur.fetchone()
+        cur.close()
+        if low is not None:
+            if not isinstance(low, int) or not isinstance(high, int):
+                raise ValueError(f"clé {plan.source_key} non entière : vérification par plages impossible")
+            bounds.append((low, high))
+    pg_conn.rollback()
+    if not bounds:
+        return None
+    return min(b[0] for b in bounds), max(b[1] for b in bounds)
+
+
+class MigrationVerifier:
+    """Vérifie des tables migrées, plages de premier niveau réparties entre threads"""
+
+    def __init__(self, mysql_connect: Callable[[], Any], pg_connect: Callable[[], Any],
+                 workers: int = 4, leaf_size: int = DEFAULT_LEAF_SIZE, report_file: Optional[str] = None):
+        self.mysql_connect = mysql_connect
+        self.pg_connect = pg_connect
+        self.workers = max(1, workers)
+        self.leaf_size = max(1, leaf_size)
+        self.report_file = report_file
+        self.results: List[VerifyResult] = []
+
+    def _check_ranges(self, plan: VerifyPlan, ranges: List[KeyRange]) -> VerifyResult:
+        """Job d'un thread : ses propres connexions, un résultat partiel"""
+        part = VerifyResult(plan.spec.source, plan.spec.target)
+        my_conn, pg_conn = self.mysql_connect(), self.pg_connect()
+        try:
+            checker = RangeChecker(plan, my_conn, pg_conn, self.leaf_size)
+            for key_range in ranges:
+                checker.check(key_range, part)
+        finally:
+            pg_conn.close()
+            my_conn.close()
+        return part
+
+    def verify_table(self, spec: TableSpec) -> VerifyResult:
+        result = VerifyResult(spec.source, spec.target)
+        started = time.perf_counter()
+        print(f"\n🔎 {spec.source} ↔ {spec.target}")
+        try:
+            self._verify_table(spec, result)
+        except Exception as e:
+            result.error = str(e).strip()
+            print(f"  ❌ {spec.source}: {result.error}")
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def _verify_table(self, spec: TableSpec, result: VerifyResult):
+        my_conn, pg_conn = self.mysql_connect(), self.pg_connect()
+        try:
+            plan = build_plan(my_conn, pg_conn, spec)
+            bounds = _key_bounds(my_conn, pg_conn, plan)
+        finally:
+            pg_conn.close()
+            my_conn.close()
+
+        ranges: List[KeyRange] = [(None, None)]
+        if bounds is not None:
+            ranges += split_key_range(bounds[0], bounds[1], self.workers * RANGES_PER_WORKER)
+        # Une part par worker, plages entrelacées pour équilibrer les zones denses
+        shares = [ranges[i::self.workers] for i in range(self.workers)]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self._check_ranges, plan, share) for share in shares if share]
+            for future in as_completed(futures):
+                part = future.result()
+                result.source_rows += part.source_rows
+                result.target_rows += part.target_rows
+                result.ranges += part.ranges
+                result.leaves += part.leaves
+                result.missing += part.missing
+                result.extra += part.extra
+                result.different += part.different
+                if part.null_keys != (0, 0):
+                    result.null_keys = part.null_keys
+        self._print_table(result)
+
+    @staticmethod
+    def _print_table(result: VerifyResult):
+        status = '✅ identiques' if result.identical else '⚠️ écarts'
+        print(f"  {status} : {result.source_rows:,} lignes MySQL, {result.target_rows:,} PostgreSQL | "
+              f"{result.ranges:,} plages, {result.leaves:,} feuilles relues")
+        for label, keys in (('manquants', result.missing), ('en trop', result.extra)):
+            if keys:
+                shown = ', '.join(str(k) for k in sorted(keys, key=str)[:SHOWN_DIFFS])
+                print(f"   • {len(keys):,} id {label}: {shown}{' ...' if len(keys) > SHOWN_DIFFS else ''}")
+        if result.different:
+            shown = ', '.join(f"{k} ({'/'.join(cols)})" for k, cols in sorted(result.different, key=str)[:SHOWN_DIFFS])
+            print(f"   • {len(result.different):,} id différents: {shown}"
+                  f"{' ...' if len(result.different) > SHOWN_DIFFS else ''}")
+        if result.null_keys[0] != result.null_keys[1]:
+            print(f"   • lignes à clé NULL: {result.null_keys[0]:,} MySQL, {result.null_keys[1]:,} PostgreSQL")
+
+    def run(self, specs: Sequence[TableSpec]) -> List[VerifyResult]:
+        for spec in specs:
+            self.results.append(self.verify_table(spec))
+        if self.report_file:
+            self.write_report()
+        return self.results
+
+    def write_report(self):
+        """Un objet JSON par id en écart"""
+        with open(self.report_file, 'w', encoding='utf-8') as f:
+            for r in self.results:
+                for status, keys in (('missing', r.missing), ('extra', r.extra)):
+                    for key in keys:
+                        f.write(json.dumps({'table': r.source, 'target': r.target, 'id': key,
+                                            'status': status}, ensure_ascii=False) + '\n')
+                for key, columns in r.different:
+                    f.write(json.dumps({'table': r.source, 'target': r.target, 'id': key,
+                                        'status': 'different', 'columns': columns}, ensure_ascii=False) + '\n')
+        print(f"\n📝 Rapport: {self.report_file}")
+
+    def print_summary(self):
+        print("\n" + "=" * 60)
+        print("📊 RÉSUMÉ VÉRIFICATION")
+        print("=" * 60)
+        for r in self.results:
+            if r.error:
+                detail = f"❌ {r.error}"
+            elif r.identical:
+                detail = "✅ identiques"
+            else:
+                detail = (f"⚠️ {len(r.missing):,} manquants, {len(r.extra):,} en trop, "
+                          f"{len(r.different):,} différents")
+            print(f"  • {r.source} ↔ {r.target}: {detail} ({r.seconds:.1f}s)")
+
+
+# ==============================================================================
+# CLI
+# ==============================================================================
+def main(argv: Optional[Sequence[str]] = None, default_tables: Sequence[str] = ('historique',)) -> int:
+    parser = argparse.ArgumentParser(description="Vérification MySQL → PostgreSQL par plages d'id")
+    add_connection_arguments(parser)
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Threads de vérification, une connexion MySQL et PostgreSQL chacun (défaut: 4)")
+    parser.add_argument("--leaf-size", type=int, default=DEFAULT_LEAF_SIZE,
+                        help=f"Taille des plages comparées ligne à ligne (défaut: {DEFAULT_LEAF_SIZE})")
+    parser.add_argument("--report", default='migration.verify.jsonl',
+                        help="Fichier des id en écart (défaut: migration.verify.jsonl)")
+    args = parser.parse_args(argv)
+    if not args.mysql_password:
+        print("❌ Mot de passe MySQL manquant (--mysql-password ou MYSQL_PASSWORD).")
+        return 2
+
+    mysql_connect, pg_connect = connectors(args)
+    verifier = MigrationVerifier(mysql_connect, pg_connect, workers=args.workers,
+                                 leaf_size=args.leaf_size, report_file=args.report)
+    print(f"\n🔎 Vérification MySQL {args.mysql_db} ↔ PostgreSQL")
+    print("=" * 60)
+    try:
+        tables = select_tables(args, mysql_connect, default_tables)
+        print(f"📋 {len(tables)} table(s): {', '.join(tables)}")
+        results = verifier.run([default_spec(t) for t in tables])
+    except (mysql.connector.Error, psycopg2.Error) as e:
+        print(f"❌ Connexion ou requête échouée: {e}")
+        return 2
+    verifier.print_summary()
+    return 0 if all(r.identical for r in results) else 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("Interrompu.")
+        sys.exit(130)
@@ -0,0 +1,12 @@
+# tests/scripts/conftest.py
+"""
+Shared setup for the migration script tests
+Puts scripts/ and scripts/legacy-import/ on sys.path, as the scripts themselves do
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for path in (os.path.join(ROOT, 'scripts'), os.path.join(ROOT, 'scripts', 'legacy-import')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
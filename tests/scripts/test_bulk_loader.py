@@ -0,0 +1,93 @@
+# tests/scripts/test_bulk_loader.py
+"""
+Tests for the COPY loader and its SAVEPOINT bisection (scripts/legacy-import/bulk_loader.py)
+"""
+import json
+from datetime import date
+
+import pytest
+
+from bulk_loader import RejectWriter, build_copy_buffer, load_rows
+
+
+class FakeCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+
+def failing_load(bad_ids, attempts=None):
+    """load_fn stub: a chunk fails if it holds a bad row, as one COPY would"""
+    def load(cursor, table, columns, rows):
+        if attempts is not None:
+            attempts.append(len(rows))
+        bad = [row for row in rows if row[0] in bad_ids]
+        if bad:
+            raise ValueError(f"ligne {bad[0][0]} invalide")
+        return len(rows)
+    return load
+
+
+class TestBisection:
+    @pytest.mark.parametrize('bad_ids', [
+        set(),
+        {0},
+        {99},
+        {13},
+        {13, 14},
+        {0, 50, 99},
+        set(range(0, 100, 7)),
+    ])
+    def test_returns_exactly_the_bad_rows(self, bad_ids):
+        rows = [(i, f"r{i}") for i in range(100)]
+        inserted, failures = load_rows(FakeCursor(), 't', ['id', 'v'], rows, load_fn=failing_load(bad_ids))
+
+        assert inserted == 100 - len(bad_ids)
+        assert [row for row, _ in failures] == [row for row in rows if row[0] in bad_ids]
+        for row, error in failures:
+            assert str(error) == f"ligne {row[0]} invalide"
+
+    def test_every_row_rejected(self):
+        rows = [(i,) for i in range(5)]
+        inserted, failures = load_rows(FakeCursor(), 't', ['id'], rows, load_fn=failing_load(set(range(5))))
+        assert inserted == 0
+        assert [row for row, _ in failures] == rows
+
+    def test_each_attempt_is_under_its_own_savepoint(self):
+        cursor = FakeCursor()
+        load_rows(cursor, 't', ['id'], [(i,) for i in range(8)], load_fn=failing_load({3}))
+
+        opened = cursor.statements.count("SAVEPOINT sp_bulk")
+        released = cursor.statements.count("RELEASE SAVEPOINT sp_bulk")
+        rolled_back = cursor.statements.count("ROLLBACK TO SAVEPOINT sp_bulk")
+        assert opened == released + rolled_back
+        # 8 → 4 → 2 → 1: one failed attempt per level
+        assert rolled_back == 4
+
+    def test_one_bad_row_costs_log_n_attempts(self):
+        attempts = []
+        load_rows(FakeCursor(), 't', ['id'], [(i,) for i in range(1024)], load_fn=failing_load({700}, attempts))
+        assert len(attempts) == 1 + 2 * 10
+
+    def test_empty_batch(self):
+        cursor = FakeCursor()
+        assert load_rows(cursor, 't', ['id'], [], load_fn=failing_load(set())) == (0, [])
+        assert cursor.statements == []
+
+
+class TestCopyFormat:
+    def test_escapes_and_nulls(self):
+        rows = [(1, None, 'a\tb\nc\\d', True, b'\x01\xff', date(2024, 1, 2))]
+        assert build_copy_buffer(rows).getvalue() == '1\t\\N\ta\\tb\\nc\\\\d\tt\t\\\\x01ff\t2024-01-02\n'
+
+
+def test_reject_writer(tmp_path):
+    writer = RejectWriter(tmp_path / 'rejects.jsonl')
+    writer.write('tenants', ['id', 'nom'], (7, 'x'), ValueError('trop long '))
+    writer.close()
+
+    entry = json.loads((tmp_path / 'rejects.jsonl').read_text(encoding='utf-8'))
+    assert entry == {'table': 'tenants', 'error': 'trop long', 'pgcode': None, 'row': {'id': 7, 'nom': 'x'}}
+    assert writer.count == 1
@@ -0,0 +1,57 @@
+# tests/scripts/test_csv_profile.py
+"""
+Tests for the streaming CSV profiler (scripts/legacy-import/csv_profile.py)
+"""
+import pytest
+
+from csv_profile import ColumnProfile, profile_csv
+
+
+def column_type(values):
+    column = ColumnProfile('x')
+    for value in values:
+        column.add(value)
+    return column.type
+
+
+class TestTypeInference:
+    """A column only widens, and a narrower value of the same family keeps it"""
+
+    @pytest.mark.parametrize('values', [
+        ['1.5', '3', '2.25'],
+        ['3', '1.5', '4'],
+        ['850,00', '900', '12,5'],
+    ])
+    def test_mixed_integers_and_decimals_are_decimal(self, values):
+        assert column_type(values) == 'decimal'
+
+    @pytest.mark.parametrize('values', [
+        ['2024-01-01 10:00', '2024-01-02'],
+        ['2024-01-02', '2024-01-01 10:00:00', '01/02/2024'],
+    ])
+    def test_mixed_dates_and_datetimes_are_datetime(self, values):
+        assert column_type(values) == 'datetime'
+
+    def test_nulls_do_not_change_the_type(self):
+        assert column_type(['', 'NULL', '12', '\\N', '0000-00-00']) == 'integer'
+
+    @pytest.mark.parametrize('values', [
+        ['1', '2024-01-01'],
+        ['1.5', 'abc', '2'],
+        ['2024-01-01', '3.5'],
+    ])
+    def test_unrelated_values_fall_back_to_text(self, values):
+        assert column_type(values) == 'text'
+
+
+def test_profile_csv_reports_decimal_money_column(tmp_path):
+    path = tmp_path / 'loyers.csv'
+    path.write_text('id;montant;date\n1;1.5;2024-01-01 10:00\n2;3;2024-01-02\n3;4.25;\n', encoding='utf-8')
+    profile = profile_csv(path)
+    stats = profile.column_stats()
+    assert profile.delimiter == ';'
+    assert profile.rows == 3
+    assert stats['id']['type'] == 'integer'
+    assert stats['montant']['type'] == 'decimal'
+    assert stats['date']['type'] == 'datetime'
+    assert stats['date']['nulls'] == 1
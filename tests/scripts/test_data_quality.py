@@ -0,0 +1,52 @@
+# tests/scripts/test_data_quality.py
+"""
+Tests for the column quality profiler (scripts/legacy-import/data_quality.py)
+"""
+import json
+
+from data_quality import KeyTracker, profile_csv_paths, profile_json, profile_rows
+
+
+class TestMixedNumericColumns:
+    """Integer and decimal values in one column stay numeric"""
+
+    def test_csv_money_column_is_decimal(self, tmp_path):
+        path = tmp_path / 'loyers.csv'
+        path.write_text('id;montant\n1;1.5\n2;3\n3;4.25\n', encoding='utf-8')
+        profile, = profile_csv_paths([path], workers=1)
+        montant = profile['columns']['montant']
+        assert montant['type'] == 'decimal'
+        assert montant['min'] == 1.5
+        assert montant['max'] == 4.25
+        assert sum(b['count'] for b in montant['histogram']) == 3
+
+    def test_json_column_is_decimal(self, tmp_path):
+        path = tmp_path / 'paiements.json'
+        path.write_text(json.dumps([{'id': 1, 'x': 2.5}, {'id': 2, 'x': 3}, {'id': 3, 'x': 10}]), encoding='utf-8')
+        profile, = profile_json(path)
+        x = profile['columns']['x']
+        assert x['type'] == 'decimal'
+        assert (x['min'], x['max']) == (2.5, 10)
+
+    def test_numeric_min_max_are_not_string_ordered(self):
+        profile = profile_rows('t', ['id', 'montant'], [(1, '9'), (2, '10.5'), (3, '100')], ['id'])
+        montant = profile['columns']['montant']
+        assert montant['type'] == 'decimal'
+        assert (montant['min'], montant['max']) == (9, 100)
+
+
+class TestDuplicateKeys:
+    def test_duplicates_in_memory(self):
+        profile = profile_rows('t', ['id', 'nom'], [(1, 'a'), (2, 'b'), (1, 'c'), (None, 'd')], ['id'])
+        assert profile['duplicate_keys'] == 1
+        assert profile['duplicate_key_samples'] == ['1']
+        assert profile['null_keys'] == 1
+
+    def test_duplicates_after_spilling_to_disk(self):
+        keys = KeyTracker(memory_keys=100)
+        for key in list(range(5000)) + [3, 4999]:
+            keys.add(str(key))
+        assert keys.spilled
+        keys.finish()
+        assert keys.duplicates == 2
+        assert sorted(keys.samples) == ['3', '4999']
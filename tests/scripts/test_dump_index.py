@@ -0,0 +1,99 @@
+# tests/scripts/test_dump_index.py
+"""
+Tests for the dump index byte ranges (scripts/legacy-import/dump_index.py)
+"""
+import pytest
+
+import dump_index
+from dump_index import DumpIndex, iter_range_lines, trim_ranges
+
+DUMP_LINES = [
+    "-- MySQL dump 10.13\n",
+    "SET NAMES utf8mb4;\n",
+    "DROP TABLE IF EXISTS `locataire`;\n",
+    "CREATE TABLE `locataire` (\n",
+    "  `id` int(11) NOT NULL,\n",
+    "  `nom` varchar(100) DEFAULT NULL,\n",
+    "  PRIMARY KEY (`id`)\n",
+    ") ENGINE=InnoDB;\n",
+    "LOCK TABLES `locataire` WRITE;\n",
+    "INSERT INTO `locataire` VALUES (1,'Diallo'),(2,'Camara, A.');\n",
+    "INSERT INTO `locataire` VALUES (3,'Barry\\nNote'),(4,'Sow');\n",
+    "UNLOCK TABLES;\n",
+    "CREATE TABLE `historique` (\n",
+    "  `id` int(11) NOT NULL,\n",
+    "  `objet` text\n",
+    ");\n",
+    "INSERT INTO `historique` (`id`, `objet`) VALUES (1,'relance');\n",
+    "INSERT INTO `historique` (`id`, `objet`) VALUES (2,'reçu (loyer)');\n",
+    "INSERT INTO `locataire` VALUES (5,'Bah');\n",
+    "INSERT INTO `historique` (`id`, `objet`) VALUES (3,'fin');",
+]
+
+
+@pytest.fixture
+def dump(tmp_path):
+    path = tmp_path / 'dump.sql'
+    path.write_bytes(''.join(DUMP_LINES).encode('utf-8'))
+    return path
+
+
+def inserts_for(table):
+    return [line.encode('utf-8') for line in DUMP_LINES if line.startswith(f"INSERT INTO `{table}`")]
+
+
+def read_ranges(path, ranges, **kwargs):
+    return [line for _, line in iter_range_lines(path, ranges, **kwargs)]
+
+
+class TestRanges:
+    @pytest.mark.parametrize('table', ['locataire', 'historique'])
+    def test_ranges_reproduce_every_insert_line(self, dump, table):
+        index = DumpIndex.build(dump)
+        assert read_ranges(dump, index.tables[table].ranges) == inserts_for(table)
+
+    def test_offsets_point_at_the_lines(self, dump):
+        index = DumpIndex.build(dump)
+        data = dump.read_bytes()
+        for offset, line in iter_range_lines(dump, index.tables['locataire'].ranges):
+            assert data[offset:offset + len(line)] == line
+
+    def test_contiguous_inserts_share_one_range(self, dump):
+        index = DumpIndex.build(dump)
+        assert len(index.tables['locataire'].ranges) == 2
+        assert index.tables['locataire'].rows_estimate == 5
+        assert index.tables['historique'].columns == ['id', 'objet']
+
+    @pytest.mark.parametrize('shard_bytes', [1, 17, 64, 1000])
+    def test_shards_read_each_line_once(self, dump, shard_bytes):
+        index = DumpIndex.build(dump)
+        shards = index.shard_table('locataire', shard_bytes)
+        lines = [line for shard in shards for line in read_ranges(dump, shard)]
+        assert lines == inserts_for('locataire')
+
+    def test_small_read_buffer(self, dump):
+        index = DumpIndex.build(dump)
+        assert read_ranges(dump, index.tables['historique'].ranges, chunk_size=8) == inserts_for('historique')
+
+    def test_trimmed_ranges_resume_after_a_line(self, dump):
+        index = DumpIndex.build(dump)
+        ranges = index.tables['locataire'].ranges
+        (first, line), = list(iter_range_lines(dump, ranges))[:1]
+        resumed = read_ranges(dump, trim_ranges(ranges, first + len(line)))
+        assert resumed == inserts_for('locataire')[1:]
+
+
+def test_parallel_build_matches_sequential(dump, monkeypatch):
+    monkeypatch.setattr(dump_index, 'MIN_PARALLEL_BYTES', 0)
+    sequential = DumpIndex.build(dump)
+    parallel = DumpIndex.build_parallel(dump, workers=2)
+    assert parallel.tables == sequential.tables
+
+
+def test_sidecar_round_trip(dump):
+    index = DumpIndex.build(dump)
+    index.save()
+    assert DumpIndex.load(dump) == index
+
+    dump.write_bytes(dump.read_bytes() + b"\n")
+    assert DumpIndex.load(dump) is None
@@ -0,0 +1,94 @@
+# tests/scripts/test_migration_verify.py
+"""
+Tests for the range-checksum verifier (scripts/migration_verify.py)
+Hash queries are built from fake connections: no MySQL or PostgreSQL needed
+"""
+import re
+
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('psycopg2')
+
+from migration_engine import TableSpec
+from migration_verify import RangeChecker, build_plan
+
+# Placeholder pattern used by mysql-connector when parameters are given
+MYSQL_PARAM_RE = re.compile(r'(%s)')
+
+HISTORIQUE_DDL = """CREATE TABLE `historique` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `libelle` varchar(255) DEFAULT NULL,
+  `date_op` datetime NOT NULL DEFAULT '0000-00-00 00:00:00',
+  `jour` date DEFAULT NULL,
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=latin1"""
+
+TARGET_TYPES = [('id', 'integer'), ('libelle', 'text'),
+                ('date_op', 'timestamp without time zone'), ('jour', 'date')]
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = None
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((sql, params))
+        if sql.startswith('SHOW CREATE TABLE'):
+            self.result = [('historique', HISTORIQUE_DDL)]
+        elif 'information_schema.columns' in sql:
+            self.result = TARGET_TYPES
+        else:
+            self.result = [(0, 0)]
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def plan():
+    return build_plan(FakeConnection(), FakeConnection(), TableSpec('historique', 'historique'))
+
+
+class TestHashQueries:
+    """Range hash queries must run as-is on both servers"""
+
+    def test_date_formats_are_not_escaped(self, plan):
+        assert '%%' not in plan.my_hash_sql
+        assert "DATE_FORMAT(" in plan.my_hash_sql
+        assert "'%Y-%m-%d %H:%i:%s'" in plan.my_hash_sql
+        assert "'%Y-%m-%d'" in plan.my_hash_sql
+
+    def test_hash_queries_have_no_placeholders(self, plan):
+        my_sql, pg_sql = plan.hash_queries((1000, 2000))
+        assert '`id` >= 1000 AND `id` < 2000' in my_sql
+        assert '"id" >= 1000 AND "id" < 2000' in pg_sql
+        assert '%s' not in pg_sql
+
+    def test_hash_is_executed_without_parameters(self, plan):
+        my_conn, pg_conn = FakeConnection(), FakeConnection()
+        RangeChecker(plan, my_conn, pg_conn, leaf_size=1000)._hash((0, 500))
+        (my_sql, my_params), = my_conn.executed
+        (pg_sql, pg_params), = pg_conn.executed
+        # Without parameters mysql-connector leaves the '%s' of DATE_FORMAT alone
+        assert my_params is None and pg_params is None
+        # The only '%s' left is the seconds of the single datetime column
+        assert len(MYSQL_PARAM_RE.findall(my_sql)) == 1
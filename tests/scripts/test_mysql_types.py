@@ -0,0 +1,47 @@
+# tests/scripts/test_mysql_types.py
+"""
+Tests for the MySQL → PostgreSQL column mapping (scripts/legacy-import/mysql_types.py)
+"""
+import pytest
+
+from mysql_types import MySQLColumn
+
+
+class TestBooleanColumns:
+    """tinyint(1) and bit(1) become BOOLEAN, with values converted to bool"""
+
+    @pytest.mark.parametrize('column', [
+        MySQLColumn('actif', 'tinyint', ('1',)),
+        MySQLColumn('actif', 'bit', ('1',)),
+        MySQLColumn('actif', 'bit'),
+    ])
+    def test_maps_to_boolean(self, column):
+        assert column.pg_type == 'BOOLEAN'
+
+    @pytest.mark.parametrize('value, expected', [
+        (0, False),
+        (1, True),
+        (2, True),
+        (-1, True),
+        ('0', False),
+        ('2', True),
+        ("b'1'", True),
+        ("b'0'", False),
+        (b'\x01', True),
+        (b'\x00', False),
+        ('', None),
+        (None, None),
+    ])
+    def test_any_non_zero_value_is_true(self, value, expected):
+        assert MySQLColumn('actif', 'tinyint', ('1',)).converter(value) is expected
+
+    def test_wider_integers_stay_integers(self):
+        column = MySQLColumn('statut', 'tinyint', ('4',))
+        assert column.pg_type == 'SMALLINT'
+        assert column.converter('2') == 2
+
+    def test_wide_bit_columns_are_integers(self):
+        column = MySQLColumn('flags', 'bit', ('8',))
+        assert column.pg_type == 'BIGINT'
+        assert column.converter("b'101'") == 5
+        assert column.converter(b'\x01\x00') == 256
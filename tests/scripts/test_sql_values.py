@@ -0,0 +1,89 @@
+# tests/scripts/test_sql_values.py
+"""
+Tests for the shared mysqldump INSERT tokenizer (scripts/legacy-import/sql_values.py)
+"""
+from decimal import Decimal
+
+import pytest
+
+from sql_values import iter_insert_rows, parse_insert_header
+
+
+def rows_of(line):
+    parsed = iter_insert_rows(line)
+    assert parsed is not None
+    return list(parsed[2])
+
+
+class TestHeader:
+    def test_table_and_explicit_columns(self):
+        table, columns, values = iter_insert_rows("INSERT INTO `Locataire` (`id`, `nom`) VALUES (1,'a');")
+        assert table == 'locataire'
+        assert columns == ['id', 'nom']
+        assert list(values) == [[1, 'a']]
+
+    def test_insert_ignore_without_columns(self):
+        table, columns, _ = parse_insert_header("INSERT IGNORE INTO `historique` VALUES (1);")
+        assert (table, columns) == ('historique', None)
+
+    def test_other_statements_are_not_inserts(self):
+        assert iter_insert_rows("CREATE TABLE `t` (`id` int);") is None
+        assert iter_insert_rows("-- INSERT INTO `t` VALUES (1);") is None
+
+
+class TestStrings:
+    """Separators and escapes inside quoted strings belong to the value"""
+
+    def test_extended_insert_with_commas_and_parentheses_in_strings(self):
+        line = "INSERT INTO `t` VALUES (1,'a, b','(c)'),(2,'),(','x;y');\n"
+        assert rows_of(line) == [[1, 'a, b', '(c)'], [2, '),(', 'x;y']]
+
+    @pytest.mark.parametrize('literal, expected', [
+        (r"'l\'appartement'", "l'appartement"),
+        ("'l''appartement'", "l'appartement"),
+        (r"'ligne 1\nligne 2'", 'ligne 1\nligne 2'),
+        (r"'C:\\dossier'", 'C:\\dossier'),
+        (r"'tab\tnul\0'", 'tab\tnul\0'),
+        (r"'100\%'", '100\\%'),
+        ('"double ""quote"""', 'double "quote"'),
+        ("''", ''),
+    ])
+    def test_escapes(self, literal, expected):
+        assert rows_of(f"INSERT INTO `t` VALUES ({literal},1);") == [[expected, 1]]
+
+    def test_escaped_quote_before_separator(self):
+        line = r"INSERT INTO `t` VALUES ('fin\\',2),('a\',b',3);"
+        assert rows_of(line) == [['fin\\', 2], ["a',b", 3]]
+
+
+class TestLiterals:
+    @pytest.mark.parametrize('literal, expected', [
+        ('NULL', None),
+        ('null', None),
+        ('42', 42),
+        ('-7', -7),
+        ('+3', 3),
+        ('850.00', Decimal('850.00')),
+        ('-0.5', Decimal('-0.5')),
+        ('.25', Decimal('0.25')),
+        ('1e5', 1e5),
+        ('-2.5E-3', -2.5e-3),
+        ('0xCAFE', b'\xca\xfe'),
+        ("X'0A0B'", b'\x0a\x0b'),
+        ("_binary 'ab'", b'ab'),
+        ('CURRENT_TIMESTAMP', 'CURRENT_TIMESTAMP'),
+    ])
+    def test_typed_values(self, literal, expected):
+        [[value]] = rows_of(f"INSERT INTO `t` VALUES ({literal});")
+        assert value == expected
+        assert type(value) is type(expected)
+
+    def test_mixed_tuple_with_spaces(self):
+        line = "INSERT INTO `t` VALUES (1, NULL , -12,'x', 3.50, 6.02e23) , (2,NULL,0,'',0.0,1E-2);"
+        assert rows_of(line) == [
+            [1, None, -12, 'x', Decimal('3.50'), 6.02e23],
+            [2, None, 0, '', Decimal('0.0'), 1e-2],
+        ]
+
+    def test_truncated_tuple_is_dropped(self):
+        assert rows_of("INSERT INTO `t` VALUES (1,'a'),(2,'b") == [[1, 'a']]